@@ -0,0 +1,134 @@
+import math
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+from receiver import CHUNK_SIZE, FRAME_BUFFER, receive_frame
+
+# Receiver CPU time per frame for 1080p JPEG frames over loopback UDP: the
+# original reassembly (bytes += packet[1:], one copy of the whole frame so
+# far per packet) against receive_frame() (recvfrom_into straight into a
+# preallocated bytearray). The sender cuts frames into packets exactly as
+# sender.py does and waits for each frame to be reassembled before sending
+# the next, so no datagram is dropped and both receivers do the same work.
+#
+# With OpenCV installed the frames are real JPEG encodings of a 1920x1080
+# image and decoding is timed as well; without it they are random bytes of a
+# typical 1080p JPEG size and only reassembly is timed.
+
+WIDTH, HEIGHT = 1920, 1080
+JPEG_BYTES = 600_000        # stand-in frame size without OpenCV
+
+def make_frame(seed=0):
+    rng = np.random.default_rng(seed)
+    try:
+        import cv2
+    except ImportError:
+        return rng.integers(0, 256, JPEG_BYTES, dtype=np.uint8).tobytes(), None
+    # Smooth gradients plus noise, so the JPEG is about as large as a video frame's
+    x = np.linspace(0, 255, WIDTH)
+    y = np.linspace(0, 255, HEIGHT)[:, None]
+    image = np.dstack([x + 0 * y, y + 0 * x, (x + y) / 2]) + rng.normal(0, 12, (HEIGHT, WIDTH, 3))
+    _, encoded = cv2.imencode(".jpg", np.clip(image, 0, 255).astype(np.uint8))
+    return encoded.tobytes(), cv2
+
+def packets(data):
+    # Same packetization as sender.py
+    total_chunks = math.ceil(len(data) / CHUNK_SIZE)
+    return [(b'1' if i == total_chunks - 1 else b'0') + data[i * CHUNK_SIZE:(i + 1) * CHUNK_SIZE]
+            for i in range(total_chunks)]
+
+def legacy_receiver(sock, frames, decode, done):
+    # The original receiver loop
+    buffer = b""
+    received = 0
+    while received < frames:
+        packet, _ = sock.recvfrom(CHUNK_SIZE + 1)
+        marker, chunk = packet[0:1], packet[1:]
+        buffer += chunk
+
+        if marker == b'1':
+            if decode is not None:
+                decode(np.frombuffer(buffer, np.uint8))
+            done.append(buffer)
+            buffer = b""
+            received += 1
+
+def zero_copy_receiver(sock, frames, decode, done):
+    buffer = bytearray(FRAME_BUFFER)
+    for _ in range(frames):
+        buffer, size = receive_frame(sock, buffer)
+        if decode is not None:
+            decode(np.frombuffer(buffer, np.uint8, size, offset=1))
+        done.append(bytes(buffer[1:1 + size]) if len(done) == 0 else size)
+
+def measure(receiver, data, frames, decode):
+    """
+    Streams `frames` copies of `data` to `receiver` over loopback and
+    returns its CPU seconds per frame (thread CPU time, so the sender is not
+    counted). The first frame is checked byte for byte.
+    """
+    recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    recv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+    recv_sock.bind(("127.0.0.1", 0))
+    send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    address = recv_sock.getsockname()
+    done = []
+    cpu = {}
+
+    def run():
+        start = time.thread_time()
+        receiver(recv_sock, frames, decode, done)
+        cpu['seconds'] = time.thread_time() - start
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    frame_packets = packets(data)
+    for i in range(frames):
+        for packet in frame_packets:
+            send_sock.sendto(packet, address)
+        while len(done) <= i:
+            time.sleep(0)
+    thread.join()
+    recv_sock.close()
+    send_sock.close()
+    assert bytes(done[0]) == data, receiver.__name__
+    return cpu['seconds'] / frames
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    data, cv2 = make_frame()
+    decode = (lambda array: cv2.imdecode(array, cv2.IMREAD_COLOR)) if cv2 is not None else None
+    what = "reassembly + decode" if decode else "reassembly only (OpenCV not installed)"
+    print(f"--- {WIDTH}x{HEIGHT} frames of {len(data) / 1000:.0f} KB ({len(packets(data))} packets), "
+          f"{frames} frames, {what} ---")
+    print(f"{'Receiver':<28} | {'CPU per frame':>13} | {'Frames/s of CPU':>15}")
+    print("-" * 62)
+    results = {}
+    for receiver in (legacy_receiver, zero_copy_receiver):
+        per_frame = measure(receiver, data, frames, decode)
+        results[receiver.__name__] = per_frame
+        print(f"{receiver.__name__:<28} | {per_frame * 1e6:10.0f} us | {1 / per_frame:15.0f}")
+    print(f"Speedup: {results['legacy_receiver'] / results['zero_copy_receiver']:.1f}x")
+
+    # Test Case: frames larger than the initial buffer and a one-packet
+    # frame come through intact (the buffer grows as needed)
+    for size in (3 * FRAME_BUFFER + 123, 10):
+        big = os.urandom(size)
+        assert measure(zero_copy_receiver, big, 2, None) > 0
+
+    # Test Case: empty datagrams in the middle of a frame are ignored
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as recv_sock, \
+            socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as send_sock:
+        recv_sock.bind(("127.0.0.1", 0))
+        data = os.urandom(3 * CHUNK_SIZE + 7)
+        for packet in packets(data):
+            send_sock.sendto(b"", recv_sock.getsockname())
+            send_sock.sendto(packet, recv_sock.getsockname())
+        buffer, size = receive_frame(recv_sock, bytearray(FRAME_BUFFER))
+        assert bytes(buffer[1:1 + size]) == data
+    print("Reassembly Test: PASSED")
@@ -1,26 +1,61 @@
-import cv2
 import socket
 import numpy as np
 
 CLIENT_IP = "localhost"
 CLIENT_PORT = 9999
 CHUNK_SIZE = 4096
+PACKET_SIZE = CHUNK_SIZE + 1        # marker byte + chunk
+FRAME_BUFFER = 1 << 20              # initial frame buffer, grows if needed
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-sock.bind((CLIENT_IP, CLIENT_PORT))
+def receive_frame(sock, buffer):
+    """
+    Receives the packets of one frame straight into `buffer` (a bytearray)
+    with recvfrom_into, with no per-packet copies or concatenation.
 
-print("Client listening... Press 'q' to quit.")
+    Each packet is a marker byte (b'1' on the last packet of a frame) and a
+    chunk. A packet is received so that its chunk lands right after the
+    previous one, which puts its marker on the last byte received so far;
+    that byte is saved before and restored after. buffer[0] is spare room
+    for the first marker, so the frame is buffer[1:1 + size].
 
-buffer = b""
+    Returns (buffer, size); buffer is a new, larger bytearray when the frame
+    did not fit.
+    """
+    view = memoryview(buffer)
+    pos = 1
+    while True:
+        if pos + PACKET_SIZE > len(buffer):
+            larger = bytearray(2 * len(buffer))
+            larger[:pos] = view[:pos]
+            view.release()
+            buffer, view = larger, memoryview(larger)
+        saved = buffer[pos - 1]
+        size, _ = sock.recvfrom_into(view[pos - 1:pos - 1 + PACKET_SIZE])
+        if size < 1:
+            # An empty datagram has no marker or chunk; skip it, as the
+            # original loop did, instead of stepping pos back a byte
+            continue
+        marker = buffer[pos - 1]
+        buffer[pos - 1] = saved
+        pos += size - 1
+        if marker == ord('1'):
+            view.release()
+            return buffer, pos - 1
 
-while True:
-    packet, _ = sock.recvfrom(CHUNK_SIZE + 1)
-    marker, chunk = packet[0:1], packet[1:]
-    buffer += chunk
+def main():
+    import cv2
 
-    if marker == b'1':
-        frame = cv2.imdecode(np.frombuffer(buffer, np.uint8), cv2.IMREAD_COLOR)
-        buffer = b""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((CLIENT_IP, CLIENT_PORT))
+
+    print("Client listening... Press 'q' to quit.")
+
+    buffer = bytearray(FRAME_BUFFER)
+
+    while True:
+        buffer, size = receive_frame(sock, buffer)
+        # Decode in place: np.frombuffer wraps the frame bytes without copying
+        frame = cv2.imdecode(np.frombuffer(buffer, np.uint8, size, offset=1), cv2.IMREAD_COLOR)
 
         if frame is not None:
             cv2.imshow("UDP Video Stream", frame)
@@ -28,6 +63,9 @@ while True:
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
-sock.close()
-cv2.destroyAllWindows()
-print("Client stopped.")
+    sock.close()
+    cv2.destroyAllWindows()
+    print("Client stopped.")
+
+if __name__ == "__main__":
+    main()
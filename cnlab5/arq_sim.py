@@ -0,0 +1,289 @@
+import heapq
+import random
+from collections import deque
+
+# Discrete-event simulation of Stop-and-Wait, Go-Back-N and Selective Repeat
+# ARQ. Nothing sleeps: transmission, propagation, losses and timeouts are
+# events on a heap, ordered by a virtual clock that jumps from one event to
+# the next. A million frames take seconds of real time, whatever the link
+# delays are.
+
+# Event kinds (frames and ACKs arriving, a retransmission timer expiring)
+FRAME_ARRIVAL, ACK_ARRIVAL, TIMEOUT = 0, 1, 2
+
+PROTOCOLS = ('stop-and-wait', 'go-back-n', 'selective-repeat')
+
+class Link:
+    """
+    One direction of a point-to-point link: frames are sent one after the
+    other at `rate` bits/s, then take `delay` seconds to propagate, and each
+    is lost with probability `loss`.
+    """
+    __slots__ = ('rate', 'delay', 'loss', 'busy_until', 'busy_time')
+
+    def __init__(self, rate, delay, loss):
+        self.rate = rate
+        self.delay = delay
+        self.loss = loss
+        self.busy_until = 0.0
+        self.busy_time = 0.0
+
+    def transmit(self, now, bits):
+        # Queue `bits` behind whatever is being sent; returns the time the
+        # transmission starts and the time it arrives at the other end
+        start = now if now > self.busy_until else self.busy_until
+        end = start + bits / self.rate
+        self.busy_until = end
+        self.busy_time += end - start
+        return start, end + self.delay
+
+class ArqSimulation:
+    """
+    Sender and receiver of one ARQ protocol over a lossy link.
+
+      protocol    - 'stop-and-wait', 'go-back-n' or 'selective-repeat'
+      frames      - number of frames to deliver
+      window      - sender window (always 1 for stop-and-wait)
+      loss        - probability of losing a frame or an ACK
+      rate, delay - link rate (bits/s) and one-way propagation delay (s)
+      frame_bytes, ack_bytes - sizes on the wire
+      timeout     - retransmission timeout (default: twice the round trip)
+
+    Sequence numbers are not wrapped, so the window size is not limited by
+    the number of sequence bits. Stop-and-wait is Go-Back-N with a window of
+    one. Go-Back-N ACKs are cumulative (the last frame received in order);
+    Selective Repeat ACKs every frame and buffers out-of-order ones.
+
+    Timers are lazy: the sender keeps one live TIMEOUT event, for the
+    earliest deadline it knows of. When it fires early (the oldest frame was
+    acknowledged or resent meanwhile) it is simply re-armed for the real
+    deadline, so ACKs never have to cancel anything.
+    """
+
+    def __init__(self, protocol, frames, window=8, loss=0.1, rate=1e6, delay=0.01,
+                 frame_bytes=1000, ack_bytes=40, timeout=None, seed=1, trace=False):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"unknown protocol {protocol!r}, expected one of {PROTOCOLS}")
+        self.protocol = protocol
+        self.frames = frames
+        self.window = 1 if protocol == 'stop-and-wait' else window
+        self.frame_bits = frame_bytes * 8
+        self.ack_bits = ack_bytes * 8
+        self.forward = Link(rate, delay, loss)
+        self.reverse = Link(rate, delay, loss)
+        rtt = self.frame_bits / rate + self.ack_bits / rate + 2 * delay
+        self.timeout = 2 * rtt if timeout is None else timeout
+        self.rng = random.Random(seed)
+        self.trace = trace
+
+        self.now = 0.0
+        self.events = []
+        self.order = 0          # tie-break: same-time events in scheduling order
+        self.timer_at = None    # time of the TIMEOUT event on the heap, if any
+
+        # Sender: frames base..next_seq-1 are outstanding
+        self.base = 0
+        self.next_seq = 0
+        self.sent_at = [0.0] * frames
+        self.acked = bytearray(frames)
+        self.deadlines = deque()    # Selective Repeat: (deadline, seq, sent_at)
+        # Receiver: frames before `expected` have been delivered in order
+        self.expected = 0
+        self.received = bytearray(frames)
+
+        self.stats = dict.fromkeys(('frames_sent', 'retransmissions', 'frames_lost', 'acks_sent',
+                                    'acks_lost', 'timeouts', 'events'), 0)
+
+    def log(self, message):
+        print(f"[{self.now * 1000:10.3f} ms] {message}")
+
+    def schedule(self, time, kind, seq):
+        self.order += 1
+        heapq.heappush(self.events, (time, self.order, kind, seq))
+
+    def arm_timer(self, deadline):
+        # Make sure a TIMEOUT event fires by `deadline`. An event that is
+        # replaced by an earlier one stays on the heap and is ignored.
+        if self.timer_at is None or deadline < self.timer_at:
+            self.timer_at = deadline
+            self.schedule(deadline, TIMEOUT, -1)
+
+    # --- Sender ---
+
+    def send(self, seq, retransmission=False):
+        start, arrival = self.forward.transmit(self.now, self.frame_bits)
+        self.sent_at[seq] = start
+        stats = self.stats
+        stats['frames_sent'] += 1
+        if retransmission:
+            stats['retransmissions'] += 1
+        if self.trace:
+            self.log(f"{'Retransmitting' if retransmission else 'Sending'} Frame {seq}")
+        if self.rng.random() < self.forward.loss:
+            stats['frames_lost'] += 1
+            if self.trace:
+                self.log(f"  Frame {seq} lost")
+        else:
+            self.schedule(arrival, FRAME_ARRIVAL, seq)
+        if self.protocol == 'selective-repeat':
+            self.deadlines.append((start + self.timeout, seq, start))
+        self.arm_timer(start + self.timeout)
+
+    def fill_window(self):
+        end = min(self.base + self.window, self.frames)
+        while self.next_seq < end:
+            self.send(self.next_seq)
+            self.next_seq += 1
+
+    def on_ack(self, ack):
+        if self.trace:
+            self.log(f"ACK {ack} received")
+        if self.protocol == 'selective-repeat':
+            if self.acked[ack]:
+                return
+            self.acked[ack] = 1
+            base = self.base
+            while base < self.frames and self.acked[base]:
+                base += 1
+            self.base = base
+        elif ack >= self.base:
+            # Cumulative: everything up to `ack` got through
+            self.base = ack + 1
+        self.fill_window()
+
+    def on_timeout(self):
+        self.timer_at = None
+        if self.base >= self.next_seq:
+            return
+        if self.protocol == 'selective-repeat':
+            # Resend each frame whose own timer ran out; entries for frames
+            # acknowledged or resent since are dropped on the way
+            deadlines = self.deadlines
+            while deadlines and deadlines[0][0] <= self.now:
+                _, seq, sent = deadlines.popleft()
+                if not self.acked[seq] and self.sent_at[seq] == sent:
+                    self.stats['timeouts'] += 1
+                    if self.trace:
+                        self.log(f"Timeout for Frame {seq}. Retransmitting...")
+                    self.send(seq, retransmission=True)
+            while deadlines and (self.acked[deadlines[0][1]] or self.sent_at[deadlines[0][1]] != deadlines[0][2]):
+                deadlines.popleft()
+            if deadlines:
+                self.arm_timer(deadlines[0][0])
+            return
+        deadline = self.sent_at[self.base] + self.timeout
+        if self.now < deadline:
+            # The oldest outstanding frame was sent after this timer was set
+            self.arm_timer(deadline)
+            return
+        self.stats['timeouts'] += 1
+        if self.trace:
+            more = f" frames {self.base}..{self.next_seq - 1}" if self.next_seq - self.base > 1 else ""
+            self.log(f"Timeout for Frame {self.base}. Retransmitting{more}...")
+        for seq in range(self.base, self.next_seq):
+            self.send(seq, retransmission=True)
+
+    # --- Receiver ---
+
+    def on_frame(self, seq):
+        if self.protocol == 'selective-repeat':
+            if seq >= self.expected and not self.received[seq]:
+                self.received[seq] = 1
+                expected = self.expected
+                while expected < self.frames and self.received[expected]:
+                    expected += 1
+                self.expected = expected
+            # ACK it even if it is a duplicate: our earlier ACK was lost
+            ack = seq
+        elif seq == self.expected:
+            self.expected += 1
+            ack = seq
+        else:
+            # Go-Back-N discards out-of-order frames and repeats its last ACK
+            ack = self.expected - 1
+        if self.trace:
+            self.log(f"  Frame {seq} received, sending ACK {ack}")
+        if ack < 0:
+            return
+        self.stats['acks_sent'] += 1
+        _, arrival = self.reverse.transmit(self.now, self.ack_bits)
+        if self.rng.random() < self.reverse.loss:
+            self.stats['acks_lost'] += 1
+            if self.trace:
+                self.log(f"  ACK {ack} lost")
+        else:
+            self.schedule(arrival, ACK_ARRIVAL, ack)
+
+    # --- Main loop ---
+
+    def run(self):
+        """
+        Simulate until every frame is acknowledged. Returns the counters plus:
+          time        - virtual seconds until the last ACK arrived
+          throughput  - bits/s put on the forward link, retransmissions included
+          goodput     - bits/s of frames delivered in order (each counted once)
+          utilization - fraction of the time the forward link was sending
+        """
+        self.fill_window()
+        events = self.events
+        pop = heapq.heappop
+        count = 0
+        while self.base < self.frames:
+            self.now, _, kind, seq = pop(events)
+            count += 1
+            if kind == FRAME_ARRIVAL:
+                self.on_frame(seq)
+            elif kind == ACK_ARRIVAL:
+                self.on_ack(seq)
+            elif self.now == self.timer_at:
+                self.on_timeout()
+
+        stats = dict(self.stats, protocol=self.protocol, frames=self.frames, window=self.window, events=count)
+        elapsed = self.now
+        stats['time'] = elapsed
+        # Nothing to send (frames=0) takes no time at all
+        stats['throughput'] = stats['frames_sent'] * self.frame_bits / elapsed if elapsed else 0.0
+        stats['goodput'] = self.expected * self.frame_bits / elapsed if elapsed else 0.0
+        stats['utilization'] = self.forward.busy_time / elapsed if elapsed else 0.0
+        return stats
+
+def simulate(protocol, frames, **options):
+    # Shorthand: ArqSimulation(protocol, frames, **options).run()
+    return ArqSimulation(protocol, frames, **options).run()
+
+if __name__ == "__main__":
+    import time
+
+    print("--- ARQ on a virtual clock: 1 Mbit/s, 10 ms propagation, 1000-byte frames ---\n")
+    for protocol in PROTOCOLS:
+        print(f"--- {protocol}: 6 frames, window 3, 20% loss ---")
+        stats = simulate(protocol, 6, window=3, loss=0.2, seed=4, trace=True)
+        print(f"Done at {stats['time'] * 1000:.1f} ms after {stats['retransmissions']} retransmission(s)\n")
+
+    # Test Case: without loss stop-and-wait keeps the link busy for one
+    # frame time per round trip, U = T_frame / (T_frame + T_ack + 2 * delay)
+    stats = simulate('stop-and-wait', 1_000, loss=0.0)
+    expected = 0.008 / (0.008 + 0.00032 + 0.02)
+    assert abs(stats['utilization'] - expected) < 1e-9, stats['utilization']
+    # ...and a window covering the round trip fills the link
+    assert simulate('go-back-n', 1_000, window=4, loss=0.0)['utilization'] > 0.99
+    assert simulate('selective-repeat', 1_000, window=4, loss=0.0)['utilization'] > 0.99
+    print("Stop-and-wait / full-window utilization Test: PASSED\n")
+
+    # Test Case: an empty transfer is done at once
+    for protocol in PROTOCOLS:
+        stats = simulate(protocol, 0)
+        assert stats['time'] == 0 and stats['frames_sent'] == 0 and stats['throughput'] == 0.0, protocol
+    print("Empty transfer Test: PASSED\n")
+
+    frames = 1_000_000
+    print(f"--- {frames} frames, window 8, 10% loss on frames and ACKs ---")
+    print(f"{'Protocol':<18} | {'Real time':>9} | {'Virtual':>9} | {'Sent':>9} | {'Throughput':>12} | "
+          f"{'Goodput':>12} | {'Utilization':>11}")
+    print("-" * 98)
+    for protocol in PROTOCOLS:
+        start = time.perf_counter()
+        stats = simulate(protocol, frames, window=8, loss=0.1)
+        elapsed = time.perf_counter() - start
+        print(f"{protocol:<18} | {elapsed:8.2f}s | {stats['time']:8.1f}s | {stats['frames_sent']:>9} | "
+              f"{stats['throughput'] / 1e3:7.1f} kb/s | {stats['goodput'] / 1e3:7.1f} kb/s | {stats['utilization']:11.1%}")
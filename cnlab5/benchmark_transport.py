@@ -0,0 +1,104 @@
+import hashlib
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from reliable_udp import PROTOCOLS, loopback_transfer
+
+# Bulk file transfer over loopback: reliable_udp.py (Go-Back-N and Selective
+# Repeat) at several loss rates, against a plain TCP connection. The UDP
+# runs with loss go through a LossyRelay (0.5 ms each way); the kernel's TCP
+# gets no injected loss, because the relay only handles datagrams. Losses
+# for TCP need netem, e.g. (as root):
+#     tc qdisc add dev lo root netem delay 0.5ms loss 1%
+# after which this script measures both under the same conditions.
+
+LOSSES = (0.0, 0.001, 0.01, 0.05, 0.1)
+DELAY = 0.0005
+
+def digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def udp_file_transfer(source, destination, protocol, loss, window=64, seed=1):
+    # The whole file is one message; the receiver writes it out when done
+    with open(source, 'rb') as f:
+        data = f.read()
+    delay = DELAY if loss else 0.0
+    received, stats = loopback_transfer(data, protocol, loss=loss, delay=delay, window=window, seed=seed)
+    with open(destination, 'wb') as f:
+        f.write(received)
+    return stats
+
+def tcp_file_transfer(source, destination, chunk=1 << 20):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    done = {}
+
+    def receive():
+        conn, _ = server.accept()
+        buffer = bytearray(chunk)
+        view = memoryview(buffer)
+        with conn, open(destination, 'wb') as out:
+            while True:
+                size = conn.recv_into(buffer)
+                if not size:
+                    break
+                out.write(view[:size])
+        done['at'] = time.perf_counter()
+
+    thread = threading.Thread(target=receive)
+    thread.start()
+    start = time.perf_counter()
+    with socket.create_connection(server.getsockname()) as client, open(source, 'rb') as f:
+        client.sendfile(f)
+    thread.join()
+    server.close()
+    elapsed = done['at'] - start
+    return {'time': elapsed, 'throughput': os.path.getsize(source) / elapsed, 'retransmissions': 0}
+
+def run(size=16 << 20, repeat=3, window=64):
+    """
+    Transfers a `size`-byte random file `repeat` times per configuration
+    and prints the median MB/s. Every copy is checked against the source.
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'source.bin')
+        destination = os.path.join(directory, 'received.bin')
+        with open(source, 'wb') as f:
+            f.write(os.urandom(size))
+        expected = digest(source)
+
+        configurations = [('tcp', 0.0)] + [(protocol, loss) for protocol in PROTOCOLS for loss in LOSSES]
+        print(f"--- {size >> 20} MB file over loopback, UDP window {window}, "
+              f"relay delay {DELAY * 1000:.1f} ms when lossy, median of {repeat} ---")
+        print(f"{'Transport':<18} | {'Loss':>5} | {'MB/s':>7} | {'Time':>7} | {'Retransmitted':>13}")
+        print("-" * 62)
+        for transport, loss in configurations:
+            runs = []
+            for i in range(repeat):
+                if transport == 'tcp':
+                    stats = tcp_file_transfer(source, destination)
+                else:
+                    stats = udp_file_transfer(source, destination, transport, loss, window, seed=i)
+                assert digest(destination) == expected, (transport, loss)
+                runs.append(stats)
+            throughput = statistics.median(r['throughput'] for r in runs)
+            elapsed = statistics.median(r['time'] for r in runs)
+            retransmitted = statistics.median(r['retransmissions'] for r in runs)
+            segments = -(-size // 1400)
+            print(f"{transport:<18} | {loss:5.1%} | {throughput / 1e6:7.1f} | {elapsed:6.2f}s | "
+                  f"{retransmitted / segments:12.1%}" + (" (kernel)" if transport == 'tcp' else ""))
+            rows.append((transport, loss, throughput, elapsed))
+    return rows
+
+if __name__ == "__main__":
+    # Optional argument: file size in MB
+    size = int(sys.argv[1]) << 20 if len(sys.argv) > 1 else 16 << 20
+    run(size)
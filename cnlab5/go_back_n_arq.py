@@ -52,6 +52,51 @@ def go_back_n_arq(total_frames, window_size, loss_prob):
     print("--- Simulation Complete ---")
 
 
+def go_back_n_batch(total_frames, window_size, loss_prob, trials, seed=None):
+    """
+    Runs `trials` independent Go-Back-N simulations at once, with the same
+    model as go_back_n_arq() but no printing: every round the sender
+    (re)sends its whole window, the receiver accepts frames up to the first
+    lost one, and the window slides past them (a round with nothing
+    accepted is a timeout).
+
+    All trials advance together on NumPy arrays. The position of the first
+    loss in a window is drawn directly (a geometric number of successes
+    before a loss), which has the same distribution as one draw per frame.
+
+    Returns a dict of per-trial arrays:
+        rounds          - rounds (window transmissions) needed
+        sent            - frames transmitted, retransmissions included
+        retransmissions - sent - total_frames
+        efficiency      - total_frames / sent (fraction of useful transmissions)
+    """
+    # NumPy is only imported here, so the lab simulation above runs without it
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    base = np.zeros(trials, dtype=np.int64)
+    rounds = np.zeros(trials, dtype=np.int64)
+    sent = np.zeros(trials, dtype=np.int64)
+    active = np.arange(trials)
+
+    while len(active):
+        in_window = np.minimum(window_size, total_frames - base[active])
+        if loss_prob > 0:
+            accepted = np.minimum(rng.geometric(loss_prob, len(active)) - 1, in_window)
+        else:
+            accepted = in_window
+        base[active] += accepted
+        rounds[active] += 1
+        sent[active] += in_window
+        active = active[base[active] < total_frames]
+
+    return {
+        'rounds': rounds,
+        'sent': sent,
+        'retransmissions': sent - total_frames,
+        'efficiency': total_frames / sent,
+    }
+
+
 if __name__ == "__main__":
     # Adjustable parameters 
     TOTAL_FRAMES = 15
@@ -59,3 +104,14 @@ if __name__ == "__main__":
     LOSS_PROBABILITY = 0.15 # 15% chance of losing a frame
 
     go_back_n_arq(TOTAL_FRAMES, WINDOW_SIZE, LOSS_PROBABILITY)
+
+    # Batch mode: many trials at once, statistics only. It needs NumPy
+    # (pip install numpy); without it only the simulation above runs.
+    import importlib.util
+    if importlib.util.find_spec('numpy') is not None:
+        import numpy as np
+        trials = go_back_n_batch(TOTAL_FRAMES, WINDOW_SIZE, LOSS_PROBABILITY, trials=10_000, seed=1)
+        print(f"\n--- {len(trials['sent'])} batch trials ---")
+        print(f"Efficiency: mean {trials['efficiency'].mean():.3f}, "
+              f"5th-95th percentile {np.percentile(trials['efficiency'], 5):.3f}-{np.percentile(trials['efficiency'], 95):.3f}")
+        print(f"Retransmissions: mean {trials['retransmissions'].mean():.1f}, max {trials['retransmissions'].max()}")
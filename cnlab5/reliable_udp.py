@@ -0,0 +1,487 @@
+import bisect
+import heapq
+import random
+import select
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+# Reliable transfers over UDP (SOCK_DGRAM) with the sliding windows of
+# go_back_n_arq.py / arq_sim.py, on real sockets: the sender keeps base and
+# next_seq, the receiver delivers in order, and lost segments come back by
+# timeout or fast retransmit.
+#
+#   Go-Back-N        - the receiver only accepts the next segment in order and
+#                      ACKs cumulatively; a loss resends the whole window
+#   Selective Repeat - the receiver buffers out-of-order segments and reports
+#                      them in SACK blocks; only missing segments are resent
+#
+# The retransmission timeout adapts to the measured round trip time
+# (Jacobson/Karels, RFC 6298), sampled from timestamps echoed in the ACKs.
+# LossyRelay sits between the two ends on loopback and drops/delays
+# datagrams, so everything can be tried locally.
+
+PROTOCOLS = ('go-back-n', 'selective-repeat')
+
+# Every datagram starts with the same 16-byte header:
+#   kind   (B) - DATA or ACK
+#   flags  (B) - DATA: FIN on the last segment; ACK: number of SACK blocks
+#   window (H) - ACK: receiver window in segments
+#   seq    (I) - DATA: segment number; ACK: segment that triggered the ACK
+#   ack    (I) - ACK: cumulative ACK, the next segment expected in order
+#   stamp  (I) - DATA: send time in microseconds (mod 2**32); ACK: the
+#                stamp of the segment that triggered it
+# followed by the payload (DATA) or up to MAX_SACK (start, end) pairs of
+# segments received past the cumulative ACK, end exclusive (ACK).
+HEADER = struct.Struct('!BBHIII')
+SACK_BLOCK = struct.Struct('!II')
+DATA, ACK = 0, 1
+FIN = 1
+MAX_SACK = 4
+
+PAYLOAD = 1400          # bytes of data per segment (fits a 1500-byte MTU)
+DUP_THRESHOLD = 3       # duplicate ACKs that trigger a fast retransmit
+
+class RtoEstimator:
+    """
+    Jacobson/Karels retransmission timeout (RFC 6298):
+        first sample R:  SRTT = R, RTTVAR = R / 2
+        later samples:   RTTVAR = (1 - beta) * RTTVAR + beta * |SRTT - R|
+                         SRTT   = (1 - alpha) * SRTT + alpha * R
+        RTO = SRTT + 4 * RTTVAR, kept within [min_rto, max_rto]
+    with alpha = 1/8 and beta = 1/4. A timeout doubles the RTO until the
+    next sample (exponential backoff).
+
+    Samples come from echoed timestamps, which tell the transmissions of a
+    segment apart, so unlike Karn's rule retransmitted segments are sampled
+    too. With Karn's rule a Go-Back-N sender that has resent its whole
+    window gets no samples at all, and its RTO stays backed off.
+    """
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self, initial=0.2, min_rto=0.005, max_rto=2.0):
+        self.srtt = None
+        self.rttvar = None
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.rto = initial
+
+    def sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += self.BETA * (abs(self.srtt - rtt) - self.rttvar)
+            self.srtt += self.ALPHA * (rtt - self.srtt)
+        self.rto = min(max(self.srtt + 4 * self.rttvar, self.min_rto), self.max_rto)
+
+    def backoff(self):
+        self.rto = min(self.rto * 2, self.max_rto)
+
+class ReliableSender:
+    """
+    Sends one message (bytes) reliably to `peer` over the UDP socket `sock`.
+
+      protocol - 'go-back-n' or 'selective-repeat'
+      window   - segments in flight at most (also capped by the receiver's)
+      payload  - data bytes per segment
+      initial_rto, min_rto, max_rto - see RtoEstimator
+      max_timeouts - consecutive timeouts, with no ACK in between, after
+                     which send() gives up with TimeoutError
+
+    The message is cut into segments numbered from 0; the last one carries
+    FIN. send() blocks until every segment is acknowledged and returns the
+    transfer statistics. Sequence numbers are not wrapped (one message is
+    at most 2**32 segments).
+    """
+
+    def __init__(self, sock, peer, protocol='selective-repeat', window=64, payload=PAYLOAD,
+                 initial_rto=0.2, min_rto=0.005, max_rto=2.0, max_timeouts=10):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"unknown protocol {protocol!r}, expected one of {PROTOCOLS}")
+        self.sock = sock
+        self.peer = peer
+        self.protocol = protocol
+        self.window = window
+        self.payload = payload
+        self.max_timeouts = max_timeouts
+        self.rto = RtoEstimator(initial_rto, min_rto, max_rto)
+
+    def send(self, data):
+        view = memoryview(data)
+        payload = self.payload
+        count = max(1, -(-len(view) // payload))
+        selective = self.protocol == 'selective-repeat'
+        sock, peer, rto = self.sock, self.peer, self.rto
+
+        # Sender state, as in arq_sim.ArqSimulation: base..next_seq-1 are in flight
+        base = next_seq = 0
+        window = self.window
+        sent_at = [0.0] * count
+        acked = bytearray(count)
+        deadlines = deque()           # Selective Repeat: (deadline, seq, sent_at)
+        last_ack = dup_acks = 0
+        silent = 0                    # consecutive timeouts without an ACK
+        stats = dict.fromkeys(('segments_sent', 'retransmissions', 'timeouts', 'fast_retransmits',
+                               'acks_received'), 0)
+
+        def transmit(seq, retransmission=False):
+            chunk = view[seq * payload:(seq + 1) * payload]
+            flags = FIN if seq == count - 1 else 0
+            now = time.perf_counter()
+            stamp = int(now * 1e6) & 0xFFFFFFFF
+            sock.sendto(HEADER.pack(DATA, flags, 0, seq, 0, stamp) + chunk, peer)
+            sent_at[seq] = now
+            stats['segments_sent'] += 1
+            if retransmission:
+                stats['retransmissions'] += 1
+            if selective:
+                deadlines.append((now + rto.rto, seq, now))
+
+        def go_back(first):
+            # Go-Back-N: resend everything that is in flight
+            for seq in range(first, next_seq):
+                transmit(seq, retransmission=True)
+
+        buffer = bytearray(HEADER.size + MAX_SACK * SACK_BLOCK.size)
+        start = time.perf_counter()
+        while base < count:
+            end = min(base + window, count)
+            while next_seq < end:
+                transmit(next_seq)
+                next_seq += 1
+
+            # Wait for an ACK until the earliest retransmission deadline
+            if selective:
+                while deadlines and (acked[deadlines[0][1]] or sent_at[deadlines[0][1]] != deadlines[0][2]):
+                    deadlines.popleft()
+                deadline = deadlines[0][0] if deadlines else time.perf_counter() + rto.rto
+            else:
+                deadline = sent_at[base] + rto.rto
+            wait = deadline - time.perf_counter()
+            if wait > 0 and select.select((sock,), (), (), wait)[0]:
+                size, address = sock.recvfrom_into(buffer)
+                if address != peer or size < HEADER.size:
+                    continue
+                kind, blocks, advertised, _, cumulative, stamp = HEADER.unpack_from(buffer)
+                if kind != ACK:
+                    continue
+                stats['acks_received'] += 1
+                silent = 0
+                window = max(1, min(self.window, advertised))
+                rto.sample(((int(time.perf_counter() * 1e6) - stamp) & 0xFFFFFFFF) / 1e6)
+                cumulative = min(cumulative, count)
+                if cumulative > base:
+                    acked[base:cumulative] = b'\x01' * (cumulative - base)
+                    base = cumulative
+                for i in range(min(blocks, MAX_SACK)):
+                    low, high = SACK_BLOCK.unpack_from(buffer, HEADER.size + i * SACK_BLOCK.size)
+                    low, high = max(low, base), min(high, next_seq)
+                    if low < high:
+                        acked[low:high] = b'\x01' * (high - low)
+                while base < next_seq and acked[base]:
+                    base += 1
+
+                # Fast retransmit: the receiver keeps asking for `base`
+                if cumulative == last_ack and base < next_seq:
+                    dup_acks += 1
+                    if dup_acks == DUP_THRESHOLD:
+                        stats['fast_retransmits'] += 1
+                        if selective:
+                            transmit(base, retransmission=True)
+                        else:
+                            go_back(base)
+                else:
+                    last_ack, dup_acks = cumulative, 0
+                continue
+
+            # Timeout
+            now = time.perf_counter()
+            if selective:
+                expired = False
+                while deadlines and deadlines[0][0] <= now:
+                    _, seq, sent = deadlines.popleft()
+                    if not acked[seq] and sent_at[seq] == sent:
+                        expired = True
+                        transmit(seq, retransmission=True)
+                if not expired:
+                    continue
+            else:
+                go_back(base)
+            stats['timeouts'] += 1
+            silent += 1
+            if silent >= self.max_timeouts:
+                raise TimeoutError(f"no ACK after {silent} consecutive timeouts, "
+                                   f"{base} of {count} segments acknowledged")
+            rto.backoff()
+
+        elapsed = time.perf_counter() - start
+        stats.update(protocol=self.protocol, bytes=len(view), segments=count, time=elapsed,
+                     throughput=len(view) / elapsed if elapsed else 0.0,
+                     srtt=rto.srtt, rto=rto.rto)
+        return stats
+
+class ReliableReceiver:
+    """
+    Receives one message sent by a ReliableSender on the bound UDP socket
+    `sock`. `window` is the number of segments Selective Repeat buffers
+    past the cumulative ACK (Go-Back-N buffers none). The sender's address
+    is learnt from the first segment.
+    """
+
+    def __init__(self, sock, protocol='selective-repeat', window=1024):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"unknown protocol {protocol!r}, expected one of {PROTOCOLS}")
+        self.sock = sock
+        self.protocol = protocol
+        self.window = 1 if protocol == 'go-back-n' else window
+        self.peer = None
+        self.completed_at = None
+        self._stopped = False
+
+    def stop(self):
+        """
+        Makes a recv() running in another thread return what it has so far:
+        sets a flag and wakes the blocked socket with an empty datagram.
+        """
+        self._stopped = True
+        with socket.socket(self.sock.family, socket.SOCK_DGRAM) as wake:
+            wake.sendto(b'', self.sock.getsockname())
+
+    def recv(self, payload=PAYLOAD, linger=0.5, timeout=None):
+        """
+        Returns the message once every segment up to FIN has arrived. The
+        receiver then keeps answering retransmissions until the sender has
+        been quiet for `linger` seconds, in case the last ACKs were lost
+        (like TCP's TIME-WAIT). `timeout` bounds the wait for the first
+        segment; socket.timeout is raised when it runs out.
+        """
+        sock = self.sock
+        selective = self.protocol == 'selective-repeat'
+        window = self.window
+        expected = 0
+        total = None        # number of segments, known once FIN arrives
+        chunks = []
+        buffered = {}       # Selective Repeat: seq -> payload, past `expected`
+        ranges = []         # ... and the same segments as sorted [start, end) runs
+        buffer = bytearray(HEADER.size + payload)
+        view = memoryview(buffer)
+        sock.settimeout(timeout)
+
+        while not self._stopped:
+            if total is not None and expected == total:
+                if self.completed_at is None:
+                    self.completed_at = time.perf_counter()
+                    sock.settimeout(linger)
+                try:
+                    size, address = sock.recvfrom_into(buffer)
+                except socket.timeout:
+                    break
+            else:
+                size, address = sock.recvfrom_into(buffer)
+            if self._stopped or size < HEADER.size:
+                continue
+            if self.peer is None:
+                self.peer = address
+            elif address != self.peer:
+                continue
+            kind, flags, _, seq, _, stamp = HEADER.unpack_from(buffer)
+            if kind != DATA:
+                continue
+            if flags & FIN:
+                total = seq + 1
+
+            if seq == expected:
+                chunks.append(bytes(view[HEADER.size:size]))
+                expected += 1
+                if ranges and ranges[0][0] == expected:
+                    start, end = ranges.pop(0)
+                    chunks.extend(buffered.pop(s) for s in range(start, end))
+                    expected = end
+            elif selective and expected < seq < expected + window and seq not in buffered:
+                buffered[seq] = bytes(view[HEADER.size:size])
+                self._add_range(ranges, seq)
+
+            # ACK every segment, duplicates included (our earlier ACK may be
+            # lost). The block holding `seq` goes first, as in RFC 2018.
+            blocks = []
+            if ranges:
+                i = bisect.bisect_right(ranges, (seq, 1 << 32)) - 1
+                if i >= 0 and ranges[i][1] > seq:
+                    blocks.append(ranges[i])
+                blocks.extend(r for r in ranges[:MAX_SACK] if r not in blocks)
+                blocks = blocks[:MAX_SACK]
+            free = min(window - len(buffered), 0xFFFF) if selective else 0xFFFF
+            ack = HEADER.pack(ACK, len(blocks), max(free, 1), seq, expected, stamp)
+            sock.sendto(ack + b''.join(SACK_BLOCK.pack(*r) for r in blocks), self.peer)
+
+        sock.settimeout(None)
+        return b''.join(chunks)
+
+    @staticmethod
+    def _add_range(ranges, seq):
+        # Insert `seq` into the sorted, disjoint [start, end) runs, merging
+        # it with the run ending just before it and the one starting after it
+        i = bisect.bisect_right(ranges, (seq, 1 << 32))
+        start, end = seq, seq + 1
+        if i > 0 and ranges[i - 1][1] == seq:
+            i -= 1
+            start = ranges.pop(i)[0]
+        if i < len(ranges) and ranges[i][0] == end:
+            end = ranges.pop(i)[1]
+        ranges.insert(i, (start, end))
+
+class LossyRelay:
+    """
+    UDP relay for testing on loopback: datagrams sent to relay.address are
+    forwarded to `target`, and the target's replies go back to whoever
+    sent last. Each datagram, in either direction, is dropped with
+    probability `loss` and otherwise held for `delay` seconds plus a
+    uniform random `jitter` (which can reorder datagrams).
+
+    Runs in a background thread between start() and close(); it can be
+    used as a context manager.
+    """
+
+    def __init__(self, target, loss=0.0, delay=0.0, jitter=0.0, seed=None, host='127.0.0.1'):
+        self.target = target
+        self.loss = loss
+        self.delay = delay
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))
+        self.address = self.sock.getsockname()
+        self.client = None
+        self.stats = dict.fromkeys(('forwarded', 'dropped'), 0)
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        self.sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        sock, rng = self.sock, self.rng
+        pending = []        # (due, order, datagram, destination)
+        order = 0
+        while self._running:
+            wait = 0.1
+            if pending:
+                wait = min(wait, max(pending[0][0] - time.perf_counter(), 0.0))
+            if select.select((sock,), (), (), wait)[0]:
+                datagram, address = sock.recvfrom(65536)
+                if address == self.target:
+                    destination = self.client
+                else:
+                    self.client = address
+                    destination = self.target
+                if destination is None:
+                    continue
+                if rng.random() < self.loss:
+                    self.stats['dropped'] += 1
+                elif self.delay or self.jitter:
+                    order += 1
+                    due = time.perf_counter() + self.delay + rng.random() * self.jitter
+                    heapq.heappush(pending, (due, order, datagram, destination))
+                else:
+                    sock.sendto(datagram, destination)
+                    self.stats['forwarded'] += 1
+            now = time.perf_counter()
+            while pending and pending[0][0] <= now:
+                _, _, datagram, destination = heapq.heappop(pending)
+                sock.sendto(datagram, destination)
+                self.stats['forwarded'] += 1
+
+def loopback_transfer(data, protocol='selective-repeat', loss=0.0, delay=0.0, jitter=0.0,
+                      window=64, payload=PAYLOAD, seed=None, linger=0.2):
+    """
+    Sends `data` from a ReliableSender to a ReliableReceiver on 127.0.0.1,
+    through a LossyRelay when loss, delay or jitter is set. Returns the
+    received bytes and the sender's statistics, where `time` and
+    `throughput` run until the receiver had the whole message. The
+    sender's TimeoutError is passed on once the receiver has stopped.
+    """
+    receiver_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver_sock.bind(('127.0.0.1', 0))
+    sender_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender_sock.bind(('127.0.0.1', 0))
+    receiver = ReliableReceiver(receiver_sock, protocol, window=max(window, 1024))
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(data=receiver.recv(payload, linger=linger)))
+    thread.start()
+
+    relay = None
+    peer = receiver_sock.getsockname()
+    if loss or delay or jitter:
+        relay = LossyRelay(peer, loss, delay, jitter, seed).start()
+        peer = relay.address
+    try:
+        start = time.perf_counter()
+        try:
+            stats = ReliableSender(sender_sock, peer, protocol, window, payload).send(data)
+        except BaseException:
+            receiver.stop()
+            raise
+        finally:
+            thread.join()
+    finally:
+        if relay is not None:
+            relay.close()
+        sender_sock.close()
+        receiver_sock.close()
+    elapsed = receiver.completed_at - start
+    stats.update(time=elapsed, throughput=len(data) / elapsed)
+    if relay is not None:
+        stats['relay_dropped'] = relay.stats['dropped']
+    return result['data'], stats
+
+if __name__ == "__main__":
+    import os
+
+    message = os.urandom(2_000_000)
+    print("--- Reliable UDP on loopback: 2 MB, 1400-byte segments, window 64 ---")
+    print(f"{'Protocol':<18} | {'Loss':>5} | {'Time':>7} | {'MB/s':>6} | {'Sent':>6} | {'Retx':>5} | "
+          f"{'RTOs':>4} | {'Fast':>4} | {'SRTT':>8}")
+    print("-" * 86)
+    for protocol in PROTOCOLS:
+        for loss in (0.0, 0.01, 0.05):
+            received, stats = loopback_transfer(message, protocol, loss=loss, delay=0.001, seed=7)
+            # Test Case: the message arrives intact whatever is lost
+            assert received == message, (protocol, loss)
+            print(f"{protocol:<18} | {loss:5.0%} | {stats['time']:6.2f}s | {stats['throughput'] / 1e6:6.1f} | "
+                  f"{stats['segments_sent']:>6} | {stats['retransmissions']:>5} | {stats['timeouts']:>4} | "
+                  f"{stats['fast_retransmits']:>4} | {stats['srtt'] * 1000:6.2f}ms")
+    print("Intact delivery Test: PASSED")
+
+    # Test Case: reordering and duplicates (jitter), and edge-sized messages
+    for size in (0, 1, PAYLOAD, PAYLOAD + 1):
+        received, _ = loopback_transfer(message[:size], 'selective-repeat', loss=0.1, jitter=0.002, seed=size)
+        assert received == message[:size], size
+    print("Reordering / message size Test: PASSED")
+
+    # Test Case: Jacobson/Karels on constant samples converges to the RTT
+    estimator = RtoEstimator(min_rto=0.0)
+    for _ in range(100):
+        estimator.sample(0.05)
+    assert abs(estimator.srtt - 0.05) < 1e-9 and estimator.rto < 0.051
+    estimator.backoff()
+    assert estimator.rto > 0.1
+    print("RTO estimator Test: PASSED")
@@ -1,56 +1,31 @@
-import random
-import time
+from arq_sim import simulate
 
 def stop_and_wait_arq(total_frames, loss_prob):
     """
     Simulates the Stop-and-Wait ARQ protocol.
 
+    Runs on the discrete-event simulator in arq_sim.py: losses, the
+    propagation delay and the timeout advance a virtual clock instead of
+    sleeping, so the run finishes immediately however many frames there are.
+
     Args:
         total_frames (int): The total number of frames to transmit.
         loss_prob (float): The probability of a frame or ACK being lost (0.0 to 1.0).
     """
     print("--- Starting Stop-and-Wait ARQ Simulation ---")
-    
-    timeout = 2.0  # seconds
-    frame_to_send = 0
-    
-    while frame_to_send < total_frames:
-        print(f"Sending Frame {frame_to_send}") # [cite: 17, 19]
-        
-        # Simulate transmission and wait for ACK
-        ack_received = False
-        start_time = time.time()
-        
-        while not ack_received:
-            # Check for timeout
-            if time.time() - start_time > timeout:
-                print(f"Timeout for Frame {frame_to_send}. Retransmitting...")
-                print(f"Sending Frame {frame_to_send}")
-                start_time = time.time() # Reset timer on retransmission
-            
-            # Simulate potential loss of frame or ACK
-            if random.random() < loss_prob:
-                # Frame is "lost", so we just wait for a timeout
-                time.sleep(0.5) # Simulate processing delay
-                continue
-
-            # Frame is successfully received, and ACK is sent back
-            # Simulate ACK loss
-            if random.random() < loss_prob:
-                print(f"ACK for Frame {frame_to_send} lost. Waiting for timeout...")
-                time.sleep(timeout) # Wait for sender to timeout
-                continue
 
-            # ACK is successfully received
-            print(f"ACK {frame_to_send} received") # [cite: 18, 21]
-            ack_received = True
-            frame_to_send += 1
+    timeout = 2.0  # seconds (of simulated time)
+    stats = simulate('stop-and-wait', total_frames, loss=loss_prob, timeout=timeout,
+                     seed=None, trace=True)
 
     print("\n--- Simulation Complete ---")
+    print(f"{stats['frames_sent']} frames sent ({stats['retransmissions']} retransmissions) "
+          f"in {stats['time']:.2f} s of simulated time")
+    return stats
 
 if __name__ == "__main__":
     # Parameters for the simulation
     NUM_FRAMES = 8
     LOSS_PROBABILITY = 0.2 # 20% chance of losing a frame or ACK
-    
+
     stop_and_wait_arq(NUM_FRAMES, LOSS_PROBABILITY)
@@ -0,0 +1,116 @@
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from go_back_n_arq import go_back_n_batch
+from tcp_congestion_control import tcp_congestion_batch
+
+# Monte Carlo parameter sweeps over the batch simulators: for every
+# (window size / initial ssthresh, loss rate) pair, run many trials at once
+# and keep only summary statistics. Pairs are spread over worker processes,
+# and the results come back as one structured NumPy array (one row per
+# pair) that can be written to CSV or .npy.
+
+# One row of a sweep: the parameters, then the statistics of the trials
+RESULT_DTYPE = np.dtype([
+    ('window', np.int32),       # GBN window size / TCP initial ssthresh
+    ('loss', np.float64),
+    ('trials', np.int32),
+    ('mean', np.float64),       # efficiency (GBN) or segments/round (TCP)
+    ('p5', np.float64),
+    ('p50', np.float64),
+    ('p95', np.float64),
+    ('retransmissions', np.float64),   # mean per trial
+])
+
+def _summarize(window, loss, values, retransmissions):
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return (window, loss, len(values), values.mean(), p5, p50, p95, retransmissions.mean())
+
+def _go_back_n_point(args):
+    window, loss, frames, trials, seed = args
+    result = go_back_n_batch(frames, window, loss, trials, seed)
+    return _summarize(window, loss, result['efficiency'], result['retransmissions'])
+
+def _tcp_point(args):
+    ssthresh, loss, rounds, trials, seed = args
+    result = tcp_congestion_batch(rounds, ssthresh, loss, trials, seed)
+    return _summarize(ssthresh, loss, result['throughput'], result['losses'])
+
+SIMULATIONS = {'go-back-n': _go_back_n_point, 'tcp': _tcp_point}
+
+def sweep(simulation, windows, losses, length=1_000, trials=1_000, workers=None, seed=0):
+    """
+    Runs `trials` trials of `simulation` ('go-back-n' or 'tcp') for every
+    (window, loss) pair and returns a RESULT_DTYPE array, one row per pair
+    in (window, loss) order. `length` is the number of frames (GBN) or of
+    rounds (TCP).
+
+    Every pair gets its own random stream, spawned from `seed`, so the
+    results are the same however many workers there are. workers=1 runs
+    everything in this process.
+    """
+    point = SIMULATIONS[simulation]
+    pairs = [(int(window), float(loss)) for window in windows for loss in losses]
+    seeds = np.random.SeedSequence(seed).spawn(len(pairs))
+    tasks = [(window, loss, length, trials, s) for (window, loss), s in zip(pairs, seeds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        rows = [point(task) for task in tasks]
+    else:
+        # A few tasks per message keeps the pickling overhead down
+        chunk = max(1, len(tasks) // (workers * 8))
+        with ProcessPoolExecutor(workers) as pool:
+            rows = list(pool.map(point, tasks, chunksize=chunk))
+    return np.array(rows, dtype=RESULT_DTYPE)
+
+def save(results, path):
+    # .npy keeps the structured array as is (compact, binary); anything
+    # else is written as CSV with a header line
+    if path.endswith('.npy'):
+        np.save(path, results)
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(results.dtype.names)
+        writer.writerows(results.tolist())
+
+if __name__ == "__main__":
+    # Optional argument: output directory (default ./results)
+    directory = sys.argv[1] if len(sys.argv) > 1 else 'results'
+    os.makedirs(directory, exist_ok=True)
+    gbn_path = os.path.join(directory, 'gbn_sweep.csv')
+    tcp_path = os.path.join(directory, 'tcp_sweep.npy')
+
+    windows = np.arange(1, 65)
+    losses = np.round(np.linspace(0.005, 0.3, 60), 4)
+
+    print("--- Go-Back-N efficiency sweep ---")
+    start = time.perf_counter()
+    gbn = sweep('go-back-n', windows, losses, length=1_000, trials=1_000)
+    elapsed = time.perf_counter() - start
+    print(f"{len(gbn)} (window, loss) pairs x 1000 trials of 1000 frames in {elapsed:.1f} s "
+          f"on {os.cpu_count()} CPU(s)")
+    for window in (1, 8, 64):
+        rows = gbn[(gbn['window'] == window) & np.isin(gbn['loss'], losses[[0, 19, 59]])]
+        print(f"  window {window:2d}: " + ", ".join(f"loss {row['loss']:.3f} -> efficiency {row['mean']:.3f} "
+                                                  f"(p5 {row['p5']:.3f})" for row in rows))
+    save(gbn, gbn_path)
+
+    print("\n--- TCP throughput sweep ---")
+    start = time.perf_counter()
+    tcp = sweep('tcp', [8, 16, 32, 64], losses, length=200, trials=2_000)
+    elapsed = time.perf_counter() - start
+    print(f"{len(tcp)} (ssthresh, loss) pairs x 2000 trials of 200 rounds in {elapsed:.1f} s")
+    save(tcp, tcp_path)
+    print(f"Results written to {gbn_path} and {tcp_path}")
+
+    # Test Case: one worker and several give identical results
+    small = sweep('go-back-n', [4, 8], [0.1, 0.2], length=200, trials=200, workers=1)
+    assert np.array_equal(small, sweep('go-back-n', [4, 8], [0.1, 0.2], length=200, trials=200, workers=2))
+    print("Reproducibility Test: PASSED")
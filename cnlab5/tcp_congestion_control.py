@@ -1,7 +1,92 @@
-import matplotlib.pyplot as plt
 import random
 
-def tcp_congestion_control(rounds, ssthresh_initial, loss_prob):
+import numpy as np
+
+# What happened in a round: the phase the ACKs were handled in, or a loss
+SLOW_START, CONGESTION_AVOIDANCE, LOSS = 0, 1, 2
+EVENTS = ('slow-start', 'congestion-avoidance', 'loss')
+
+# One record per round: cwnd and ssthresh at the start of the round, and
+# the event of the round. This is also the on-disk layout of BinarySink
+# files, which read back with np.fromfile(path, RECORD_DTYPE) or np.memmap.
+RECORD_DTYPE = np.dtype([
+    ('round', np.int64),
+    ('cwnd', np.int64),
+    ('ssthresh', np.int64),
+    ('event', np.int8),
+])
+
+class ArraySink:
+    """
+    Keeps the records in a structured array preallocated for `rounds`
+    rounds (sink.records is the filled part).
+    """
+    def __init__(self, rounds):
+        self.array = np.empty(rounds, dtype=RECORD_DTYPE)
+        self.count = 0
+
+    def write(self, round_, cwnd, ssthresh, event):
+        self.array[self.count] = (round_, cwnd, ssthresh, event)
+        self.count += 1
+
+    @property
+    def records(self):
+        return self.array[:self.count]
+
+    def close(self):
+        pass
+
+class BinarySink:
+    """
+    Appends the records to a file as raw RECORD_DTYPE rows, `batch` rows per
+    write, so memory stays constant however long the run is.
+    """
+    def __init__(self, path, batch=4096):
+        self.file = open(path, 'ab')
+        self.buffer = np.empty(batch, dtype=RECORD_DTYPE)
+        self.count = 0
+
+    def write(self, round_, cwnd, ssthresh, event):
+        self.buffer[self.count] = (round_, cwnd, ssthresh, event)
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer[:self.count].tobytes())
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+class CsvSink:
+    """Appends the records to a CSV file (header written once, when the file is new)."""
+    def __init__(self, path):
+        self.file = open(path, 'a')
+        if self.file.tell() == 0:
+            self.file.write('round,cwnd,ssthresh,event\n')
+
+    def write(self, round_, cwnd, ssthresh, event):
+        self.file.write(f"{round_},{cwnd},{ssthresh},{EVENTS[event]}\n")
+
+    def close(self):
+        self.file.close()
+
+class TeeSink:
+    """Writes every record to each of `sinks`."""
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, round_, cwnd, ssthresh, event):
+        for sink in self.sinks:
+            sink.write(round_, cwnd, ssthresh, event)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+def tcp_congestion_control(rounds, ssthresh_initial, loss_prob, verbose=True, plot=True, sink=None, seed=None):
     """
     Simulates TCP Congestion Control phases: Slow Start and Congestion Avoidance.
 
@@ -9,60 +94,128 @@ def tcp_congestion_control(rounds, ssthresh_initial, loss_prob):
         rounds (int): The number of transmission rounds to simulate.
         ssthresh_initial (int): The initial slow start threshold.
         loss_prob (float): The probability of packet loss in a round.
+        verbose (bool): Print every round.
+        plot (bool): Plot cwnd over the rounds (imports matplotlib).
+        sink: Where the (round, cwnd, ssthresh, event) records go: an
+            ArraySink, BinarySink or CsvSink. With plot=True and no sink
+            the records are kept in an ArraySink for the plot; with a
+            file sink they are also copied to one.
+        seed: Seed for the losses (None: unseeded).
+
+    With verbose=False, plot=False and a file sink the run is headless and
+    uses constant memory. Returns the sink.
     """
-    print("--- Starting TCP Congestion Control Simulation ---")
+    if verbose:
+        print("--- Starting TCP Congestion Control Simulation ---")
+    rng = random.Random(seed)
+    if sink is None and plot:
+        sink = ArraySink(rounds)
+    # The plot needs the records in memory, whatever the sink
+    plotted = writer = sink
+    if plot and not isinstance(sink, ArraySink):
+        plotted = ArraySink(rounds)
+        writer = TeeSink(sink, plotted)
     
     cwnd = 1
     ssthresh = ssthresh_initial
     
-    # Lists to store data for plotting
-    transmission_rounds = []
-    cwnd_sizes = []
-    
-    print(f"Initial State: cwnd = {cwnd}, ssthresh = {ssthresh}")
+    if verbose:
+        print(f"Initial State: cwnd = {cwnd}, ssthresh = {ssthresh}")
 
     for i in range(1, rounds + 1):
-        transmission_rounds.append(i)
-        cwnd_sizes.append(cwnd)
-        
-        print(f"\nRound {i}: cwnd = {cwnd}")
+        if verbose:
+            print(f"\nRound {i}: cwnd = {cwnd}")
         
         # Simulate packet loss (timeout)
-        if random.random() < loss_prob:
-            print(f"  -> Packet Loss Detected (Timeout)!")
+        if rng.random() < loss_prob:
+            if writer is not None:
+                writer.write(i, cwnd, ssthresh, LOSS)
             # Multiplicative Decrease [cite: 49]
             ssthresh = max(cwnd // 2, 2) # Threshold is halved, with a floor of 2
             cwnd = 1 # Reset cwnd to 1
-            print(f"  -> New State: ssthresh = {ssthresh}, cwnd = {cwnd} (Entering Slow Start)")
+            if verbose:
+                print(f"  -> Packet Loss Detected (Timeout)!")
+                print(f"  -> New State: ssthresh = {ssthresh}, cwnd = {cwnd} (Entering Slow Start)")
             continue
 
         # On successful ACK, increase cwnd [cite: 48]
         if cwnd < ssthresh:
             # Slow Start Phase: exponential growth [cite: 47]
+            if writer is not None:
+                writer.write(i, cwnd, ssthresh, SLOW_START)
             cwnd *= 2
-            print(f"  -> ACK Received. In Slow Start, cwnd doubles to {cwnd}")
+            if verbose:
+                print(f"  -> ACK Received. In Slow Start, cwnd doubles to {cwnd}")
         else:
             # Congestion Avoidance Phase: linear growth [cite: 47]
+            if writer is not None:
+                writer.write(i, cwnd, ssthresh, CONGESTION_AVOIDANCE)
             cwnd += 1
-            print(f"  -> ACK Received. In Congestion Avoidance, cwnd increments to {cwnd}")
-            
-    # Plotting the results 
+            if verbose:
+                print(f"  -> ACK Received. In Congestion Avoidance, cwnd increments to {cwnd}")
+
+    if verbose:
+        print(f"\n--- Simulation Complete ---")
+    if plot:
+        output_filename = plot_cwnd(plotted.records)
+        if verbose:
+            print(f"Plot saved as '{output_filename}'")
+        import matplotlib.pyplot as plt
+        plt.show()
+    return sink
+
+def plot_cwnd(records, output_filename='cwnd_plot.png'):
+    # Plotting the results (matplotlib is only imported here, so headless
+    # and batch runs start fast and work without it)
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
-    plt.plot(transmission_rounds, cwnd_sizes, marker='o', linestyle='-')
+    plt.plot(records['round'], records['cwnd'], marker='o', linestyle='-')
     plt.title('TCP Congestion Window (cwnd) Simulation')
     plt.xlabel('Transmission Round')
     plt.ylabel('Congestion Window Size (cwnd)')
     plt.grid(True)
-    plt.xticks(transmission_rounds)
+    if len(records) <= 100:
+        plt.xticks(records['round'])
     
     # Save the plot to a file [cite: 55]
-    output_filename = 'cwnd_plot.png'
     plt.savefig(output_filename)
-    
-    print(f"\n--- Simulation Complete ---")
-    print(f"Plot saved as '{output_filename}'")
-    plt.show()
+    return output_filename
 
+def tcp_congestion_batch(rounds, ssthresh_initial, loss_prob, trials, seed=None):
+    """
+    Runs `trials` independent copies of tcp_congestion_control() at once,
+    without printing or plotting: one NumPy array holds every trial's cwnd,
+    and each round draws the losses of all trials in one call.
+
+    Returns a dict of per-trial arrays:
+        throughput - mean cwnd over the rounds (segments per round trip)
+        delivered  - segments sent in rounds without a loss
+        losses     - loss events (timeouts, i.e. retransmissions)
+        final_cwnd - cwnd after the last round
+    """
+    rng = np.random.default_rng(seed)
+    cwnd = np.ones(trials, dtype=np.int64)
+    ssthresh = np.full(trials, ssthresh_initial, dtype=np.int64)
+    total = np.zeros(trials, dtype=np.int64)
+    delivered = np.zeros(trials, dtype=np.int64)
+    losses = np.zeros(trials, dtype=np.int64)
+
+    for _ in range(rounds):
+        total += cwnd
+        lost = rng.random(trials) < loss_prob
+        losses += lost
+        delivered += np.where(lost, 0, cwnd)
+        # Loss: halve the threshold (floor 2) and restart from 1; otherwise
+        # double below the threshold and add one above it
+        ssthresh = np.where(lost, np.maximum(cwnd // 2, 2), ssthresh)
+        cwnd = np.where(lost, 1, np.where(cwnd < ssthresh, cwnd * 2, cwnd + 1))
+
+    return {
+        'throughput': total / rounds,
+        'delivered': delivered,
+        'losses': losses,
+        'final_cwnd': cwnd,
+    }
 
 if __name__ == "__main__":
     # Parameters for the simulation
@@ -70,7 +223,59 @@ if __name__ == "__main__":
     INITIAL_SSTHRESH = 32
     PACKET_LOSS_PROB = 0.08 # 8% chance of packet loss per round
     
-    # Before running, make sure you have matplotlib installed:
-    # pip install matplotlib
+    # The plot needs matplotlib (pip install matplotlib); without it the
+    # simulation still runs, just without the plot
+    import importlib.util
+    has_matplotlib = importlib.util.find_spec('matplotlib') is not None
     
-    tcp_congestion_control(TOTAL_ROUNDS, INITIAL_SSTHRESH, PACKET_LOSS_PROB)
+    tcp_congestion_control(TOTAL_ROUNDS, INITIAL_SSTHRESH, PACKET_LOSS_PROB, plot=has_matplotlib)
+
+    # Headless mode: a long run streamed to an append-only binary file,
+    # nothing printed or kept in memory. The traces go to a temporary
+    # directory; pass a number of rounds for a longer run
+    # (e.g. python tcp_congestion_control.py 1000000).
+    import os
+    import sys
+    import tempfile
+    import time
+    import tracemalloc
+
+    LONG_ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    trace_dir = tempfile.TemporaryDirectory()
+    path = os.path.join(trace_dir.name, 'cwnd_trace.bin')
+    tracemalloc.start()
+    start = time.perf_counter()
+    tcp_congestion_control(LONG_ROUNDS, INITIAL_SSTHRESH, PACKET_LOSS_PROB, verbose=False, plot=False,
+                           sink=BinarySink(path), seed=1).close()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    trace = np.memmap(path, dtype=RECORD_DTYPE, mode='r')
+    print(f"\n--- Headless run: {LONG_ROUNDS} rounds in {elapsed:.2f} s, peak {peak / 1024:.0f} KiB traced, "
+          f"{os.path.getsize(path) / 2**20:.1f} MiB written ---")
+    print(f"Mean cwnd {trace['cwnd'].mean():.1f}, {np.count_nonzero(trace['event'] == LOSS)} losses, "
+          f"{np.mean(trace['event'] == CONGESTION_AVOIDANCE):.1%} of rounds in congestion avoidance")
+
+    # Test Case: the run is complete and the headless mode never imported matplotlib
+    assert len(trace) == LONG_ROUNDS and np.array_equal(trace['round'], np.arange(1, LONG_ROUNDS + 1))
+    assert has_matplotlib or 'matplotlib' not in sys.modules
+    # ...and every sink sees the same records for the same seed
+    records = tcp_congestion_control(1_000, INITIAL_SSTHRESH, PACKET_LOSS_PROB, verbose=False, plot=False,
+                                     sink=ArraySink(1_000), seed=1).records
+    assert np.array_equal(records, trace[:1_000])
+    csv_path = os.path.join(trace_dir.name, 'cwnd_trace.csv')
+    tcp_congestion_control(1_000, INITIAL_SSTHRESH, PACKET_LOSS_PROB, verbose=False, plot=False,
+                           sink=CsvSink(csv_path), seed=1).close()
+    with open(csv_path) as f:
+        rows = f.read().splitlines()[1:]
+    assert rows[0] == f"1,1,{INITIAL_SSTHRESH},slow-start" and len(rows) == 1_000
+    del trace
+    trace_dir.cleanup()
+    print("Headless sinks Test: PASSED")
+
+    # Batch mode: many trials at once, statistics only
+    trials = tcp_congestion_batch(TOTAL_ROUNDS, INITIAL_SSTHRESH, PACKET_LOSS_PROB, trials=10_000, seed=1)
+    print(f"\n--- {len(trials['losses'])} batch trials ---")
+    print(f"Throughput (segments/round): mean {trials['throughput'].mean():.1f}, "
+          f"5th-95th percentile {np.percentile(trials['throughput'], 5):.1f}-{np.percentile(trials['throughput'], 95):.1f}")
+    print(f"Losses per run: mean {trials['losses'].mean():.1f}")
@@ -0,0 +1,241 @@
+# benchmark_bgp.py
+# The original round-based BgpRouter vs. the message-driven BgpNetwork, and
+# the policy-based engine on large AS graphs.
+import random
+import time
+import tracemalloc
+
+import networkx as nx
+
+from bgp import BgpNetwork, BgpRouter, best_route, relationship, run_rounds
+from topology import caida_as_graph
+
+def as_graph(n, seed=1):
+    # Preferential attachment gives the few-big-hubs shape of the AS graph
+    G = nx.barabasi_albert_graph(n, 2, seed=seed)
+    return nx.relabel_nodes(G, {node: f"AS{node}" for node in G.nodes()})
+
+def add_reflector_cluster(G, asn, clients=3):
+    # Turn AS `asn` into a route reflector with `clients` border routers,
+    # spreading its eBGP links over them
+    links = [(neighbor, data) for neighbor, data in G.adj[asn].items()]
+    G.remove_node(asn)
+    G.add_node(f"{asn}.rr", asn=asn, route_reflector=True)
+    for i in range(clients):
+        G.add_node(f"{asn}.r{i}", asn=asn)
+        G.add_edge(f"{asn}.rr", f"{asn}.r{i}")
+    for i, (neighbor, data) in enumerate(links):
+        router = f"{asn}.r{i % clients}"
+        provider = data['provider']
+        G.add_edge(router, neighbor, provider=router if provider == asn else provider)
+
+def check_stable(network):
+    # In a converged network every loc-RIB entry is the best of its
+    # candidates, and every adj-RIB-in holds exactly what the peer exports
+    speakers = network.speakers
+    prefixes = set().union(*(speaker.originated for speaker in speakers.values()))
+    for speaker in speakers.values():
+        for prefix in prefixes:
+            route = speaker.loc_rib.get(prefix)
+            if prefix in speaker.originated:
+                assert route.peer is None
+            else:
+                assert route is best_route([speaker._accept(peer, rib[prefix])
+                                            for peer, rib in speaker.adj_rib_in.items() if prefix in rib])
+                # The next hop is a live neighbor that announced the prefix
+                assert route is None or (route.peer in speaker.neighbors
+                                         and prefix in speaker.adj_rib_in[route.peer])
+            for peer in speaker.neighbors:
+                receiver = speakers[peer]
+                received = receiver.adj_rib_in[speaker.name].get(prefix)
+                expected = route is not None and speaker._exports(route, peer, speaker.sessions[peer])
+                if expected and receiver.sessions[speaker.name].ibgp:
+                    expected = route.originator != peer
+                elif expected:
+                    expected = receiver.asn not in route.path
+                    assert not expected or receiver._accept(speaker.name, received).path is route.path.prepend(receiver.asn)
+                assert (received is not None) == expected
+
+def check_valley_free(G, network, samples=200):
+    # Gao-Rexford: read from the origin, a path goes up customer->provider
+    # links, crosses at most one peering link, then only goes down
+    rng = random.Random(3)
+    for speaker in rng.sample(list(network.speakers.values()), min(samples, len(network.speakers))):
+        for route in speaker.loc_rib.values():
+            ases = list(route.path)[::-1]
+            phase = 'up'
+            for a, b in zip(ases, ases[1:]):
+                step = relationship(G, b, a)
+                if step == 'customer':
+                    assert phase == 'up'
+                elif step == 'peer':
+                    assert phase == 'up'
+                    phase = 'down'
+                else:
+                    phase = 'down'
+
+def self_check(runs=20):
+    # Small random policy networks with MEDs and a route-reflector AS,
+    # through failures: the state must always be stable
+    for seed in range(runs):
+        rng = random.Random(seed)
+        G = caida_as_graph(60, tier1=4, seed=seed)
+        add_reflector_cluster(G, "AS2")
+        network = BgpNetwork(G)
+        for speaker in network.speakers.values():
+            for session in speaker.sessions.values():
+                if not session.ibgp:
+                    session.med = rng.randint(0, 2)
+        for node in rng.sample(list(network.speakers), 10):
+            network.speakers[node].originate(f"{node}/0")
+        network.run()
+        check_stable(network)
+        for u, v in rng.sample(list(G.edges()), 5):
+            network.link_down(u, v)
+            check_stable(network)
+
+    # Two routers of one AS pass the same Route on to y over policy-free
+    # sessions; when one link goes down y must switch to the other router
+    G = nx.Graph()
+    G.add_nodes_from(('x1', 'x2'), asn='X')
+    G.add_edges_from([('a', 'x1'), ('a', 'x2'), ('x1', 'y'), ('x2', 'y')])
+    network = BgpNetwork(G)
+    network.speakers['a'].originate('p')
+    network.run()
+    check_stable(network)
+    network.link_down('x1', 'y')
+    check_stable(network)
+    assert network.speakers['y'].next_hop('p') == 'x2'
+    print(f"\n--- {runs} random policy networks (MED, route reflection, failures): stable ---")
+
+def check_paths(G, network, samples=5):
+    # Every prefix whose origin is reachable must be known, over a shortest
+    # AS path (counted in ASes, like the path lists); no other prefix may be
+    for name in random.Random(1).sample(list(G.nodes()), samples):
+        hops = nx.single_source_shortest_path_length(G, name)
+        rib = network.speakers[name].loc_rib
+        for speaker in network.speakers.values():
+            for prefix in speaker.originated:
+                if speaker.name in hops:
+                    assert len(rib[prefix].path) == hops[speaker.name] + 1
+                else:
+                    assert prefix not in rib
+
+def measure(build, run):
+    # (seconds, peak MiB) of run(build())
+    tracemalloc.start()
+    state = build()
+    start = time.perf_counter()
+    result = run(state)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return state, result, elapsed, peak / 2**20
+
+def compare_with_rounds(n, prefixes_per_as=1):
+    print(f"\n--- {n} ASes, {prefixes_per_as} prefix(es) each: rounds vs. messages ---")
+    G = as_graph(n)
+    nodes = list(G.nodes())
+
+    def build_routers():
+        routers = {node: BgpRouter(node) for node in nodes}
+        for node in nodes:
+            routers[node].neighbors = list(G.neighbors(node))
+            for i in range(prefixes_per_as):
+                routers[node].rib[f"{node}/{i}"] = {'path': [node], 'next_hop': 'self'}
+        return routers
+
+    routers, rounds, elapsed, peak = measure(build_routers, lambda routers: run_rounds(routers, nodes, verbose=False))
+    print(f"  {f'BgpRouter, {rounds} rounds':<20} | {elapsed:7.2f} s | peak {peak:7.1f} MiB")
+
+    def build_network():
+        network = BgpNetwork(G)
+        for node in nodes:
+            for i in range(prefixes_per_as):
+                network.speakers[node].originate(f"{node}/{i}")
+        return network
+
+    network, (messages, prefixes), elapsed, peak = measure(build_network, BgpNetwork.run)
+    check_paths(G, network)
+    for node in nodes:
+        assert len(network.speakers[node].loc_rib) == len(routers[node].rib)
+    print(f"  {'BgpNetwork':<20} | {elapsed:7.2f} s | peak {peak:7.1f} MiB | {messages} messages, {prefixes} prefix updates")
+
+def scale(n, prefixes_per_as, origins=None, failures=3):
+    # `origins` ASes (all by default) announce `prefixes_per_as` prefixes each
+    G = as_graph(n)
+    rng = random.Random(2)
+    origins = list(G.nodes()) if origins is None else rng.sample(list(G.nodes()), origins)
+    total = len(origins) * prefixes_per_as
+    print(f"\n--- {n} ASes, {total} prefixes from {len(origins)} origins ---")
+
+    def build():
+        network = BgpNetwork(G)
+        for origin in origins:
+            speaker = network.speakers[origin]
+            for i in range(prefixes_per_as):
+                speaker.originate(f"{origin}/{i}")
+        return network
+
+    network, (messages, prefixes), elapsed, peak = measure(build, BgpNetwork.run)
+    check_paths(G, network)
+    routes = sum(len(speaker.loc_rib) for speaker in network.speakers.values())
+    print(f"  converged      | {elapsed:7.2f} s | {messages} messages, {prefixes} prefix updates "
+          f"| {routes} routes, peak {peak:7.1f} MiB")
+
+    # Session failures only touch the prefixes that were routed over them
+    for u, v in rng.sample(list(G.edges()), failures):
+        start = time.perf_counter()
+        messages, prefixes = network.link_down(u, v)
+        elapsed = time.perf_counter() - start
+        G.remove_edge(u, v)
+        print(f"  {u}-{v} down | {elapsed:7.3f} s | {messages} messages, {prefixes} prefix updates")
+    check_paths(G, network)
+
+def policy_scale(n, origins=10, prefixes_per_origin=10, failures=3):
+    # Gao-Rexford policies on an Internet-sized AS graph
+    G = caida_as_graph(n)
+    rng = random.Random(2)
+    origins = rng.sample(list(G.nodes()), origins)
+    print(f"\n--- {n} ASes with policies, {len(origins) * prefixes_per_origin} prefixes from {len(origins)} origins ---")
+
+    def build():
+        network = BgpNetwork(G)
+        for origin in origins:
+            for i in range(prefixes_per_origin):
+                network.speakers[origin].originate(f"{origin}/{i}")
+        return network
+
+    tracemalloc.start()
+    network = build()
+    setup = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    messages, prefixes = network.run()
+    elapsed = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    routes = sum(len(speaker.loc_rib) for speaker in network.speakers.values())
+    candidates = sum(len(rib) for speaker in network.speakers.values() for rib in speaker.adj_rib_in.values())
+    check_valley_free(G, network)
+    print(f"  converged | {elapsed:7.2f} s | {messages} messages, {prefixes} prefix updates")
+    print(f"  {routes} best routes, {candidates} adj-RIB-in entries | topology {setup / 2**20:.0f} MiB, "
+          f"routes {(held - setup) / 2**20:.0f} MiB ({(held - setup) / candidates:.0f} B/entry), peak {peak / 2**20:.0f} MiB")
+
+    # Fail one of the links of some origins, which affects their prefixes everywhere
+    for origin in origins[:failures]:
+        neighbor = rng.choice(list(G.neighbors(origin)))
+        start = time.perf_counter()
+        messages, prefixes = network.link_down(origin, neighbor)
+        elapsed = time.perf_counter() - start
+        print(f"  {origin}-{neighbor} down | {elapsed:7.3f} s | {messages} messages, {prefixes} prefix updates")
+
+if __name__ == "__main__":
+    print("--- BGP benchmark ---")
+    self_check()
+    compare_with_rounds(300)
+    compare_with_rounds(1_000)
+    compare_with_rounds(40, 1_000)
+    scale(1_500, 1)
+    scale(40, 2_500)
+    policy_scale(75_000)
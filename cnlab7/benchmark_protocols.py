@@ -0,0 +1,139 @@
+# benchmark_protocols.py
+# Scaling benchmark for all cnlab7 protocols: convergence time, peak memory
+# and message counts of RIP, OSPF and BGP on growing synthetic topologies
+# (see topology.py). IS-IS has no row of its own: isis.py floods and runs
+# SPF exactly like ospf.py, on the same engine in spf.py, so its numbers
+# would only repeat OSPF's. Results are written as JSON and CSV, named
+# after the git revision, so runs of different versions can be compared.
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+
+from bgp import BgpNetwork
+from rip_sim import build_routers, run_triggered
+from spf import LinkStateGraph, all_routing_tables
+from topology import GENERATORS
+
+# --- One function per protocol: G -> (messages, route updates) ---
+
+def run_rip(G):
+    # Triggered updates with poisoned reverse, everyone starting at once
+    routers = build_routers(G)
+    _, messages, entries = run_triggered(routers, list(G.nodes()))
+    return messages, entries
+
+def flooding_messages(G):
+    # Every router floods its LSA/LSP once: the originator sends it on all
+    # of its links and every other router of the component forwards the
+    # first copy on all links but the one it came in on. Per component
+    # that is n LSAs x (2m - (n - 1)) messages.
+    total = 0
+    for component in nx.connected_components(G):
+        n = len(component)
+        m = G.subgraph(component).number_of_edges()
+        total += n * (2 * m - (n - 1))
+    return total
+
+def run_link_state(G):
+    # Flood the topology, then run SPF from every router
+    tables = all_routing_tables(LinkStateGraph(G))
+    return flooding_messages(G), sum(len(table) for table in tables.values())
+
+def run_bgp(G):
+    # Every AS (or every router, as its own AS) announces one prefix; the
+    # 'provider' links of AS graphs add Gao-Rexford policies
+    network = BgpNetwork(G)
+    for name, speaker in network.speakers.items():
+        speaker.originate(f"{name}/0")
+    return network.run()
+
+PROTOCOLS = {
+    'rip': run_rip,
+    'ospf': run_link_state,
+    'bgp': run_bgp,
+}
+
+# Biggest topology each protocol is run on, as nodes x links: flooding one
+# route per node costs about that many messages, and dense graphs (fat-trees)
+# get there with far fewer nodes than sparse ones. Every protocol also ends
+# up with an n x n table (~200 MiB at 1,000 nodes).
+MAX_SIZE = {'rip': 10**7, 'ospf': 10**7, 'bgp': 3 * 10**6}
+
+def measure(protocol, G):
+    # Time without tracemalloc (it slows allocation-heavy code down a lot),
+    # then a second run for the peak memory
+    start = time.perf_counter()
+    messages, updates = PROTOCOLS[protocol](G)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    PROTOCOLS[protocol](G)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': round(elapsed, 4), 'peak_mib': round(peak / 2**20, 2),
+            'messages': messages, 'updates': updates}
+
+# The columns of a run_suite() row, in order
+FIELDS = ['topology', 'nodes', 'links', 'protocol', 'seconds', 'peak_mib', 'messages', 'updates']
+
+def run_suite(topologies=None, sizes=(100, 300, 1_000), protocols=None, seed=1):
+    """
+    Run every protocol on every topology generator at every size. Returns
+    one dict per run, with the keys in FIELDS. Combinations above MAX_SIZE are skipped.
+    """
+    rows = []
+    for topology in topologies or GENERATORS:
+        for size in sizes:
+            G = GENERATORS[topology](size, seed=seed)
+            for protocol in protocols or PROTOCOLS:
+                if G.number_of_nodes() * G.number_of_edges() > MAX_SIZE[protocol]:
+                    continue
+                row = {'topology': topology, 'nodes': G.number_of_nodes(), 'links': G.number_of_edges(),
+                       'protocol': protocol}
+                row.update(measure(protocol, G))
+                rows.append(row)
+                print(f"  {topology:<16} | {row['nodes']:>6} | {protocol:<5} | {row['seconds']:8.3f} s | "
+                      f"{row['peak_mib']:8.1f} MiB | {row['messages']:>10} messages | {row['updates']:>10} updates")
+    return rows
+
+def version():
+    # Git revision of the tree being measured ("-dirty" with local changes)
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def write_results(rows, directory='results'):
+    # <directory>/protocols-<version>.json (with the machine it ran on) and
+    # .csv (one line per run, version in every line so files can be
+    # concatenated); returns the two paths
+    rev = version()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"protocols-{rev}")
+    with open(base + ".json", "w") as f:
+        json.dump({'version': rev, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                   'python': platform.python_version(), 'machine': platform.machine(),
+                   'cpus': os.cpu_count(), 'results': rows}, f, indent=2)
+    with open(base + ".csv", "w", newline="") as f:
+        # A fixed header, so an empty suite still gives a valid file
+        writer = csv.DictWriter(f, fieldnames=['version'] + FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({'version': rev, **row})
+    return base + ".json", base + ".csv"
+
+if __name__ == "__main__":
+    # Optional argument: output directory (default ./results)
+    directory = sys.argv[1] if len(sys.argv) > 1 else 'results'
+    print("--- Routing protocol scaling benchmark ---")
+    print(f"  {'Topology':<16} | {'Nodes':>6} | {'Proto':<5} | {'Time':>10} | {'Peak':>12} |")
+    rows = run_suite(sizes=(100, 300, 1_000, 2_000))
+    for path in write_results(rows, directory):
+        print(f"Wrote {path}")
@@ -0,0 +1,60 @@
+# benchmark_rip.py
+# Convergence time and message volume of the RIP simulator: synchronous
+# rounds vs. triggered updates (with and without split horizon).
+import random
+import time
+
+import networkx as nx
+
+from rip_sim import INFINITY, build_routers, run_rounds, run_triggered
+
+def check_costs(G, routers, samples=5):
+    # Converged tables must hold the true hop counts
+    for source in random.Random(1).sample(list(G.nodes()), samples):
+        hops = nx.single_source_shortest_path_length(G, source)
+        table = routers[source].routing_table
+        assert all(table[dest]['cost'] == hops.get(dest, INFINITY) for dest in G.nodes())
+
+def compare(name, G, failures=5):
+    nodes = list(G.nodes())
+    print(f"\n--- {name}: {G.number_of_nodes()} routers, {G.number_of_edges()} links ---")
+    print(f"  {'Mode':<32} | {'Time':>8} | {'Messages':>9} | {'Route entries':>13}")
+
+    routers = build_routers(G)
+    start = time.perf_counter()
+    rounds, messages, entries = run_rounds(routers, nodes, verbose=False)
+    elapsed = time.perf_counter() - start
+    check_costs(G, routers)
+    print(f"  {f'rounds ({rounds} iterations)':<32} | {elapsed:7.2f}s | {messages:9d} | {entries:13d}")
+
+    edges = random.Random(2).sample(list(G.edges()), failures)
+    for split_horizon in (None, 'simple', 'poison'):
+        routers = build_routers(G)
+        start = time.perf_counter()
+        _, messages, entries = run_triggered(routers, nodes, split_horizon)
+        elapsed = time.perf_counter() - start
+        check_costs(G, routers)
+        label = f"triggered, {split_horizon or 'no'} split horizon"
+        print(f"  {label:<32} | {elapsed:7.2f}s | {messages:9d} | {entries:13d}")
+
+        # Then fail a few links one after another and reconverge each time
+        failed = G.copy()
+        start = time.perf_counter()
+        messages = entries = 0
+        for u, v in edges:
+            failed.remove_edge(u, v)
+            routers[u].link_down(v)
+            routers[v].link_down(u)
+            _, m, e = run_triggered(routers, [u, v], split_horizon)
+            messages += m
+            entries += e
+        elapsed = (time.perf_counter() - start) / failures
+        check_costs(failed, routers)
+        print(f"  {'  ...per link failure':<32} | {elapsed:7.3f}s | {messages // failures:9d} | {entries // failures:13d}")
+
+if __name__ == "__main__":
+    print("--- RIP convergence benchmark ---")
+    compare("Random (small world)", nx.connected_watts_strogatz_graph(300, 4, 0.2, seed=1))
+    compare("Grid 20x20", nx.grid_2d_graph(20, 20))
+    compare("Random (small world)", nx.connected_watts_strogatz_graph(1_000, 4, 0.2, seed=1))
+    compare("Grid 40x40", nx.grid_2d_graph(40, 40))
@@ -0,0 +1,245 @@
+# benchmark_spf.py
+# Compares the original per-lab Dijkstra (networkx lookups + walking back
+# along previous_nodes for every destination) with the shared SPF engine.
+import heapq
+import os
+import random
+import time
+import tracemalloc
+
+import networkx as nx
+
+from spf import (LinkStateGraph, EcmpForwarder, IncrementalSpf, all_pairs, all_shortest_paths, compute_routing_table,
+                 iter_all_pairs, shortest_paths, shortest_paths_ecmp)
+from topology import fat_tree
+
+# --- The original implementation from ospf.py / isis.py, kept for comparison ---
+
+def legacy_dijkstra(graph, start_node):
+    distances = {node: float('inf') for node in graph.nodes()}
+    previous_nodes = {node: None for node in graph.nodes()}
+    distances[start_node] = 0
+    pq = [(0, start_node)]
+    while pq:
+        current_cost, current_node = heapq.heappop(pq)
+        if current_cost > distances[current_node]:
+            continue
+        for neighbor in graph.neighbors(current_node):
+            cost = graph.edges[current_node, neighbor]['cost']
+            new_cost = distances[current_node] + cost
+            if new_cost < distances[neighbor]:
+                distances[neighbor] = new_cost
+                previous_nodes[neighbor] = current_node
+                heapq.heappush(pq, (new_cost, neighbor))
+    return distances, previous_nodes
+
+def legacy_routing_table(start_node, distances, previous_nodes):
+    table = {}
+    for dest in previous_nodes:
+        if dest == start_node:
+            table[dest] = {'next_hop': '-', 'cost': 0}
+            continue
+        if distances[dest] == float('inf'):
+            table[dest] = {'next_hop': '-', 'cost': 'inf'}
+            continue
+        curr = dest
+        next_hop = None
+        while curr != start_node:
+            if previous_nodes[curr] == start_node:
+                next_hop = curr
+                break
+            curr = previous_nodes[curr]
+        table[dest] = {'next_hop': next_hop, 'cost': distances[dest]}
+    return table
+
+def random_topology(n, degree=4, rewire=0.1, seed=1):
+    # Connected small-world graph (ring lattice with some long links) with
+    # random integer link costs, like an OSPF area with metric tuning.
+    G = nx.connected_watts_strogatz_graph(n, degree, rewire, seed=seed)
+    rng = random.Random(seed)
+    for u, v in G.edges():
+        G.edges[u, v]['cost'] = rng.randint(1, 20)
+    return G
+
+def compare(n, sample=20):
+    print(f"\n--- {n} routers, {sample} sampled sources (extrapolated to all {n}) ---")
+    G = random_topology(n)
+    sources = random.Random(2).sample(list(G.nodes()), sample)
+
+    start = time.perf_counter()
+    legacy = [legacy_routing_table(s, *legacy_dijkstra(G, s)) for s in sources]
+    legacy_time = (time.perf_counter() - start) / sample
+
+    start = time.perf_counter()
+    lsdb = LinkStateGraph(G)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tables = [compute_routing_table(lsdb, s) for s in sources]
+    new_time = (time.perf_counter() - start) / sample
+
+    # Same tie-break as the original code, so the tables agree exactly
+    assert legacy == tables
+
+    print(f"  original dijkstra + get_routing_table | {legacy_time * 1000:8.1f} ms/router | all routers {legacy_time * n:7.1f} s")
+    print(f"  LinkStateGraph + compute_routing_table | {new_time * 1000:8.1f} ms/router | all routers {new_time * n + build_time:7.1f} s "
+          f"(graph conversion {build_time * 1000:.0f} ms)")
+    print(f"  speedup: {legacy_time / new_time:.1f}x")
+
+def link_flaps(n, flaps=200, routers=None, sample=10):
+    # Links going down and coming back up, one at a time. Without incremental
+    # SPF every change means a full Dijkstra for every router; the full
+    # recompute is timed on `sample` routers and scaled up.
+    G = random_topology(n)
+    rng = random.Random(3)
+    routers = list(G.nodes()) if routers is None else rng.sample(list(G.nodes()), routers)
+    print(f"\n--- {n} routers, {len(routers)} SPF trees, {flaps} link flaps (down + up) ---")
+
+    start = time.perf_counter()
+    spf = IncrementalSpf(G, routers=routers)
+    setup_time = time.perf_counter() - start
+
+    edges = rng.sample(list(G.edges()), flaps)
+    start = time.perf_counter()
+    for u, v in edges:
+        cost = G.edges[u, v]['cost']
+        spf.remove_link(u, v)
+        spf.update_link(u, v, cost)
+    incremental_time = (time.perf_counter() - start) / (2 * flaps)
+
+    # Full recompute after one change, on a sample of the routers
+    lsdb = LinkStateGraph(G)
+    sampled = routers[:sample]
+    start = time.perf_counter()
+    tables = [compute_routing_table(lsdb, router) for router in sampled]
+    full_time = (time.perf_counter() - start) * len(routers) / len(sampled)
+
+    # After every flap the topology is back to where it started
+    for router, table in zip(sampled, tables):
+        assert spf.routing_table(router) == table
+
+    print(f"  initial SPF for all trees       | {setup_time:8.2f} s")
+    print(f"  full recompute per change       | {full_time * 1000:10.1f} ms (extrapolated)")
+    print(f"  IncrementalSpf per change       | {incremental_time * 1000:10.1f} ms")
+    print(f"  speedup: {full_time / incremental_time:.0f}x")
+
+def parallel_scaling(n):
+    # Every router's SPF on 1, 2, 4, ... worker processes, up to the number
+    # of CPUs. The results must be identical to the serial run.
+    cpus = os.cpu_count() or 1
+    print(f"\n--- {n} routers, all-routers SPF on up to {cpus} CPU(s) ---")
+    lsdb = LinkStateGraph(random_topology(n))
+
+    start = time.perf_counter()
+    serial = all_shortest_paths(lsdb, workers=1)
+    serial_time = time.perf_counter() - start
+    print(f"  serial       | {serial_time:7.2f} s")
+
+    workers = 2
+    while workers <= cpus:
+        start = time.perf_counter()
+        parallel = all_shortest_paths(lsdb, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert (parallel[0] == serial[0]).all() and (parallel[1] == serial[1]).all()
+        print(f"  {workers:3d} workers  | {elapsed:7.2f} s | speedup {serial_time / elapsed:4.1f}x "
+              f"| efficiency {serial_time / elapsed / workers:4.0%}")
+        workers *= 2
+
+def all_pairs_matrices(n, workers=None):
+    # Full distance/next-hop matrices: one pure-Python Dijkstra per router
+    # (on all CPUs) vs. all_pairs() with SciPy and array tie-breaking
+    print(f"\n--- {n} routers, all-pairs distance and next-hop matrices ---")
+    lsdb = LinkStateGraph(random_topology(n))
+
+    start = time.perf_counter()
+    dist, first_hop = all_shortest_paths(lsdb, workers=workers)
+    dijkstra_time = time.perf_counter() - start
+    print(f"  {f'all_shortest_paths, {workers or os.cpu_count()} CPU(s)':<30} | {dijkstra_time:7.2f} s")
+
+    start = time.perf_counter()
+    matrix_dist, _, matrix_hop = all_pairs(lsdb)
+    matrix_time = time.perf_counter() - start
+    assert (matrix_dist == dist).all() and (matrix_hop == first_hop).all()
+    print(f"  {'all_pairs, 1 CPU':<30} | {matrix_time:7.2f} s | speedup {dijkstra_time / matrix_time:4.1f}x")
+
+    # Streaming the blocks keeps the working set bounded, whatever n is:
+    # here only the farthest destination of every router is kept
+    tracemalloc.start()
+    start = time.perf_counter()
+    diameter = max(float(d.max()) for _, d, _, _ in iter_all_pairs(lsdb))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # (the three full matrices take 8 + 4 + 4 bytes per pair)
+    print(f"  {f'iter_all_pairs, diameter {diameter:.0f}':<30} | {elapsed:7.2f} s | peak {peak / 2**20:6.1f} MiB "
+          f"(full matrices: {n * n * 16 / 2**20:.0f} MiB)")
+
+def ecmp_fat_tree(k, sample=40, flows=20_000):
+    # Cost of keeping every equal-cost predecessor on a k-ary fat-tree (with
+    # hosts), and how evenly per-flow hashing loads the core links
+    G = fat_tree(k, hosts=True)
+    lsdb = LinkStateGraph(G)
+    hosts = [node for node, layer in G.nodes(data='layer') if layer == 'host']
+    switches = [node for node, layer in G.nodes(data='layer') if layer != 'host']
+    print(f"\n--- Fat-tree k={k}: {G.number_of_nodes()} nodes, {G.number_of_edges()} links, "
+          f"SPF from {sample} sampled switches ---")
+    sources = [lsdb.index[switch] for switch in random.Random(4).sample(switches, sample)]
+
+    for name, spf in (('single path', shortest_paths), ('ECMP', shortest_paths_ecmp)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        results = [spf(lsdb, source) for source in sources]
+        elapsed = (time.perf_counter() - start) / sample
+        peak = tracemalloc.get_traced_memory()[1] / sample
+        tracemalloc.stop()
+        widest = max(len(hops) for _, _, next_hops in results for hops in next_hops) if spf is shortest_paths_ecmp else 1
+        print(f"  {name:<12} | {elapsed * 1000:7.1f} ms/router | {peak / 2**10:7.0f} KiB/router | "
+              f"up to {widest} next hop(s) per destination")
+        del results
+
+    # Random host pairs in different pods; count flows per aggregation->core
+    # link with the single-path tables and with the hashing forwarder
+    if not flows:
+        return
+    rng = random.Random(5)
+    pairs = []
+    while len(pairs) < flows:
+        src, dst = rng.sample(hosts, 2)
+        if src.split('_')[0] != dst.split('_')[0]:
+            pairs.append((src, dst, (f"10.{src[4:]}", f"10.{dst[4:]}", 6, rng.randrange(1024, 65536), 80)))
+
+    forwarder = EcmpForwarder(G)
+    first_hops = {}
+    for name in ('single path', 'ECMP'):
+        load = dict.fromkeys([(agg, core) for agg, layer in G.nodes(data='layer') if layer == 'aggregation'
+                              for core in G[agg] if G.nodes[core]['layer'] == 'core'], 0)
+        start = time.perf_counter()
+        for src, dst, flow in pairs:
+            if name == 'ECMP':
+                path = forwarder.path(src, dst, flow)
+            else:
+                path = [src]
+                while path[-1] != dst:
+                    if path[-1] not in first_hops:
+                        first_hops[path[-1]] = shortest_paths(lsdb, lsdb.index[path[-1]])[2]
+                    path.append(lsdb.nodes[first_hops[path[-1]][lsdb.index[dst]]])
+            for u, v in zip(path, path[1:]):
+                if (u, v) in load:
+                    load[u, v] += 1
+        elapsed = time.perf_counter() - start
+        used = [count for count in load.values() if count]
+        print(f"  {name:<12} | {flows} flows in {elapsed:5.2f} s | core uplinks used {len(used)}/{len(load)} | "
+              f"max {max(load.values())} flows, mean {sum(load.values()) / len(load):.1f}")
+
+if __name__ == "__main__":
+    print("--- SPF benchmark ---")
+    compare(1_000)
+    compare(10_000)
+    link_flaps(1_000)
+    link_flaps(100_000, routers=20)
+    parallel_scaling(5_000)
+    all_pairs_matrices(2_000)
+    all_pairs_matrices(8_000)
+    ecmp_fat_tree(8)
+    ecmp_fat_tree(16)
+    ecmp_fat_tree(32, sample=10, flows=0)
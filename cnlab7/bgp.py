@@ -40,33 +40,494 @@ class BgpRouter:
             print(f"{prefix:<10} | {info['next_hop']:<10} | {path_str}")
         print("\n")
 
-def create_as_topology():
-    G = nx.Graph()
-    # Nodes are ASes
-    edges = [
-        ('AS1', 'AS2'), ('AS1', 'AS3'),
-        ('AS2', 'AS4'), ('AS3', 'AS4'),
-        ('AS4', 'AS5')
-    ]
-    G.add_edges_from(edges)
-    return G
+# --- Message-driven BGP engine ---
 
-# --- Main Simulation ---
-if __name__ == "__main__":
-    G = create_as_topology()
-    all_nodes = list(G.nodes())
-    routers = {node: BgpRouter(node) for node in all_nodes}
+class AsPath:
+    """
+    Immutable, interned AS path.
 
-    for node in all_nodes:
-        routers[node].neighbors = list(G.neighbors(node))
-        routers[node].initialize_rib()
+    A path is a linked list: `head` is the first AS and `tail` is the path
+    it was prepended to. prepend() caches its results, so every distinct
+    path exists exactly once: when a thousand routers learn routes through
+    the same upstream they all share its path object, and two paths can be
+    compared with `is`.
 
-    # --- Simulation Loop ---
+    `asn in path` is the loop check on every received UPDATE. Most AS
+    paths are only a handful of ASes long, and for those `members` is a
+    tuple of all their ASes: 4-8x smaller than a frozenset, and scanning it
+    is only a few tens of nanoseconds slower. Longer paths (heavy
+    prepending, or router-level topologies like grids) are split into
+    chunks of CHUNK ASes: `members` holds the ASes from here down to the
+    start of the chunk, and `rest` is the path below it. A frozenset per
+    path would cost about 1 KB for a 30-AS path, for every one of the
+    millions of distinct paths such a topology produces.
+    """
+    __slots__ = ('head', 'tail', 'length', 'members', 'rest', '_prepends')
+
+    # Most ASes kept in one members tuple
+    CHUNK = 8
+
+    # One-AS paths, i.e. the routes each AS originates
+    _origins = {}
+
+    def __init__(self, head, tail=None):
+        self.head = head
+        self.tail = tail
+        if tail is None:
+            self.length = 1
+            self.members = (head,)
+            self.rest = None
+        else:
+            self.length = tail.length + 1
+            if len(tail.members) < self.CHUNK:
+                self.members = (head,) + tail.members
+                self.rest = tail.rest
+            else:
+                self.members = (head,)
+                self.rest = tail
+        # {asn: path}, created on first use; most paths are never prepended to
+        self._prepends = None
+
+    @classmethod
+    def origin(cls, asn):
+        path = cls._origins.get(asn)
+        if path is None:
+            path = cls._origins[asn] = cls(asn)
+        return path
+
+    def prepend(self, asn):
+        if self._prepends is None:
+            self._prepends = {}
+        path = self._prepends.get(asn)
+        if path is None:
+            path = self._prepends[asn] = AsPath(asn, self)
+        return path
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, asn):
+        path = self
+        while path is not None:
+            if asn in path.members:
+                return True
+            path = path.rest
+        return False
+
+    def __iter__(self):
+        node = self
+        while node is not None:
+            yield node.head
+            node = node.tail
+
+    def __repr__(self):
+        return " -> ".join(self)
+
+# Local preference by the relationship with the neighbor a route came from
+# (Gao-Rexford): customers pay us, peers are free, providers cost us.
+# None is a link without a business relationship (e.g. the lab topology).
+LOCAL_PREF = {'customer': 200, 'peer': 100, 'provider': 50, None: 100}
+
+# ORIGIN attribute; lower is preferred
+IGP, EGP, INCOMPLETE = 0, 1, 2
+
+class Route:
+    """
+    One candidate route in an adj-RIB-in / the loc-RIB.
+
+    All prefixes that arrive in the same UPDATE share one Route object, so a
+    table of a million prefixes from a few thousand origins holds a few
+    thousand Routes plus one dict entry per prefix.
+      path       - AsPath, starting with our own AS
+      local_pref - set from the neighbor relationship on eBGP, carried on iBGP
+      origin     - IGP / EGP / INCOMPLETE
+      med        - MULTI_EXIT_DISC, only compared between routes from the
+                   same neighbor AS
+      peer       - router we learned it from (None: originated here)
+      source     - relationship with the neighbor AS the route entered our
+                   AS from ('customer', 'peer', 'provider', None), or 'self'
+      ibgp       - learned over iBGP
+      originator - router that brought the route into our AS (ORIGINATOR_ID)
+      rank       - the part of the decision that applies to every pair of
+                   routes, in order: highest local-pref, shortest AS path,
+                   lowest origin (computed once per UPDATE, not per prefix)
+
+    An eBGP session without a relationship or MED changes nothing but the
+    path, so the adj-RIB-in of such a session keeps the peer's own Route
+    (its path starts with the peer's AS, not ours) and accept() makes our
+    copy only when the route is installed.
+    """
+    __slots__ = ('path', 'local_pref', 'origin', 'med', 'peer', 'source', 'ibgp', 'originator', 'rank',
+                 '_accepted')
+
+    def __init__(self, path, local_pref, origin, med, peer, source, ibgp=False, originator=None):
+        self.path = path
+        self.local_pref = local_pref
+        self.origin = origin
+        self.med = med
+        self.peer = peer
+        self.source = source
+        self.ibgp = ibgp
+        self.originator = originator
+        self.rank = (-local_pref, path.length, origin)
+        # {(asn, peer): Route}, like AsPath._prepends
+        self._accepted = None
+
+    def accept(self, asn, peer):
+        # This route, held by router `peer`, as AS `asn` sees it over a
+        # session without policy. Cached, so the prefixes that share this
+        # route share the accepted one too. Keyed by the peer as well: two
+        # routers of one AS can send us the same Route, and each copy must
+        # keep its own next hop.
+        if self._accepted is None:
+            self._accepted = {}
+        key = (asn, peer)
+        route = self._accepted.get(key)
+        if route is None:
+            route = self._accepted[key] = Route(self.path.prepend(asn), LOCAL_PREF[None], self.origin, 0,
+                                                peer, None)
+        return route
+
+    def neighbor_as(self):
+        # The AS we (our AS) learned the route from
+        return None if self.path.tail is None else self.path.tail.head
+
+def best_route(candidates):
+    """
+    BGP decision process over a list of Routes:
+      1. highest local-pref  2. shortest AS path  3. lowest origin
+      4. lowest MED, among routes from the same neighbor AS
+      5. eBGP over iBGP      6. lowest peer name (stands in for router ID)
+
+    MED makes the comparison non-transitive, so (like "deterministic-med")
+    each neighbor AS's best route is picked first, with MED, and those
+    winners are then compared without it. Without MEDs to tell them apart
+    (all equal, as on sessions that set none) the grouping changes
+    nothing and is skipped.
+    """
+    if len(candidates) < 2:
+        return candidates[0] if candidates else None
+    med = candidates[0].med
+    if all(route.med == med for route in candidates):
+        return min(candidates, key=lambda route: route.rank + (route.ibgp, route.peer))
+    winners = {}
+    for route in candidates:
+        key = route.rank + (route.med, route.ibgp, route.peer)
+        neighbor_as = route.neighbor_as()
+        if neighbor_as not in winners or key < winners[neighbor_as][0]:
+            winners[neighbor_as] = (key, route)
+    if not winners:
+        return None
+    return min(winners.values(), key=lambda item: item[0][:3] + item[0][4:])[1]
+
+class Session:
+    # What a speaker knows about one of its BGP sessions
+    __slots__ = ('asn', 'relationship', 'ibgp', 'client', 'med')
+
+    def __init__(self, asn, relationship, ibgp, client, med):
+        self.asn = asn
+        # What the peer is to us: 'customer', 'peer', 'provider' or None
+        self.relationship = relationship
+        self.ibgp = ibgp
+        # iBGP peer that is our route-reflector client
+        self.client = client
+        # MED we attach to routes we send over this (eBGP) session
+        self.med = med
+
+class BgpSpeaker:
+    """
+    BGP router for the message-driven engine.
+
+    Instead of re-reading each neighbor's whole RIB every round, routers
+    exchange UPDATE / WITHDRAW messages for the prefixes that changed:
+      adj_rib_in[peer] - {prefix: Route} as last announced by that peer
+      loc_rib          - {prefix: Route} our best route
+      changed          - {prefix: the Route our peers last heard about}
+                         for prefixes whose best route changed since the
+                         last flush(); a prefix that changes twice in
+                         between is only sent once
+
+    Several speakers can share an AS (`asn`, by default the name); they talk
+    iBGP to each other. A route reflector re-advertises iBGP routes (from
+    clients to everyone, from other iBGP peers to its clients), so the AS
+    doesn't need a full iBGP mesh.
+
+    Exports follow Gao-Rexford: routes from customers (and our own) go to
+    every neighbor, routes from peers and providers only to customers.
+    """
+
+    def __init__(self, name, asn=None, route_reflector=False):
+        self.name = name
+        self.asn = name if asn is None else asn
+        self.route_reflector = route_reflector
+        self.neighbors = []
+        self.sessions = {}
+        self.adj_rib_in = {}
+        self.loc_rib = {}
+        self.changed = {}
+        # Our route-reflector clients
+        self.clients = set()
+        # Prefixes this AS originates itself
+        self.originated = set()
+        self._own_routes = {}
+        # Whether any route with a MED has reached us; until then the
+        # decision process needs no deterministic-MED grouping
+        self.meds = False
+
+    def add_peer(self, peer, asn=None, relationship=None, client=False, med=0):
+        asn = peer if asn is None else asn
+        self.neighbors.append(peer)
+        self.sessions[peer] = Session(asn, relationship, asn == self.asn, client, med)
+        self.adj_rib_in[peer] = {}
+        if client:
+            self.clients.add(peer)
+
+    def originate(self, prefix, origin=IGP):
+        # Our prefixes share one Route per origin value, so they can be
+        # announced together
+        route = self._own_routes.get(origin)
+        if route is None:
+            route = self._own_routes[origin] = Route(AsPath.origin(self.asn), LOCAL_PREF['customer'], origin, 0, None, 'self')
+        self.originated.add(prefix)
+        self._install(prefix, route)
+
+    def stop_originating(self, prefix):
+        self.originated.discard(prefix)
+        self._decide(prefix)
+
+    def peer_down(self, peer):
+        # The session to `peer` went down: everything it told us is gone
+        self.neighbors.remove(peer)
+        del self.sessions[peer]
+        for prefix in self.adj_rib_in.pop(peer):
+            self._decide(prefix)
+
+    def receive(self, peer, route, med, prefixes):
+        # UPDATE (a Route) or WITHDRAW (route is None) from `peer`
+        session = self.sessions[peer]
+        if route is not None:
+            if med or (session.ibgp and route.med):
+                self.meds = True
+            if session.ibgp:
+                if route.originator == self.name:
+                    # Our own route reflected back to us
+                    route = None
+                else:
+                    route = Route(route.path, route.local_pref, route.origin, route.med, peer, route.source,
+                                  True, route.originator if route.ibgp else peer)
+            elif self.asn in route.path:
+                # Loop prevention: a path through us is as good as a withdraw
+                route = None
+            elif session.relationship is not None or med:
+                route = Route(route.path.prepend(self.asn), LOCAL_PREF[session.relationship], route.origin,
+                              med, peer, session.relationship)
+
+        rib_in = self.adj_rib_in[peer]
+        for prefix in prefixes:
+            if route is None:
+                old = rib_in.pop(prefix, None)
+                if old is None:
+                    continue
+            else:
+                old = rib_in.get(prefix)
+                rib_in[prefix] = route
+            self._update_best(prefix, peer, old, route)
+
+    def _accept(self, peer, route):
+        # The Route behind an adj-RIB-in entry (see Route)
+        return route if route.path.head == self.asn else route.accept(self.asn, peer)
+
+    def _rank(self, route):
+        # Route.rank of an adj-RIB-in entry, without accepting it
+        if route.path.head == self.asn:
+            return route.rank
+        return (-LOCAL_PREF[None], route.path.length + 1, route.origin)
+
+    def _update_best(self, prefix, peer, old, route):
+        # Only the candidate from `peer` changed (old -> route), so the full
+        # decision process is only needed when either of them could matter.
+        if prefix in self.originated:
+            return
+        current = self.loc_rib.get(prefix)
+        if current is None:
+            if route is not None:
+                self._install(prefix, self._accept(peer, route))
+            return
+        best_rank = current.rank
+        rank = None if route is None else self._rank(route)
+        if rank is not None and rank < best_rank:
+            # Beats the best route before MED even comes into it
+            self._install(prefix, self._accept(peer, route))
+            return
+        if not self.meds:
+            # The routes are totally ordered: only a change to the best one,
+            # or a route tied with it on rank, needs a closer look
+            if peer == current.peer:
+                self._decide(prefix)
+            elif rank == best_rank:
+                ibgp = route.path.head == self.asn and route.ibgp
+                if (ibgp, peer) < (current.ibgp, current.peer):
+                    self._install(prefix, self._accept(peer, route))
+            return
+        # Routes that lose to the best on the first steps can't change the
+        # outcome. (Equal ones can, even if they never were the best: with
+        # MED, removing a route can change which route wins its neighbor AS.)
+        if (peer != current.peer and (old is None or self._rank(old) > best_rank)
+                and (rank is None or rank > best_rank)):
+            return
+        self._decide(prefix)
+
+    def _decide(self, prefix):
+        if prefix in self.originated:
+            return
+        # Only the routes of the best rank can win, so only those are accepted
+        ranked = [(self._rank(rib[prefix]), peer) for peer, rib in self.adj_rib_in.items() if prefix in rib]
+        best = None
+        if ranked:
+            top = min(rank for rank, _ in ranked)
+            best = best_route([self._accept(peer, self.adj_rib_in[peer][prefix])
+                               for rank, peer in ranked if rank == top])
+        if best is not self.loc_rib.get(prefix):
+            self._install(prefix, best)
+
+    def _exports(self, route, peer, session):
+        # Would we announce `route` to `peer` (over `session`)?
+        if session.ibgp:
+            if route.originator == peer or route.peer == peer:
+                return False
+            if not route.ibgp:
+                # Our own and eBGP routes go to every iBGP peer
+                return True
+            if not self.route_reflector:
+                return False
+            # Reflect client routes to everyone, others only to clients
+            return session.client or route.peer in self.clients
+        if session.asn in route.path:
+            # The peer would drop it as a loop
+            return False
+        return session.relationship in ('customer', None) or route.source in ('self', 'customer', None)
+
+    def _install(self, prefix, route):
+        # Record our new best route (None: no route). What each peer needs
+        # to hear is worked out in flush().
+        self.changed.setdefault(prefix, self.loc_rib.get(prefix))
+        if route is None:
+            self.loc_rib.pop(prefix, None)
+        else:
+            self.loc_rib[prefix] = route
+
+    def flush(self):
+        # Turn the changes since the last flush into (peer, route, med,
+        # prefixes) messages. Prefixes that went from the same old route to
+        # the same new one travel together, the way one BGP UPDATE carries
+        # every prefix that shares its attributes, and the export policy is
+        # checked once per group and peer rather than once per prefix.
+        groups = {}
+        for prefix, old in self.changed.items():
+            new = self.loc_rib.get(prefix)
+            if new is not old:
+                groups.setdefault((old, new), []).append(prefix)
+        self.changed = {}
+
+        messages = []
+        append, exports = messages.append, self._exports
+        sessions = self.sessions.items()
+        for (old, new), prefixes in groups.items():
+            for peer, session in sessions:
+                if new is not None and exports(new, peer, session):
+                    # MED is ours to set on eBGP and is carried as is on iBGP
+                    append((peer, new, new.med if session.ibgp else session.med, prefixes))
+                elif old is not None and exports(old, peer, session):
+                    # Take back what we announced before
+                    append((peer, None, 0, prefixes))
+        return messages
+
+    def next_hop(self, prefix):
+        route = self.loc_rib[prefix]
+        return 'self' if route.peer is None else route.peer
+
+    def print_rib(self):
+        print(f"--- BGP RIB for {self.name} ---")
+        print(f"{'Prefix':<10} | {'Next Hop':<10} | {'AS Path'}")
+        print("-" * 40)
+        for prefix, route in sorted(self.loc_rib.items()):
+            print(f"{prefix:<10} | {self.next_hop(prefix):<10} | {route.path}")
+        print("\n")
+
+def relationship(G, u, v):
+    # What v is to u, from the 'provider' edge attribute: the provider's
+    # node for customer-provider links, None for settlement-free peering,
+    # absent for links without a business relationship.
+    data = G.edges[u, v]
+    if 'provider' not in data:
+        return None
+    provider = data['provider']
+    if provider is None:
+        return 'peer'
+    return 'customer' if provider == u else 'provider'
+
+class BgpNetwork:
+    # A set of BgpSpeakers wired up like the graph, plus the event loop that
+    # delivers their messages. Nodes are routers; the node attributes 'asn'
+    # (default: the node name) and 'route_reflector' place them in ASes,
+    # and links between routers of the same AS are iBGP sessions.
+
+    def __init__(self, G):
+        nodes = G.nodes
+        self.speakers = {node: BgpSpeaker(node, nodes[node].get('asn'), nodes[node].get('route_reflector', False))
+                         for node in G.nodes()}
+        for u, v in G.edges():
+            for a, b in ((u, v), (v, u)):
+                speaker, peer = self.speakers[a], self.speakers[b]
+                ibgp = peer.asn == speaker.asn
+                speaker.add_peer(b, peer.asn, None if ibgp else relationship(G, a, b),
+                                 client=ibgp and speaker.route_reflector and not peer.route_reflector)
+
+    def run(self, active=None):
+        """
+        Deliver messages until nothing changes any more.
+
+        Speakers send in waves, like routers that hold back their UPDATEs for
+        an MRAI interval: every speaker with queued changes (`active`, or
+        all of them at first) flushes once, all those messages are
+        delivered, and the speakers whose RIBs changed as a result make up
+        the next wave. Without the batching a router re-announces a prefix
+        every time a slightly better path trickles in, which floods the
+        network with short-lived paths.
+
+        Returns (messages, prefix announcements/withdrawals) sent.
+        """
+        speakers = self.speakers
+        wave = list(speakers if active is None else active)
+        messages = prefixes_sent = 0
+        while wave:
+            # Everyone in the wave sends before anything is received
+            sent = [(name, speakers[name].flush()) for name in wave]
+            # (a dict rather than a set, so the order is reproducible)
+            receivers = {}
+            for name, outgoing in sent:
+                messages += len(outgoing)
+                for peer, route, med, prefixes in outgoing:
+                    prefixes_sent += len(prefixes)
+                    speakers[peer].receive(name, route, med, prefixes)
+                    receivers[peer] = True
+            wave = [name for name in receivers if speakers[name].changed]
+        return messages, prefixes_sent
+
+    def link_down(self, u, v):
+        self.speakers[u].peer_down(v)
+        self.speakers[v].peer_down(u)
+        return self.run([u, v])
+
+def run_rounds(routers, all_nodes, verbose=True):
+    # The original synchronous simulation with BgpRouter: every round each
+    # router re-reads every neighbor's full RIB. Returns the round count.
     converged = False
     iteration = 0
     while not converged:
         iteration += 1
-        print(f"*** BGP Iteration {iteration} ***")
+        if verbose:
+            print(f"*** BGP Iteration {iteration} ***")
         converged = True
         
         current_ribs = {name: router.rib.copy() for name, router in routers.items()}
@@ -80,7 +541,38 @@ if __name__ == "__main__":
         if iteration > len(all_nodes) * 2:
             print("Warning: Possible BGP convergence issue.")
             break
+    return iteration
+
+def create_as_topology():
+    G = nx.Graph()
+    # Nodes are ASes
+    edges = [
+        ('AS1', 'AS2'), ('AS1', 'AS3'),
+        ('AS2', 'AS4'), ('AS3', 'AS4'),
+        ('AS4', 'AS5')
+    ]
+    G.add_edges_from(edges)
+    return G
+
+# --- Main Simulation ---
+if __name__ == "__main__":
+    G = create_as_topology()
+    network = BgpNetwork(G)
+
+    # Every AS announces a prefix named after itself
+    for name, speaker in network.speakers.items():
+        speaker.originate(name)
+
+    # --- Simulation Loop ---
+    messages, prefixes_sent = network.run()
+    print(f"*** {messages} UPDATE/WITHDRAW messages, {prefixes_sent} prefixes ***")
 
     print("--- BGP Simulation Converged ---")
-    for name, router in routers.items():
-        router.print_rib()
+    for name, speaker in network.speakers.items():
+        speaker.print_rib()
+
+    # AS4-AS5 goes down: AS5 is withdrawn everywhere, nothing else moves
+    messages, prefixes_sent = network.link_down('AS4', 'AS5')
+    print(f"--- Link AS4-AS5 down: {messages} messages, {prefixes_sent} prefixes ---")
+    for name in ('AS1', 'AS4'):
+        network.speakers[name].print_rib()
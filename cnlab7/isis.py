@@ -1,55 +1,12 @@
 # isis.py
 import networkx as nx
-import heapq
+
+# dijkstra/get_routing_table are re-exported for code that imported them from here
+from spf import LinkStateGraph, all_routing_tables, dijkstra, ecmp_routing_table, get_routing_table
 
 # This simulation focuses on the link-state (Dijkstra) aspect of IS-IS,
 # which is conceptually similar to OSPF as per the lab requirements.
 
-def dijkstra(graph, start_node):
-    distances = {node: float('inf') for node in graph.nodes()}
-    previous_nodes = {node: None for node in graph.nodes()}
-    distances[start_node] = 0
-    pq = [(0, start_node)]
-    
-    while pq:
-        current_cost, current_node = heapq.heappop(pq)
-        
-        if current_cost > distances[current_node]:
-            continue
-            
-        for neighbor in graph.neighbors(current_node):
-            cost = graph.edges[current_node, neighbor]['cost']
-            new_cost = distances[current_node] + cost
-            
-            if new_cost < distances[neighbor]:
-                distances[neighbor] = new_cost
-                previous_nodes[neighbor] = current_node
-                heapq.heappush(pq, (new_cost, neighbor))
-                
-    return distances, previous_nodes
-
-def get_routing_table(start_node, distances, previous_nodes):
-    table = {}
-    for dest in previous_nodes:
-        if dest == start_node:
-            table[dest] = {'next_hop': '-', 'cost': 0}
-            continue
-        
-        if distances[dest] == float('inf'):
-            table[dest] = {'next_hop': '-', 'cost': 'inf'}
-            continue
-
-        curr = dest
-        next_hop = None
-        while curr != start_node:
-            if previous_nodes[curr] == start_node:
-                next_hop = curr
-                break
-            curr = previous_nodes[curr]
-            
-        table[dest] = {'next_hop': next_hop, 'cost': distances[dest]}
-    return table
-
 def print_table(router_name, table):
     print(f"--- IS-IS Routing Table for {router_name} ---")
     print(f"{'Destination':<12} | {'Next Hop':<10} | {'Cost':<5}")
@@ -58,6 +15,18 @@ def print_table(router_name, table):
         print(f"{dest:<12} | {info['next_hop']:<10} | {info['cost']:<5}")
     print("\n")
 
+def print_ecmp_routes(router_name, table):
+    # Only the destinations with more than one equal-cost next hop
+    multipath = {dest: info for dest, info in table.items() if len(info['next_hops']) > 1}
+    if not multipath:
+        return
+    print(f"--- IS-IS ECMP routes for {router_name} ---")
+    print(f"{'Destination':<12} | {'Next Hops':<16} | {'Cost':<5}")
+    print("-" * 43)
+    for dest, info in sorted(multipath.items()):
+        print(f"{dest:<12} | {', '.join(info['next_hops']):<16} | {info['cost']:<5}")
+    print("\n")
+
 def create_topology():
     G = nx.Graph()
     # Using a different topology for variety
@@ -79,7 +48,14 @@ if __name__ == "__main__":
     print("Each router builds its topology database (assumed complete) and runs Dijkstra.")
     print("\n")
 
+    tables = all_routing_tables(LinkStateGraph(G))
+    for node in all_nodes:
+        print_table(node, tables[node])
+
+    # Equal-cost paths: the tables above keep one next hop per destination
+    # (the first one found wins the tie); with ECMP every equal-cost next
+    # hop is kept and flows are spread over them
+    print("--- Equal-cost multipath (ECMP) ---")
+    lsdb = LinkStateGraph(G)
     for node in all_nodes:
-        distances, previous_nodes = dijkstra(G, node)
-        routing_table = get_routing_table(node, distances, previous_nodes)
-        print_table(node, routing_table)
+        print_ecmp_routes(node, ecmp_routing_table(lsdb, node))
@@ -1,56 +1,8 @@
 # ospf.py
 import networkx as nx
-import heapq
 
-def dijkstra(graph, start_node):
-    # {node: cost}
-    distances = {node: float('inf') for node in graph.nodes()}
-    # {node: previous_node_in_path}
-    previous_nodes = {node: None for node in graph.nodes()}
-    distances[start_node] = 0
-    
-    # Priority queue: (cost, node)
-    pq = [(0, start_node)]
-    
-    while pq:
-        current_cost, current_node = heapq.heappop(pq)
-        
-        if current_cost > distances[current_node]:
-            continue
-            
-        for neighbor in graph.neighbors(current_node):
-            cost = graph.edges[current_node, neighbor]['cost']
-            new_cost = distances[current_node] + cost
-            
-            if new_cost < distances[neighbor]:
-                distances[neighbor] = new_cost
-                previous_nodes[neighbor] = current_node
-                heapq.heappush(pq, (new_cost, neighbor))
-                
-    return distances, previous_nodes
-
-def get_routing_table(start_node, distances, previous_nodes):
-    table = {}
-    for dest in previous_nodes:
-        if dest == start_node:
-            table[dest] = {'next_hop': '-', 'cost': 0}
-            continue
-            
-        if distances[dest] == float('inf'):
-            table[dest] = {'next_hop': '-', 'cost': 'inf'}
-            continue
-
-        # Trace back to find the first hop from the start_node
-        curr = dest
-        next_hop = None
-        while curr != start_node:
-            if previous_nodes[curr] == start_node:
-                next_hop = curr
-                break
-            curr = previous_nodes[curr]
-            
-        table[dest] = {'next_hop': next_hop, 'cost': distances[dest]}
-    return table
+# dijkstra/get_routing_table are re-exported for code that imported them from here
+from spf import IncrementalSpf, LinkStateGraph, all_routing_tables, dijkstra, ecmp_routing_table, get_routing_table
 
 def print_table(router_name, table):
     print(f"--- OSPF Routing Table for {router_name} ---")
@@ -60,6 +12,18 @@ def print_table(router_name, table):
         print(f"{dest:<12} | {info['next_hop']:<10} | {info['cost']:<5}")
     print("\n")
 
+def print_ecmp_routes(router_name, table):
+    # Only the destinations with more than one equal-cost next hop
+    multipath = {dest: info for dest, info in table.items() if len(info['next_hops']) > 1}
+    if not multipath:
+        return
+    print(f"--- OSPF ECMP routes for {router_name} ---")
+    print(f"{'Destination':<12} | {'Next Hops':<16} | {'Cost':<5}")
+    print("-" * 43)
+    for dest, info in sorted(multipath.items()):
+        print(f"{dest:<12} | {', '.join(info['next_hops']):<16} | {info['cost']:<5}")
+    print("\n")
+
 def create_topology():
     G = nx.Graph()
     edges = [
@@ -84,12 +48,32 @@ if __name__ == "__main__":
     print("Each router builds its Link-State Database (assumed complete) and runs Dijkstra.")
     print("\n")
 
+    # Convert the topology to integer-indexed adjacency lists once, then
+    # run Dijkstra from every router's perspective (in parallel on large
+    # topologies) and build the routing tables
+    lsdb = LinkStateGraph(G)
+    tables = all_routing_tables(lsdb)
+
     for node in all_nodes:
-        # Run Dijkstra from this node's perspective
-        distances, previous_nodes = dijkstra(G, node)
-        
-        # Build the routing table
-        routing_table = get_routing_table(node, distances, previous_nodes)
-        
         # 4. Display the table
-        print_table(node, routing_table)
+        print_table(node, tables[node])
+
+    # 5. A link fails. The new LSA reaches every router, but instead of
+    #    rerunning Dijkstra from scratch each one only repairs the part of
+    #    its shortest path tree that went through the failed link.
+    spf = IncrementalSpf(G)
+    spf.remove_link('B', 'D')
+    print("--- Link B-D fails: incremental SPF ---")
+    print("Only the routers whose table changed are shown.")
+    print("\n")
+    for node in all_nodes:
+        table = spf.routing_table(node)
+        if table != tables[node]:
+            print_table(node, table)
+
+    # 6. Equal-cost paths: the tables above keep one next hop per
+    #    destination (the first one found wins the tie); with ECMP every
+    #    equal-cost next hop is kept and flows are spread over them
+    print("--- Equal-cost multipath (ECMP) ---")
+    for node in all_nodes:
+        print_ecmp_routes(node, ecmp_routing_table(lsdb, node))
@@ -1,18 +1,34 @@
 # rip.py
+from collections import deque
+
 import networkx as nx
 
+# RIP's "unreachable" metric
+INFINITY = 99
+
 class RipRouter:
     def __init__(self, name):
         self.name = name
         self.neighbors = []
         # Routing table: {destination: {'next_hop': 'X', 'cost': 99}}
         self.routing_table = {}
+        # --- Triggered-update mode only ---
+        # Destinations whose route changed since we last advertised
+        self.changed = set()
+        # The last distance vector each neighbor sent us: {neighbor: {dest: cost}}
+        self.neighbor_costs = {}
+        # What we last told each neighbor: {neighbor: {dest: cost}}
+        self.told = {}
 
     def initialize_table(self, all_nodes):
         # Initialize table with infinity to all, 0 to self
         for node in all_nodes:
-            self.routing_table[node] = {'next_hop': None, 'cost': 99}
+            self.routing_table[node] = {'next_hop': None, 'cost': INFINITY}
         self.routing_table[self.name] = {'next_hop': self.name, 'cost': 0}
+        # Our own entry is the only thing there is to announce at first
+        self.changed = {self.name}
+        self.neighbor_costs = {neighbor: {} for neighbor in self.neighbors}
+        self.told = {neighbor: {} for neighbor in self.neighbors}
 
     def update_table(self, neighbor_name, neighbor_table):
         # Bellman-Ford logic
@@ -26,6 +42,77 @@ class RipRouter:
                 table_changed = True
         return table_changed
 
+    def make_update(self, neighbor_name, split_horizon='poison'):
+        # Triggered update for one neighbor: (dest, cost) pairs for the
+        # routes that changed, leaving out anything the neighbor already has.
+        #   split_horizon=None      - advertise every route as is
+        #   split_horizon='simple'  - don't advertise a route back to the
+        #                             neighbor we learned it from (a route we
+        #                             had told it about is withdrawn instead)
+        #   split_horizon='poison'  - poison reverse: advertise such routes
+        #                             back with cost INFINITY
+        told = self.told[neighbor_name]
+        update = []
+        for dest in self.changed:
+            route = self.routing_table[dest]
+            cost = route['cost']
+            if split_horizon and route['next_hop'] == neighbor_name:
+                if split_horizon == 'simple' and told.get(dest, INFINITY) == INFINITY:
+                    continue
+                cost = INFINITY
+            if told.get(dest) != cost:
+                told[dest] = cost
+                update.append((dest, cost))
+        return update
+
+    def receive_update(self, neighbor_name, update):
+        # Distance-vector update from a neighbor. Unlike update_table(), a
+        # route can also get worse: if the neighbor we route through reports
+        # a higher cost, we pick the best neighbor again from the vectors
+        # they last sent us. Returns True if our table changed.
+        vector = self.neighbor_costs[neighbor_name]
+        table_changed = False
+        for dest, cost in update:
+            vector[dest] = cost
+            route = self.routing_table[dest]
+            new_cost = cost + 1 if cost < INFINITY else INFINITY
+
+            if new_cost < route['cost']:
+                route['cost'] = new_cost
+                route['next_hop'] = neighbor_name
+            elif route['next_hop'] == neighbor_name and new_cost > route['cost']:
+                if not self._reselect(dest):
+                    continue
+            else:
+                continue
+            self.changed.add(dest)
+            table_changed = True
+        return table_changed
+
+    def _reselect(self, dest):
+        # Best route to dest from the neighbors' last vectors. Returns True
+        # if the route changed.
+        best_cost, best_hop = INFINITY, None
+        for neighbor in self.neighbors:
+            cost = self.neighbor_costs[neighbor].get(dest, INFINITY) + 1
+            if cost < best_cost:
+                best_cost, best_hop = cost, neighbor
+        route = self.routing_table[dest]
+        if (route['cost'], route['next_hop']) == (best_cost, best_hop):
+            return False
+        route['cost'], route['next_hop'] = best_cost, best_hop
+        return True
+
+    def link_down(self, neighbor_name):
+        # The link to a neighbor failed: forget what it told us and find new
+        # routes for everything we sent through it
+        self.neighbors.remove(neighbor_name)
+        del self.neighbor_costs[neighbor_name]
+        del self.told[neighbor_name]
+        for dest, route in self.routing_table.items():
+            if route['next_hop'] == neighbor_name and self._reselect(dest):
+                self.changed.add(dest)
+
     def print_table(self):
         print(f"--- RIP Routing Table for {self.name} ---")
         print(f"{'Destination':<12} | {'Next Hop':<10} | {'Cost':<5}")
@@ -36,32 +123,17 @@ class RipRouter:
             print(f"{dest:<12} | {next_hop:<10} | {cost:<5}")
         print("\n")
 
-def create_topology():
-    G = nx.Graph()
-    edges = [
-        ('A', 'B'), ('B', 'C'), ('C', 'D'), 
-        ('A', 'C'), ('B', 'D')
-    ]
-    G.add_edges_from(edges)
-    return G
-
-# --- Main Simulation ---
-if __name__ == "__main__":
-    G = create_topology()
-    all_nodes = list(G.nodes())
-    routers = {node: RipRouter(node) for node in all_nodes}
-
-    # Set neighbors for each router
-    for node in all_nodes:
-        routers[node].neighbors = list(G.neighbors(node))
-        routers[node].initialize_table(all_nodes)
-
-    # --- Simulation Loop ---
+def run_rounds(routers, all_nodes, verbose=True):
+    # The original synchronous simulation: in every round each router
+    # processes every neighbor's full table.
+    # Returns (rounds, messages, route entries sent).
     converged = False
     iteration = 0
+    messages = 0
     while not converged:
         iteration += 1
-        print(f"*** Iteration {iteration} ***")
+        if verbose:
+            print(f"*** Iteration {iteration} ***")
         converged = True # Assume convergence until proven otherwise
         
         # Routers exchange tables simultaneously (in rounds)
@@ -71,13 +143,93 @@ if __name__ == "__main__":
         for name, router in routers.items():
             for neighbor_name in router.neighbors:
                 neighbor_table = current_tables[neighbor_name]
+                messages += 1
                 if router.update_table(neighbor_name, neighbor_table):
                     converged = False # A change occurred, not converged yet
         
         if iteration > len(all_nodes) * 2:
             print("Warning: Possible count-to-infinity loop or slow convergence.")
             break
+    return iteration, messages, messages * len(all_nodes)
+
+def run_triggered(routers, active, split_horizon='poison'):
+    """
+    Event-driven convergence with triggered updates.
+
+    `active` are the routers that have something new to announce. A
+    worklist holds the routers with unsent changes; each one sends only the
+    changed routes, only to its neighbors, and a neighbor whose table
+    changes as a result joins the worklist. Nothing is done for routers
+    (or routes) that did not change.
+
+    Returns (router activations, messages, route entries sent).
+    """
+    queue = deque(active)
+    queued = set(active)
+    activations = messages = entries = 0
+    while queue:
+        name = queue.popleft()
+        queued.discard(name)
+        router = routers[name]
+        activations += 1
+        for neighbor_name in router.neighbors:
+            update = router.make_update(neighbor_name, split_horizon)
+            if not update:
+                continue
+            messages += 1
+            entries += len(update)
+            if routers[neighbor_name].receive_update(name, update) and neighbor_name not in queued:
+                queue.append(neighbor_name)
+                queued.add(neighbor_name)
+        router.changed.clear()
+    return activations, messages, entries
+
+def build_routers(G):
+    all_nodes = list(G.nodes())
+    routers = {node: RipRouter(node) for node in all_nodes}
+
+    # Set neighbors for each router
+    for node in all_nodes:
+        routers[node].neighbors = list(G.neighbors(node))
+        routers[node].initialize_table(all_nodes)
+    return routers
+
+def create_topology():
+    G = nx.Graph()
+    edges = [
+        ('A', 'B'), ('B', 'C'), ('C', 'D'), 
+        ('A', 'C'), ('B', 'D')
+    ]
+    G.add_edges_from(edges)
+    return G
+
+# --- Main Simulation ---
+if __name__ == "__main__":
+    G = create_topology()
+    all_nodes = list(G.nodes())
+    routers = build_routers(G)
+
+    # --- Simulation Loop ---
+    rounds, messages, entries = run_rounds(routers, all_nodes)
 
     print("--- Simulation Converged ---")
     for name, router in routers.items():
         router.print_table()
+
+    # --- Same network with triggered updates ---
+    triggered = build_routers(G)
+    _, t_messages, t_entries = run_triggered(triggered, all_nodes)
+    print("--- Triggered updates (split horizon with poison reverse) ---")
+    print(f"Rounds:    {messages} messages, {entries} route entries")
+    print(f"Triggered: {t_messages} messages, {t_entries} route entries")
+    for name, router in triggered.items():
+        assert all(router.routing_table[dest]['cost'] == routers[name].routing_table[dest]['cost'] for dest in all_nodes)
+    print("Converged to the same costs.\n")
+
+    # Link B-D fails: only B and D have news, and only what changed spreads
+    triggered['B'].link_down('D')
+    triggered['D'].link_down('B')
+    _, t_messages, t_entries = run_triggered(triggered, ['B', 'D'])
+    print(f"--- Link B-D fails: reconverged with {t_messages} messages, {t_entries} route entries ---\n")
+    for name, router in triggered.items():
+        router.print_table()
@@ -0,0 +1,836 @@
+# spf.py
+# Shortest Path First engine shared by the link-state protocols (OSPF, IS-IS).
+import heapq
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# NumPy is imported only by the array code (CSR export, the process pool,
+# all-pairs matrices), so the OSPF/IS-IS labs run without it
+
+INF = float('inf')
+
+class LinkStateGraph:
+    """
+    Integer-indexed copy of a networkx topology (the link-state database).
+
+    Dijkstra's inner loop runs millions of times on a large graph, and
+    `graph.edges[u, v]['cost']` goes through several networkx dict lookups on
+    every call. We convert the graph once instead:
+      nodes[i]     - the node name for index i
+      index[name]  - the index for a node name
+      adjacency[i] - list of (neighbor_index, cost) pairs
+
+    Nodes are numbered in sorted order (when the names can be sorted), which
+    is also the order the heap settles nodes of equal cost in. Ties between
+    equal-cost paths therefore come out as in the original per-protocol
+    Dijkstra, and do not depend on the order edges were added in.
+    """
+
+    def __init__(self, graph, weight='cost'):
+        try:
+            nodes = sorted(graph.nodes())
+        except TypeError:
+            nodes = list(graph.nodes())
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        index = self.index
+        self.adjacency = [
+            [(index[neighbor], data[weight]) for neighbor, data in graph.adj[node].items()]
+            for node in nodes
+        ]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def cost(self, u, v):
+        # Cost of the link u -> v (indices), INF if there is none
+        for neighbor, cost in self.adjacency[u]:
+            if neighbor == v:
+                return cost
+        return INF
+
+    def set_cost(self, u, v, cost):
+        # Add, change (cost) or remove (cost=INF) the undirected link u <-> v.
+        # Returns the old cost.
+        old = self.cost(u, v)
+        for a, b in ((u, v), (v, u)):
+            links = [(neighbor, c) for neighbor, c in self.adjacency[a] if neighbor != b]
+            if cost != INF:
+                links.append((b, cost))
+            self.adjacency[a] = links
+        return old
+
+    def to_csr(self):
+        import numpy as np
+        # The adjacency lists as three flat arrays (compressed sparse rows):
+        # node i's links are indices[indptr[i]:indptr[i + 1]] with the
+        # matching costs. Costs stay integers if they all are.
+        adjacency = self.adjacency
+        indptr = np.zeros(len(adjacency) + 1, dtype=np.int64)
+        np.cumsum([len(links) for links in adjacency], out=indptr[1:])
+        indices = np.fromiter((v for links in adjacency for v, _ in links), dtype=np.int32, count=indptr[-1])
+        costs = [cost for links in adjacency for _, cost in links]
+        integral = all(isinstance(cost, int) for cost in costs)
+        costs = np.array(costs, dtype=np.int64 if integral else np.float64)
+        return indptr, indices, costs
+
+    @classmethod
+    def from_csr(cls, nodes, indptr, indices, costs):
+        lsdb = cls.__new__(cls)
+        lsdb.nodes = list(nodes)
+        lsdb.index = {node: i for i, node in enumerate(lsdb.nodes)}
+        indptr, indices, costs = indptr.tolist(), indices.tolist(), costs.tolist()
+        lsdb.adjacency = [list(zip(indices[indptr[i]:indptr[i + 1]], costs[indptr[i]:indptr[i + 1]]))
+                          for i in range(len(lsdb.nodes))]
+        return lsdb
+
+def shortest_paths(lsdb, source):
+    """
+    Dijkstra from node index `source`.
+
+    Returns three lists indexed by node:
+      dist      - path cost (INF if unreachable)
+      pred      - previous node on the path (-1 for the source/unreachable)
+      first_hop - first node after the source on the path (-1 if none)
+
+    The first hop is carried along while relaxing edges (a node inherits its
+    predecessor's first hop), so the whole routing table comes out of a
+    single pass instead of walking back along `pred` for every destination.
+
+    When two paths cost the same, the predecessor settled first wins: the
+    one closer to the source, then the one with the lower index. Nodes are
+    settled in (cost, index) order, so that is simply the first predecessor
+    to reach the node, as in the original ospf.py/isis.py Dijkstra.
+    """
+    adjacency = lsdb.adjacency
+    n = len(adjacency)
+    dist = [INF] * n
+    pred = [-1] * n
+    first_hop = [-1] * n
+    dist[source] = 0
+    pq = [(0, source)]
+
+    while pq:
+        current_cost, u = heapq.heappop(pq)
+        if current_cost > dist[u]:
+            continue
+
+        for v, cost in adjacency[u]:
+            new_cost = current_cost + cost
+            old_cost = dist[v]
+            if new_cost < old_cost:
+                dist[v] = new_cost
+                heapq.heappush(pq, (new_cost, v))
+                pred[v] = u
+                first_hop[v] = v if u == source else first_hop[u]
+
+    return dist, pred, first_hop
+
+def table_from_paths(lsdb, source, dist, first_hop):
+    # Build the {dest: {'next_hop', 'cost'}} table the protocol modules print
+    nodes = lsdb.nodes
+    table = {}
+    for i, dest in enumerate(nodes):
+        if i == source:
+            table[dest] = {'next_hop': '-', 'cost': 0}
+        elif dist[i] == INF:
+            table[dest] = {'next_hop': '-', 'cost': 'inf'}
+        else:
+            table[dest] = {'next_hop': nodes[first_hop[i]], 'cost': dist[i]}
+    return table
+
+def compute_routing_table(lsdb, start_node):
+    # Routing table for one router, in a single Dijkstra pass
+    source = lsdb.index[start_node]
+    dist, _, first_hop = shortest_paths(lsdb, source)
+    return table_from_paths(lsdb, source, dist, first_hop)
+
+# --- Equal-cost multipath ---
+
+def shortest_paths_ecmp(lsdb, source):
+    """
+    Dijkstra from node index `source`, keeping every equal-cost path.
+
+    Returns three lists indexed by node:
+      dist      - path cost (INF if unreachable)
+      preds     - list of every previous node on a shortest path
+      next_hops - frozenset of the first hops of all shortest paths
+
+    A node's next hops are the union of its predecessors' (or the node
+    itself when the source is a predecessor). All predecessors are settled
+    before the node, so each set is final when it is used. A node with a
+    single predecessor shares its predecessor's set instead of copying it,
+    so on a graph without ties this costs little more than shortest_paths().
+    """
+    adjacency = lsdb.adjacency
+    n = len(adjacency)
+    dist = [INF] * n
+    preds = [None] * n
+    next_hops = [frozenset()] * n
+    dist[source] = 0
+    pq = [(0, source)]
+
+    while pq:
+        current_cost, u = heapq.heappop(pq)
+        if current_cost > dist[u]:
+            continue
+
+        hops = next_hops[u]
+        for v, cost in adjacency[u]:
+            new_cost = current_cost + cost
+            old_cost = dist[v]
+            if new_cost < old_cost:
+                dist[v] = new_cost
+                heapq.heappush(pq, (new_cost, v))
+                preds[v] = [u]
+                next_hops[v] = frozenset((v,)) if u == source else hops
+            elif new_cost == old_cost and v != source:
+                preds[v].append(u)
+                if u == source:
+                    next_hops[v] = next_hops[v] | {v}
+                elif next_hops[v] is not hops:
+                    next_hops[v] = next_hops[v] | hops
+
+    preds = [p if p is not None else [] for p in preds]
+    return dist, preds, next_hops
+
+def ecmp_routing_table(lsdb, start_node):
+    # Routing table with every equal-cost next hop: {dest: {'next_hops':
+    # sorted list of names, 'cost'}}; the source and unreachable
+    # destinations have no next hops
+    source = lsdb.index[start_node]
+    dist, _, next_hops = shortest_paths_ecmp(lsdb, source)
+    nodes = lsdb.nodes
+    table = {}
+    for i, dest in enumerate(nodes):
+        cost = 'inf' if dist[i] == INF else dist[i]
+        table[dest] = {'next_hops': [nodes[hop] for hop in sorted(next_hops[i])], 'cost': cost}
+    return table
+
+class EcmpForwarder:
+    """
+    Spreads flows over the equal-cost next hops, per flow: the 5-tuple
+    (src, dst, proto, sport, dport) is hashed with CRC32, and the hash
+    picks one of the sorted next hops. Every packet of a flow takes the same
+    path (no reordering), and different flows spread evenly.
+
+    Each router mixes its own salt into the hash. With the same hash
+    everywhere, the flows that one switch sends left would all go left at
+    the next layer too ("hash polarization"), leaving most links below it
+    unused. CRC32 is linear, so seeding it with the salt (or XORing the salt
+    in) only flips the same bits for every flow and polarizes just the
+    same; the salted value goes through a multiplicative hash instead, and
+    its top bits pick the next hop.
+
+    Forwarding tables are computed per router on first use.
+    """
+
+    def __init__(self, graph, weight='cost'):
+        self.lsdb = LinkStateGraph(graph, weight)
+        self.fib = {}
+        self.salt = {}
+
+    def _table(self, router):
+        table = self.fib.get(router)
+        if table is None:
+            source = self.lsdb.index[router]
+            _, _, next_hops = shortest_paths_ecmp(self.lsdb, source)
+            # Sorted tuples of names, shared between destinations whose
+            # next-hop sets are the same object
+            names = {}
+            table = []
+            for hops in next_hops:
+                if id(hops) not in names:
+                    names[id(hops)] = tuple(sorted(self.lsdb.nodes[hop] for hop in hops))
+                table.append(names[id(hops)])
+            self.fib[router] = table
+            self.salt[router] = zlib.crc32(str(router).encode())
+        return table
+
+    @staticmethod
+    def flow_hash(flow):
+        # CRC32 of the 5-tuple, computed once per flow
+        return zlib.crc32("|".join(map(str, flow)).encode())
+
+    def _pick(self, router, dest, crc):
+        hops = self._table(router)[self.lsdb.index[dest]]
+        if len(hops) < 2:
+            return hops[0] if hops else None
+        mixed = ((crc ^ self.salt[router]) * 0x9E3779B1) & 0xFFFFFFFF
+        return hops[(mixed * len(hops)) >> 32]
+
+    def next_hop(self, router, dest, flow):
+        # Next hop from `router` towards `dest` for the flow's 5-tuple
+        # (None at the destination or if it is unreachable)
+        return self._pick(router, dest, self.flow_hash(flow))
+
+    def path(self, src, dest, flow):
+        # Routers the flow visits from src to dest, hop by hop
+        crc = self.flow_hash(flow)
+        path = [src]
+        while path[-1] != dest:
+            hop = self._pick(path[-1], dest, crc)
+            if hop is None:
+                return None
+            path.append(hop)
+        return path
+
+# --- Incremental SPF ---
+
+class SpfTree:
+    # Shortest-path tree of one router: the dist/pred/first_hop lists from
+    # shortest_paths(), which IncrementalSpf patches in place.
+    # A node's children are the neighbors whose pred is that node, so they
+    # are found from the adjacency lists instead of being stored.
+    __slots__ = ('source', 'dist', 'pred', 'first_hop')
+
+    def __init__(self, lsdb, source):
+        self.source = source
+        self.dist, self.pred, self.first_hop = shortest_paths(lsdb, source)
+
+class IncrementalSpf:
+    """
+    Keeps every router's shortest-path tree up to date across topology
+    changes, instead of rerunning Dijkstra from scratch for every router.
+
+    A change only touches the routers (and the part of each tree) it can
+    actually affect, in the spirit of Ramalingam & Reps' dynamic SPF:
+      - a link getting worse (cost up / removed) only matters if it is a tree
+        edge; the subtree hanging below it is cut off and re-attached with a
+        small Dijkstra run over just that subtree.
+      - a link getting better (cost down / added) starts a Dijkstra run at
+        its far end that only continues while distances actually improve.
+    Predecessors are then re-chosen with the same tie-break as
+    shortest_paths() (settled first), so routing_table() always returns
+    exactly what compute_routing_table() would on the changed topology.
+
+    Links are undirected and costs must be positive, as in ospf.py/isis.py.
+    """
+
+    def __init__(self, graph, weight='cost', routers=None):
+        if graph.is_directed():
+            raise ValueError("IncrementalSpf needs an undirected topology")
+        self.lsdb = LinkStateGraph(graph, weight)
+        # Routers that have failed; they keep their index but have no links
+        self.down = set()
+        # The routers whose trees we maintain (all of them by default)
+        self.routers = set(self.lsdb.nodes if routers is None else routers)
+        self.trees = {router: SpfTree(self.lsdb, self.lsdb.index[router]) for router in self.routers}
+
+    def routing_table(self, router):
+        tree = self.trees[router]
+        table = table_from_paths(self.lsdb, tree.source, tree.dist, tree.first_hop)
+        for node in self.down:
+            del table[node]
+        return table
+
+    def update_link(self, u, v, cost):
+        # Add the link u <-> v, or change its cost
+        if cost <= 0:
+            raise ValueError("link costs must be positive")
+        self._change(u, v, cost)
+
+    def remove_link(self, u, v):
+        self._change(u, v, INF)
+
+    def fail_node(self, node):
+        # The router disappears: all of its links go down, and it is no
+        # longer a destination in anyone's table (as if it were removed
+        # from the graph). Adding a link to it later brings it back.
+        i = self.lsdb.index[node]
+        for neighbor, _ in list(self.lsdb.adjacency[i]):
+            self._change(node, self.lsdb.nodes[neighbor], INF)
+        self.down.add(node)
+        self.trees.pop(node, None)
+
+    def _change(self, u, v, cost):
+        a, b = self.lsdb.index[u], self.lsdb.index[v]
+        old = self.lsdb.set_cost(a, b, cost)
+        if old == cost:
+            return
+        if cost != INF:
+            for node in (u, v):
+                if node in self.down:
+                    self.down.discard(node)
+                    if node in self.routers:
+                        self.trees[node] = SpfTree(self.lsdb, self.lsdb.index[node])
+        for tree in self.trees.values():
+            self._repair(tree, a, b, old, cost)
+
+    def _children(self, tree, x):
+        pred = tree.pred
+        return [y for y, _ in self.lsdb.adjacency[x] if pred[y] == x]
+
+    def _repair(self, tree, a, b, old, new):
+        adjacency = self.lsdb.adjacency
+        dist, pred = tree.dist, tree.pred
+
+        if new > old:
+            # Only a tree edge can lengthen anyone's path
+            if pred[b] == a:
+                root = b
+            elif pred[a] == b:
+                root = a
+            else:
+                return
+            # Cut off the subtree below the edge...
+            changed = [root]
+            for x in changed:
+                changed.extend(self._children(tree, x))
+            for x in changed:
+                dist[x] = INF
+            # ...and seed each of its nodes with the best way in from outside
+            pq = []
+            for x in changed:
+                best = INF
+                for y, cost in adjacency[x]:
+                    if dist[y] + cost < best:
+                        best = dist[y] + cost
+                if best != INF:
+                    dist[x] = best
+                    pq.append((best, x))
+            heapq.heapify(pq)
+            self._settle(pq, dist)
+        else:
+            pq = []
+            for x, y in ((a, b), (b, a)):
+                if dist[x] + new < dist[y]:
+                    dist[y] = dist[x] + new
+                    pq.append((dist[y], y))
+            changed = self._settle(pq, dist)
+
+        self._fix_paths(tree, changed, (a, b))
+
+    def _settle(self, pq, dist):
+        # Plain Dijkstra from the seeds in pq, following strict improvements
+        # only. Returns every node whose distance was lowered.
+        adjacency = self.lsdb.adjacency
+        lowered = [x for _, x in pq]
+        while pq:
+            current_cost, u = heapq.heappop(pq)
+            if current_cost > dist[u]:
+                continue
+            for v, cost in adjacency[u]:
+                new_cost = current_cost + cost
+                if new_cost < dist[v]:
+                    dist[v] = new_cost
+                    heapq.heappush(pq, (new_cost, v))
+                    lowered.append(v)
+        return lowered
+
+    def _fix_paths(self, tree, changed, endpoints):
+        # Re-pick the predecessor of every node whose distance changed, of
+        # their neighbors (which may have gained or lost a tie) and of the
+        # link's endpoints, then push new first hops down the tree.
+        adjacency = self.lsdb.adjacency
+        dist, pred, first_hop = tree.dist, tree.pred, tree.first_hop
+        source = tree.source
+
+        roots = set(changed)
+        candidates = set(changed)
+        candidates.update(endpoints)
+        for x in changed:
+            candidates.update(y for y, _ in adjacency[x])
+        candidates.discard(source)
+
+        for x in candidates:
+            best = -1
+            if dist[x] != INF:
+                for y, cost in adjacency[x]:
+                    if dist[y] + cost == dist[x] and (best < 0 or (dist[y], y) < (dist[best], best)):
+                        best = y
+            if best != pred[x]:
+                pred[x] = best
+                roots.add(x)
+
+        # A parent always has a smaller distance than its children, so
+        # handling roots closest-first means a parent's first hop is final
+        # before anything below it is looked at.
+        for root in sorted(roots, key=dist.__getitem__):
+            stack = [root]
+            while stack:
+                x = stack.pop()
+                p = pred[x]
+                hop = -1 if p < 0 else (x if p == source else first_hop[p])
+                if x != root and first_hop[x] == hop:
+                    continue
+                first_hop[x] = hop
+                stack.extend(self._children(tree, x))
+
+# --- All routers at once, on a process pool ---
+
+# Below this many routers the pool costs more to start than it saves
+PARALLEL_THRESHOLD = 500
+
+# Per-worker state, set up once by _init_worker()
+_worker = {}
+
+def _share(array):
+    import numpy as np
+    # Copy `array` into a new shared memory block
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+    return shm
+
+def _attach(name, shape, dtype):
+    import numpy as np
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype, buffer=shm.buf)
+
+def _init_worker(n, graph_blocks, out_blocks):
+    # Runs once in every worker: map the shared CSR graph and output rows,
+    # and turn the graph back into adjacency lists (the fastest thing for
+    # the pure-Python Dijkstra loop to walk).
+    arrays = []
+    for name, shape, dtype in graph_blocks + out_blocks:
+        shm, array = _attach(name, shape, dtype)
+        # Keep the mapping open for as long as the worker lives
+        _worker.setdefault('shm', []).append(shm)
+        arrays.append(array)
+    indptr, indices, costs, dist, first_hop, sources = arrays
+    _worker['lsdb'] = LinkStateGraph.from_csr(range(n), indptr, indices, costs)
+    _worker['dist'], _worker['first_hop'], _worker['sources'] = dist, first_hop, sources
+
+def _spf_rows(start, stop):
+    # Fill rows start..stop-1 of the shared output. Nothing but the two
+    # integers goes through pickle, in either direction.
+    lsdb, dist_out, hop_out = _worker['lsdb'], _worker['dist'], _worker['first_hop']
+    for row, source in enumerate(_worker['sources'][start:stop].tolist(), start):
+        dist, _, first_hop = shortest_paths(lsdb, source)
+        dist_out[row] = dist
+        hop_out[row] = first_hop
+
+def all_shortest_paths(lsdb, sources=None, workers=None):
+    """
+    Dijkstra from every router in `sources` (all of them by default),
+    spread over `workers` processes (default: one per CPU).
+
+    Returns two arrays with one row per source:
+      dist      - float64, path cost to every node (inf if unreachable)
+      first_hop - int32, index of the first hop (-1 if none)
+    Row i is exactly what shortest_paths(lsdb, sources[i]) returns.
+
+    The graph goes to the workers once, as CSR arrays in shared memory, and
+    the workers write their rows straight into shared output arrays, so no
+    task pickles the graph or a result. Each source is independent, so this
+    scales with the number of cores.
+    """
+    import numpy as np
+    n = len(lsdb)
+    sources = np.arange(n, dtype=np.int64) if sources is None else np.asarray(sources, dtype=np.int64)
+    workers = workers or os.cpu_count() or 1
+    dist = np.empty((len(sources), n), dtype=np.float64)
+    first_hop = np.empty((len(sources), n), dtype=np.int32)
+
+    if workers == 1 or len(sources) < PARALLEL_THRESHOLD:
+        for row, source in enumerate(sources.tolist()):
+            d, _, hops = shortest_paths(lsdb, source)
+            dist[row] = d
+            first_hop[row] = hops
+        return dist, first_hop
+
+    arrays = (*lsdb.to_csr(), dist, first_hop, sources)
+    blocks = [_share(array) for array in arrays]
+    try:
+        specs = [(shm.name, array.shape, array.dtype.str) for shm, array in zip(blocks, arrays)]
+        # A few chunks per worker evens out the load
+        chunk = max(1, -(-len(sources) // (workers * 4)))
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(n, specs[:3], specs[3:])) as pool:
+            for future in [pool.submit(_spf_rows, start, min(start + chunk, len(sources)))
+                           for start in range(0, len(sources), chunk)]:
+                future.result()
+        # Copy the rows out before the shared blocks go away
+        dist[...] = np.ndarray(dist.shape, dist.dtype, buffer=blocks[3].buf)
+        first_hop[...] = np.ndarray(first_hop.shape, first_hop.dtype, buffer=blocks[4].buf)
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return dist, first_hop
+
+def all_routing_tables(lsdb, workers=None):
+    # {router: routing table} for every router, computed in parallel.
+    # Same tables as calling compute_routing_table() for each router.
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(lsdb) < PARALLEL_THRESHOLD:
+        # Nothing to share out: skip the arrays (and NumPy) altogether
+        return {router: compute_routing_table(lsdb, router) for router in lsdb.nodes}
+    dist, first_hop = all_shortest_paths(lsdb, workers=workers)
+    integral = all(isinstance(cost, int) for links in lsdb.adjacency for _, cost in links)
+    tables = {}
+    for source, router in enumerate(lsdb.nodes):
+        row = dist[source].tolist()
+        if integral:
+            # The float64 array turned integer costs into floats
+            row = [d if d == INF else int(d) for d in row]
+        tables[router] = table_from_paths(lsdb, source, row, first_hop[source].tolist())
+    return tables
+
+# --- All-pairs matrices, with vectorized/sparse-matrix routines ---
+
+# Up to this many nodes (and with integer costs) the distances come from
+# Floyd-Warshall on the full n x n matrix: n^3 work, but in n numpy steps
+FLOYD_WARSHALL_MAX = 200
+
+# Working memory per block of sources. The tie-breaking step below holds a
+# few (sources x 2 * links) arrays, ~37 bytes per element.
+BLOCK_BYTES = 64 * 2**20
+
+def _floyd_warshall(n, indptr, indices, costs):
+    import numpy as np
+    dist = np.full((n, n), INF)
+    dist[np.repeat(np.arange(n), np.diff(indptr)), indices] = costs
+    np.fill_diagonal(dist, 0)
+    for k in range(n):
+        np.minimum(dist, dist[:, k, None] + dist[None, k, :], out=dist)
+    return dist
+
+def _sparse_distances(n, indptr, indices, costs):
+    import numpy as np
+    # Returns f(sources) -> dist rows, using scipy.sparse.csgraph when it
+    # is installed. (The CSR arrays already list every link both ways, so
+    # the matrix is treated as directed.)
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+    except ImportError:
+        return None
+    matrix = csr_matrix((costs.astype(np.float64), indices, indptr), shape=(n, n))
+    return lambda sources: csgraph_dijkstra(matrix, directed=True, indices=sources)
+
+def _paths_from_distances(dist, sources, indptr, indices, costs):
+    """
+    pred/first_hop rows for the given dist rows, chosen exactly like
+    shortest_paths() does: a node's predecessor is, among the neighbors u
+    with dist[u] + cost(u, v) == dist[v], the one with the smallest dist[u]
+    (then the lowest index), and its first hop is its predecessor's (itself
+    when the predecessor is the source).
+    """
+    import numpy as np
+    rows, n = dist.shape
+    degree = np.diff(indptr)
+    linked = np.flatnonzero(degree)
+    heads = np.repeat(np.arange(n), degree)
+
+    # Predecessor: over CSR row v (v's links), the tight neighbors closest
+    # to the source, and of those the smallest. reduceat takes the min per
+    # row segment; the closest distance is spread back over the segment's
+    # links to pick out the neighbors that reach it.
+    pred = np.full((rows, n), -1, dtype=np.int32)
+    if len(linked):
+        near = dist[:, indices]
+        tight = near + costs == dist[:, heads]
+        near = np.where(tight, near, INF)
+        closest = np.minimum.reduceat(near, indptr[linked], axis=1)
+        segment = np.repeat(np.arange(len(linked)), degree[linked])
+        candidate = np.where(tight & (near == closest[:, segment]), indices, n).astype(np.int32)
+        best = np.minimum.reduceat(candidate, indptr[linked], axis=1)
+        pred[:, linked] = np.where(best == n, -1, best)
+    # inf + cost == inf is "tight" too; unreachable nodes have no path
+    pred[~np.isfinite(dist)] = -1
+
+    # First hop by pointer jumping: nodes right behind the source point to
+    # themselves, every other node to its predecessor. Following the
+    # pointers twice as far each round reaches the roots in log(depth)
+    # rounds, instead of walking every path back one node at a time.
+    own = np.broadcast_to(np.arange(n, dtype=np.int32), (rows, n))
+    hop = np.where((pred == np.asarray(sources)[:, None]) | (pred < 0), own, pred)
+    while True:
+        jumped = np.take_along_axis(hop, hop, axis=1)
+        if np.array_equal(jumped, hop):
+            break
+        hop = jumped
+    hop[pred < 0] = -1
+    return pred, hop
+
+def iter_all_pairs(lsdb, sources=None, block=None):
+    """
+    All-pairs shortest paths in blocks of sources, so memory stays bounded
+    on large graphs: yields (sources, dist, pred, first_hop) with one row
+    per source in the block. `block` is the number of sources per block
+    (default: as many as fit in BLOCK_BYTES).
+
+    Distances come from Floyd-Warshall on small integer-cost graphs, from
+    scipy.sparse.csgraph.dijkstra otherwise, and from shortest_paths()
+    when SciPy is not installed. Predecessors and first hops are then
+    derived from the distances with array operations (see
+    _paths_from_distances), with the same tie-breaking as shortest_paths().
+    """
+    import numpy as np
+    n = len(lsdb)
+    sources = np.arange(n, dtype=np.int64) if sources is None else np.asarray(sources, dtype=np.int64)
+    indptr, indices, costs = lsdb.to_csr()
+    if block is None:
+        block = max(1, BLOCK_BYTES // (21 * max(len(indices), n)))
+
+    if n <= FLOYD_WARSHALL_MAX and costs.dtype.kind == 'i':
+        full = _floyd_warshall(n, indptr, indices, costs)
+        distances = lambda chunk: full[chunk]
+    else:
+        distances = _sparse_distances(n, indptr, indices, costs)
+        if distances is None:
+            distances = lambda chunk: all_shortest_paths(lsdb, chunk)[0]
+
+    for start in range(0, len(sources), block):
+        chunk = sources[start:start + block]
+        dist = distances(chunk)
+        yield (chunk, dist, *_paths_from_distances(dist, chunk, indptr, indices, costs))
+
+def all_pairs(lsdb, block=None):
+    """
+    Full distance, predecessor and first-hop matrices, for offline planning:
+      dist[s, d]      - float64 path cost (inf if unreachable)
+      pred[s, d]      - int32 node before d on the path from s (-1 if none)
+      first_hop[s, d] - int32 next hop from s towards d (-1 if none)
+    Row s is exactly shortest_paths(lsdb, s), so the next hops are the ones
+    in every router's routing table.
+    """
+    import numpy as np
+    n = len(lsdb)
+    dist = np.empty((n, n), dtype=np.float64)
+    pred = np.empty((n, n), dtype=np.int32)
+    first_hop = np.empty((n, n), dtype=np.int32)
+    for sources, d, p, hop in iter_all_pairs(lsdb, block=block):
+        dist[sources], pred[sources], first_hop[sources] = d, p, hop
+    return dist, pred, first_hop
+
+# --- Dict-based API used by the original lab code ---
+
+def dijkstra(graph, start_node):
+    lsdb = LinkStateGraph(graph)
+    dist, pred, _ = shortest_paths(lsdb, lsdb.index[start_node])
+    nodes = lsdb.nodes
+    distances = {node: dist[i] for i, node in enumerate(nodes)}
+    previous_nodes = {node: nodes[pred[i]] if pred[i] >= 0 else None for i, node in enumerate(nodes)}
+    return distances, previous_nodes
+
+def get_routing_table(start_node, distances, previous_nodes):
+    # Same result as tracing every destination back to the start node, but
+    # each node's first hop is remembered, so no path is walked twice.
+    first_hops = {}
+
+    def first_hop_of(node):
+        path = []
+        while node not in first_hops:
+            parent = previous_nodes[node]
+            if parent == start_node:
+                first_hops[node] = node
+                break
+            path.append(node)
+            node = parent
+        hop = first_hops[node]
+        for visited in path:
+            first_hops[visited] = hop
+        return hop
+
+    table = {}
+    for dest in previous_nodes:
+        if dest == start_node:
+            table[dest] = {'next_hop': '-', 'cost': 0}
+        elif distances[dest] == INF:
+            table[dest] = {'next_hop': '-', 'cost': 'inf'}
+        else:
+            table[dest] = {'next_hop': first_hop_of(dest), 'cost': distances[dest]}
+    return table
+
+# --- Test Case ---
+if __name__ == "__main__":
+    import random
+    import networkx as nx
+
+    print("--- Testing equal-cost ties on the lab topologies ---")
+    import isis
+    import ospf
+    # Same next hops as the original per-protocol Dijkstra (and the lab
+    # screenshots): A reaches D and E via C, R5 reaches R1 and R3 via R3
+    table = compute_routing_table(LinkStateGraph(ospf.create_topology()), 'A')
+    assert table['D'] == {'next_hop': 'C', 'cost': 6} and table['E'] == {'next_hop': 'C', 'cost': 9}
+    table = compute_routing_table(LinkStateGraph(isis.create_topology()), 'R5')
+    assert table['R1'] == {'next_hop': 'R3', 'cost': 20} and table['R3'] == {'next_hop': 'R3', 'cost': 10}
+    print("Tie-break Test: PASSED")
+
+    print("\n--- Testing IncrementalSpf against full recomputation ---")
+
+    rng = random.Random(7)
+    G = nx.connected_watts_strogatz_graph(60, 4, 0.2, seed=7)
+    for u, v in G.edges():
+        # Small costs so there are plenty of equal-cost ties
+        G.edges[u, v]['cost'] = rng.randint(1, 4)
+    spf = IncrementalSpf(G)
+    failed = []
+
+    for step in range(300):
+        action = rng.random()
+        nodes = list(G.nodes())
+        if action < 0.4 and G.number_of_edges():
+            u, v = rng.choice(list(G.edges()))
+            cost = rng.randint(1, 6)
+            G.edges[u, v]['cost'] = cost
+            spf.update_link(u, v, cost)
+        elif action < 0.7 and G.number_of_edges():
+            u, v = rng.choice(list(G.edges()))
+            G.remove_edge(u, v)
+            spf.remove_link(u, v)
+        elif action < 0.97:
+            # Sometimes the new link brings a failed router back
+            u, v = rng.sample(nodes + [n for n in failed[-1:] if n not in G], 2)
+            cost = rng.randint(1, 6)
+            G.add_edge(u, v, cost=cost)
+            spf.update_link(u, v, cost)
+        else:
+            node = rng.choice(nodes)
+            G.remove_node(node)
+            spf.fail_node(node)
+            failed.append(node)
+
+        lsdb = LinkStateGraph(G)
+        for router in G.nodes():
+            assert spf.routing_table(router) == compute_routing_table(lsdb, router), (step, router)
+
+    print(f"300 random link changes/failures, {G.number_of_nodes()} routers: tables match")
+    print("IncrementalSpf Test: PASSED")
+
+    # The all-pairs matrices need NumPy (pip install numpy)
+    import importlib.util
+    if importlib.util.find_spec('numpy') is not None:
+        print("\n--- Testing all_pairs against per-router Dijkstra ---")
+        # One small graph (Floyd-Warshall) and one over FLOYD_WARSHALL_MAX
+        # (sparse Dijkstra), each with an unreachable part, in uneven blocks
+        for n in (80, 300):
+            G = nx.connected_watts_strogatz_graph(n, 4, 0.2, seed=n)
+            G.add_edge(n, n + 1)
+            for u, v in G.edges():
+                G.edges[u, v]['cost'] = rng.randint(1, 4)
+            lsdb = LinkStateGraph(G)
+            dist, pred, first_hop = all_pairs(lsdb, block=37)
+            for source, router in enumerate(lsdb.nodes):
+                d, p, hops = shortest_paths(lsdb, source)
+                assert dist[source].tolist() == d and pred[source].tolist() == p and first_hop[source].tolist() == hops
+                table = get_routing_table(router, *dijkstra(G, router))
+                assert all(table[dest]['next_hop'] == (lsdb.nodes[first_hop[source, i]] if first_hop[source, i] >= 0 else '-')
+                           for i, dest in enumerate(lsdb.nodes))
+            print(f"{n + 2} routers: distance, predecessor and next-hop matrices match")
+        print("all_pairs Test: PASSED")
+
+    print("\n--- Testing ECMP next-hop sets ---")
+    G = nx.connected_watts_strogatz_graph(80, 4, 0.2, seed=3)
+    for u, v in G.edges():
+        G.edges[u, v]['cost'] = rng.randint(1, 3)
+    lsdb = LinkStateGraph(G)
+    cost = dict(nx.all_pairs_dijkstra_path_length(G, weight='cost'))
+    forwarder = EcmpForwarder(G)
+    for router in G.nodes():
+        table = ecmp_routing_table(lsdb, router)
+        single = compute_routing_table(lsdb, router)
+        for dest in G.nodes():
+            # Every neighbor that starts a shortest path, and nothing else
+            expected = sorted(n for n in G[router] if G.edges[router, n]['cost'] + cost[n][dest] == cost[router][dest])
+            assert table[dest]['next_hops'] == (expected if dest != router else [])
+            assert dest == router or single[dest]['next_hop'] in expected
+            path = forwarder.path(router, dest, ("10.0.0.1", "10.0.0.2", 6, router, 80))
+            assert sum(G.edges[a, b]['cost'] for a, b in zip(path, path[1:])) == cost[router][dest]
+    print("Next-hop sets hold exactly the equal-cost first hops; forwarded paths are shortest")
+    print("ECMP Test: PASSED")
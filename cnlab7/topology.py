@@ -0,0 +1,203 @@
+# topology.py
+# Seeded synthetic topologies for running the cnlab7 protocols on more than
+# the hand-drawn 4-6 node lab graphs. The same arguments always give the
+# same graph.
+#
+# Router-level generators (waxman, barabasi_albert, fat_tree, grid) return a
+# connected nx.Graph with string node names and an integer 'cost' on every
+# link, so the result can go straight into rip_sim.build_routers,
+# spf.LinkStateGraph or bgp.BgpNetwork. AS-level graphs (caida_as_graph,
+# read_as_rel) carry the 'provider' relationship that bgp.py uses for
+# Gao-Rexford policies.
+import random
+
+import networkx as nx
+import numpy as np
+
+def _add_costs(G, seed, max_cost=20):
+    # Random integer link costs, like an IGP with some metric tuning
+    rng = random.Random(seed)
+    for u, v in G.edges():
+        G.edges[u, v]['cost'] = rng.randint(1, max_cost)
+    return G
+
+def waxman(n, degree=4, alpha=0.1, seed=1):
+    """
+    Waxman random geometric graph: routers are scattered over a unit square
+    and two of them are linked with probability beta * exp(-d / (alpha * L)),
+    where d is their distance and L the largest possible one. beta is chosen
+    so the average degree comes out at about `degree`. Link costs follow
+    the distance (1..100), and components left isolated are joined to
+    their nearest router in the rest of the graph.
+    """
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 2))
+    scale = alpha * np.sqrt(2)
+    block = max(1, 2_000_000 // n)
+
+    def weights(start):
+        # exp(-d / (alpha * L)) for rows start..start+block against the
+        # columns from `start` on; pairs are counted once (column > row)
+        x, y = pos[start:, 0], pos[start:, 1]
+        d = np.hypot(x[:block, None] - x[None, :], y[:block, None] - y[None, :])
+        w = np.exp(-d / scale)
+        w[np.tril_indices(len(d), m=d.shape[1])] = 0
+        return d, w
+
+    # Two passes over the pairs so the n x n matrix is never held at once:
+    # the total weight sets beta, then the links are drawn
+    total = sum(weights(start)[1].sum() for start in range(0, n, block))
+    beta = min(1.0, degree * n / 2 / total) if total else 0.0
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    for start in range(0, n, block):
+        d, w = weights(start)
+        rows, cols = np.nonzero(rng.random(w.shape) < beta * w)
+        for i, j, dist in zip((rows + start).tolist(), (cols + start).tolist(), d[rows, cols].tolist()):
+            G.add_edge(i, j, cost=max(1, round(dist * 100)))
+
+    # Join every smaller component to its nearest router outside it
+    components = sorted(nx.connected_components(G), key=len, reverse=True)
+    joined = list(components[0])
+    for component in components[1:]:
+        inside = list(component)
+        d = np.sqrt(((pos[inside, None, :] - pos[None, joined, :]) ** 2).sum(axis=2))
+        i, j = np.unravel_index(d.argmin(), d.shape)
+        G.add_edge(inside[i], joined[j], cost=max(1, round(float(d[i, j]) * 100)))
+        joined.extend(inside)
+
+    for node in G.nodes():
+        G.nodes[node]['pos'] = tuple(pos[node].tolist())
+    return nx.relabel_nodes(G, {node: f"R{node}" for node in G.nodes()})
+
+def barabasi_albert(n, m=2, seed=1):
+    # Preferential attachment: a few big hubs and a long tail of small
+    # routers, the shape of the Internet's degree distribution
+    G = nx.barabasi_albert_graph(n, m, seed=seed)
+    G = nx.relabel_nodes(G, {node: f"R{node}" for node in G.nodes()})
+    return _add_costs(G, seed)
+
+def grid(rows, cols, seed=1):
+    # rows x cols mesh; long paths and many equal-hop alternatives
+    G = nx.grid_2d_graph(rows, cols)
+    G = nx.relabel_nodes(G, {(r, c): f"R{r}_{c}" for r, c in G.nodes()})
+    return _add_costs(G, seed)
+
+def fat_tree(k, hosts=False):
+    """
+    k-ary fat-tree data-center fabric (k even): (k/2)^2 core switches and k
+    pods of k/2 aggregation + k/2 edge switches, every link cost 1. Each
+    aggregation switch connects to k/2 core switches, so there are many
+    equal-cost paths between pods. With hosts=True every edge switch also
+    gets k/2 hosts. Nodes carry a 'layer' attribute.
+    """
+    if k % 2:
+        raise ValueError("fat_tree needs an even k")
+    half = k // 2
+    G = nx.Graph()
+    for c in range(half * half):
+        G.add_node(f"core{c}", layer='core')
+    for p in range(k):
+        for a in range(half):
+            agg = f"agg{p}_{a}"
+            G.add_node(agg, layer='aggregation')
+            # Aggregation switch a of every pod uses core switches a*k/2 ..
+            for c in range(a * half, (a + 1) * half):
+                G.add_edge(agg, f"core{c}", cost=1)
+        for e in range(half):
+            edge = f"edge{p}_{e}"
+            G.add_node(edge, layer='edge')
+            for a in range(half):
+                G.add_edge(edge, f"agg{p}_{a}", cost=1)
+            if hosts:
+                for h in range(half):
+                    G.add_node(f"host{p}_{e}_{h}", layer='host')
+                    G.add_edge(edge, f"host{p}_{e}_{h}", cost=1)
+    return G
+
+def caida_as_graph(n, tier1=8, multihoming=0.5, peering=0.1, seed=1):
+    """
+    AS graph with business relationships, shaped like the CAIDA AS
+    relationship data: a clique of tier-1 peers, then every new AS buys
+    transit from one or two existing ASes (picked by how many customers
+    they already have) and sometimes peers with one. The 'provider' edge
+    attribute is the provider AS, or None on peering links.
+    """
+    rng = random.Random(seed)
+    names = [f"AS{i}" for i in range(n)]
+    G = nx.Graph()
+    for i in range(tier1):
+        for j in range(i):
+            G.add_edge(names[i], names[j], provider=None, cost=1)
+    # Every AS appears once, plus once per customer
+    targets = names[:tier1]
+    for i in range(tier1, n):
+        name = names[i]
+        providers = sorted({rng.choice(targets) for _ in range(2 if rng.random() < multihoming else 1)})
+        for provider in providers:
+            G.add_edge(name, provider, provider=provider, cost=1)
+            targets.append(provider)
+        targets.append(name)
+        if rng.random() < peering:
+            peer = names[rng.randrange(tier1, i)] if i > tier1 else names[0]
+            if not G.has_edge(name, peer):
+                G.add_edge(name, peer, provider=None, cost=1)
+    return G
+
+def read_as_rel(path, limit=None):
+    """
+    Read a CAIDA AS relationship file ("serial-1"/"serial-2" as-rel format):
+    one "<as1>|<as2>|<rel>[|<source>]" line per link, '#' comment lines,
+    rel -1 meaning as1 is a provider of as2 and 0 meaning peers. Returns
+    the same kind of graph as caida_as_graph. `limit` stops after that many
+    links, for trying things out on part of the data.
+    """
+    G = nx.Graph()
+    with open(path) as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            a, b, rel = line.strip().split('|')[:3]
+            a, b = f"AS{a}", f"AS{b}"
+            if rel == '-1':
+                G.add_edge(a, b, provider=a, cost=1)
+            elif rel == '0':
+                G.add_edge(a, b, provider=None, cost=1)
+            else:
+                raise ValueError(f"unknown relationship {rel!r} in line {line.strip()!r}")
+            if limit is not None and G.number_of_edges() >= limit:
+                break
+    return G
+
+# Generators by name, each taking a target node count, for the benchmark
+# suite. (A fat-tree with k pods has 5k^2/4 switches, so k is picked to
+# come close to n.)
+GENERATORS = {
+    'waxman': lambda n, seed=1: waxman(n, seed=seed),
+    'barabasi-albert': lambda n, seed=1: barabasi_albert(n, seed=seed),
+    'grid': lambda n, seed=1: grid(max(1, round(n ** 0.5)), max(1, round(n ** 0.5)), seed=seed),
+    'fat-tree': lambda n, seed=1: fat_tree(max(2, 2 * round((0.8 * n) ** 0.5 / 2))),
+    'caida': lambda n, seed=1: caida_as_graph(n, seed=seed),
+}
+
+if __name__ == "__main__":
+    print("--- Synthetic topologies ---")
+    print(f"{'Generator':<16} | {'Nodes':>6} | {'Links':>6} | {'Avg degree':>10} | {'Max degree':>10}")
+    print("-" * 60)
+    for name, generate in GENERATORS.items():
+        G = generate(1_000)
+        degrees = [d for _, d in G.degree()]
+        print(f"{name:<16} | {G.number_of_nodes():>6} | {G.number_of_edges():>6} | "
+              f"{sum(degrees) / len(degrees):>10.2f} | {max(degrees):>10}")
+        assert nx.is_connected(G)
+        assert all('cost' in data for _, _, data in G.edges(data=True))
+
+    # Same seed, same graph
+    assert nx.utils.graphs_equal(waxman(300, seed=7), waxman(300, seed=7))
+    assert nx.utils.graphs_equal(caida_as_graph(300, seed=7), caida_as_graph(300, seed=7))
+
+    # k-ary fat-tree: 5k^2/4 switches, k^3/4 hosts
+    G = fat_tree(4, hosts=True)
+    assert sum(1 for _, layer in G.nodes(data='layer') if layer != 'host') == 20
+    assert sum(1 for _, layer in G.nodes(data='layer') if layer == 'host') == 16
+    print("\nAll topology checks passed.")
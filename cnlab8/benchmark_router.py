@@ -0,0 +1,300 @@
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from ip_utils import ip_to_int, int_to_ip, ipv6_to_int, int_to_ipv6, parse_cidr
+from router import Router
+from dir24_8 import Dir248Table
+
+# Rough shape of a real BGP table: most prefixes are /24, then /22-/23,
+# with a long tail of shorter ones.
+PREFIX_LENGTHS = [24] * 60 + [23] * 8 + [22] * 10 + [21] * 4 + [20] * 5 + [19] * 4 + [16] * 5 + [8] * 1 + [28] * 3
+
+
+def random_routes(count: int, links: int = 16, seed: int = 1) -> list:
+    # Build `count` random (cidr, link) routes
+    rng = random.Random(seed)
+    routes = []
+    for _ in range(count):
+        length = rng.choice(PREFIX_LENGTHS)
+        network = rng.getrandbits(32) & ((0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF)
+        routes.append((f"{int_to_ip(network)}/{length}", f"Link {rng.randrange(links)}"))
+    return routes
+
+# Rough shape of today's IPv6 table: mostly /48 customer blocks,
+# plus /32-/44 provider allocations and a few longer prefixes.
+PREFIX_LENGTHS_V6 = [48] * 50 + [32] * 10 + [44] * 10 + [40] * 8 + [36] * 5 + [29] * 5 + [56] * 7 + [64] * 5
+
+
+def random_routes_v6(count: int, links: int = 16, seed: int = 1) -> list:
+    # Build `count` random (cidr, link) routes inside 2000::/3 (global unicast)
+    rng = random.Random(seed)
+    routes = []
+    for _ in range(count):
+        length = rng.choice(PREFIX_LENGTHS_V6)
+        network = (0x2 << 124 | rng.getrandbits(125)) & (((1 << length) - 1) << (128 - length))
+        routes.append((f"{int_to_ipv6(network)}/{length}", f"Link {rng.randrange(links)}"))
+    return routes
+
+
+def random_destinations(routes: list, count: int, seed: int = 2) -> list:
+    # Half the destinations fall inside a known prefix, half are random
+    rng = random.Random(seed)
+    dests = []
+    for _ in range(count):
+        cidr = rng.choice(routes)[0]
+        network, _, length, version = parse_cidr(cidr)
+        width, to_text = (128, int_to_ipv6) if version == 6 else (32, int_to_ip)
+        if rng.random() < 0.5:
+            dests.append(to_text(network | rng.getrandbits(width - length)))
+        else:
+            dests.append(to_text(rng.getrandbits(width)))
+    return dests
+
+
+def time_lookups(route, dests: list) -> float:
+    # Returns the average time per call of route(dest) in microseconds
+    start = time.perf_counter()
+    for dest in dests:
+        route(dest)
+    return (time.perf_counter() - start) / len(dests) * 1e6
+
+
+def _traced_bytes(route, dests: list) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    total = 0
+    for dest in dests:
+        route(dest)
+        current, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+        tracemalloc.reset_peak()
+    tracemalloc.stop()
+    return total
+
+
+def allocated_per_lookup(route, dests: list) -> float:
+    # Total bytes allocated while routing, divided by the number of lookups.
+    # tracemalloc counts every temporary object, even ones freed right away.
+    # The measuring loop allocates ~80 B per call by itself; that is
+    # subtracted so only the lookup's own allocations are left.
+    overhead = _traced_bytes(lambda dest: None, dests)
+    return max(_traced_bytes(route, dests) - overhead, 0) / len(dests)
+
+
+def compare_backends(table_size: int, lookups: int, backends=("linear", "int", "trie", "dir24_8")):
+    print(f"\n--- {table_size} routes, {lookups} lookups ---")
+    routes = random_routes(table_size)
+    dests = random_destinations(routes, lookups)
+    dest_ints = [ip_to_int(dest) for dest in dests]
+
+    results = {}
+    costs = {}
+    for backend in backends:
+        start = time.perf_counter()
+        router = Router(routes, backend=backend, verbose=False)
+        build = time.perf_counter() - start
+
+        results[backend] = [router.route_packet(dest) for dest in dests]
+        # Dotted-quad input (route_packet) and pre-parsed integer input (route_address)
+        str_time = time_lookups(router.route_packet, dests)
+        str_alloc = allocated_per_lookup(router.route_packet, dests[:1000])
+        int_time = time_lookups(router.route_address, dest_ints)
+        int_alloc = allocated_per_lookup(router.route_address, dest_ints[:1000])
+        print(f"  {backend:<8} | build {build:7.3f} s "
+              f"| str: {str_time:9.2f} us/lookup {str_alloc:6.0f} B/lookup "
+              f"| int: {int_time:9.2f} us/lookup {int_alloc:6.0f} B/lookup")
+        costs[backend] = (int_time, int_alloc)
+
+    # Every backend must give the same answers
+    reference = results[backends[0]]
+    for backend in backends[1:]:
+        assert results[backend] == reference, f"{backend} disagrees with {backends[0]}"
+
+    # Integer lookups against the original linear string matcher
+    if "linear" in costs:
+        base_time, base_alloc = costs["linear"]
+        for backend in backends:
+            if backend != "linear":
+                time_cut, alloc_cut = base_time / costs[backend][0], base_alloc / max(costs[backend][1], 1)
+                print(f"  {backend:<8} vs linear: {time_cut:6.1f}x less time, {alloc_cut:5.1f}x less allocation per lookup")
+
+
+def compare_batch(table_size: int, lookups: int):
+    # route_many() on a NumPy array vs. calling the trie once per address
+    print(f"\n--- Batch routing: {table_size} routes, {lookups} destinations ---")
+    routes = random_routes(table_size)
+    router = Router(routes, backend="trie", verbose=False)
+    flat_router = Router(routes, backend="dir24_8", verbose=False)
+    rng = np.random.default_rng(3)
+    dest_ints = rng.integers(0, 2**32, size=lookups, dtype=np.uint32)
+    # Half of them inside known prefixes, as in random_destinations()
+    sample = random_destinations(routes, lookups // 2)
+    dest_ints[:len(sample)] = [ip_to_int(dest) for dest in sample]
+
+    # The first call builds the per-length tables; don't count that
+    router.route_many(dest_ints[:1])
+    start = time.perf_counter()
+    link_ids = router.route_many(dest_ints)
+    batch = time.perf_counter() - start
+
+    scalar_dests = dest_ints[:min(lookups, 100_000)].tolist()
+    start = time.perf_counter()
+    scalar_links = [router.route_address(dest) for dest in scalar_dests]
+    scalar = (time.perf_counter() - start) / len(scalar_dests) * lookups
+
+    start = time.perf_counter()
+    flat_ids = flat_router.route_many(dest_ints)
+    flat = time.perf_counter() - start
+
+    assert [router.links[i] for i in link_ids[:len(scalar_dests)]] == scalar_links
+    assert [flat_router.links[i] for i in flat_ids[:len(scalar_dests)]] == scalar_links
+    print(f"  route_many      | {batch:7.3f} s | {lookups / batch / 1e6:6.2f} M lookups/s")
+    print(f"  dir24_8 batch   | {flat:7.3f} s | {lookups / flat / 1e6:6.2f} M lookups/s")
+    print(f"  route_address   | {scalar:7.3f} s | {lookups / scalar / 1e6:6.2f} M lookups/s (extrapolated)")
+
+
+def compare_table_loading(table_size: int):
+    # Starting a DIR-24-8 Router from routes vs. from a table saved earlier
+    print(f"\n--- DIR-24-8 persistence: {table_size} routes ---")
+    routes = random_routes(table_size)
+    dests = random_destinations(routes, 10_000)
+
+    start = time.perf_counter()
+    router = Router(routes, backend="dir24_8", verbose=False)
+    build = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        router.table.save(tmp)
+        start = time.perf_counter()
+        restarted = Router(table=Dir248Table.load(tmp), backend="dir24_8", verbose=False)
+        load = time.perf_counter() - start
+        assert [restarted.route_packet(dest) for dest in dests] == [router.route_packet(dest) for dest in dests]
+        assert (restarted.route_many(dests) == router.route_many(dests)).all()
+        del restarted
+
+    table = router.table
+    size = (table.tbl24.nbytes + table.tbllong.nbytes) / 2**20
+    print(f"  build {build:7.3f} s | mmap load {load * 1000:7.2f} ms | {size:.1f} MiB on disk")
+
+
+def churn_benchmark(table_size: int, updates: int, backend: str):
+    # Replay a stream of announcements/withdrawals while another thread
+    # keeps routing packets through the same Router.
+    print(f"\n--- Route churn: {backend}, {table_size} routes, {updates} updates ---")
+    routes = random_routes(table_size)
+    start = time.perf_counter()
+    router = Router(routes, backend=backend, verbose=False)
+    rebuild = time.perf_counter() - start
+    dest_ints = [ip_to_int(dest) for dest in random_destinations(routes, 10_000)]
+
+    rng = random.Random(4)
+    installed = [cidr for cidr, _ in routes]
+    new_routes = random_routes(updates, seed=5)
+
+    stop = threading.Event()
+    lookups = [0]
+
+    def lookup_loop():
+        route = router.route_address
+        while not stop.is_set():
+            for dest in dest_ints:
+                route(dest)
+            lookups[0] += len(dest_ints)
+
+    reader = threading.Thread(target=lookup_loop)
+    reader.start()
+    start = time.perf_counter()
+    for i in range(updates):
+        if i % 2:
+            router.withdraw_route(installed.pop(rng.randrange(len(installed))))
+        else:
+            cidr, link = new_routes[i]
+            router.add_route(cidr, link)
+            installed.append(cidr)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    reader.join()
+
+    # The updated router must route exactly like one built from scratch
+    final_routes = [(f"{int_to_ip(network)}/{prefix_len}", link) for (network, prefix_len), link in router.prefixes.items()]
+    fresh = Router(final_routes, backend=backend, verbose=False)
+    assert [router.route_address(dest) for dest in dest_ints] == [fresh.route_address(dest) for dest in dest_ints]
+
+    print(f"  {updates / elapsed:10.0f} updates/s ({elapsed / updates * 1e6:.1f} us each) "
+          f"| rebuilding instead: {rebuild:.3f} s each "
+          f"| {lookups[0] / elapsed:10.0f} lookups/s alongside")
+
+
+def zipf_cache_benchmark(table_size: int, packets: int, backend: str, cache_sizes=(0, 256, 4096, 65536)):
+    # Route a Zipf-distributed packet stream (a few destinations get most of
+    # the traffic) with and without the LRU route cache.
+    print(f"\n--- Route cache: {backend}, {table_size} routes, {packets} Zipf packets ---")
+    routes = random_routes(table_size)
+    population = random_destinations(routes, 200_000)
+    rng = np.random.default_rng(6)
+    ranks = rng.zipf(1.2, size=packets)
+    stream = [population[(rank - 1) % len(population)] for rank in ranks]
+
+    baseline = None
+    for cache_size in cache_sizes:
+        router = Router(routes, backend=backend, verbose=False, cache_size=cache_size)
+        start = time.perf_counter()
+        for dest in stream:
+            router.route_packet(dest)
+        rate = packets / (time.perf_counter() - start)
+        baseline = baseline or rate
+        stats = router.cache_stats()
+        print(f"  cache {cache_size:>6} | {rate:10.0f} packets/s ({rate / baseline:5.1f}x) "
+              f"| hit rate {stats['hit_rate']:6.1%} | evictions {stats['evictions']}")
+
+
+def ipv6_benchmark(table_sizes=(10_000, 100_000, 200_000), lookups: int = 50_000):
+    # IPv6 lookups go through a 128-bit path-compressed trie. Its depth
+    # depends on how many prefixes branch, not on the 128 address bits, so
+    # the cost should stay close to the IPv4 trie.
+    for table_size in table_sizes:
+        print(f"\n--- IPv6: {table_size} routes (+ {table_size // 4} IPv4), {lookups} lookups ---")
+        routes6 = random_routes_v6(table_size)
+        routes4 = random_routes(table_size // 4)
+        start = time.perf_counter()
+        router = Router(routes4 + routes6, backend="trie", verbose=False)
+        build = time.perf_counter() - start
+
+        dests6 = random_destinations(routes6, lookups)
+        dest_ints = [ipv6_to_int(dest) for dest in dests6]
+        v6_str = time_lookups(router.route_packet, dests6)
+        v6_int = time_lookups(lambda dest: router.route_address(dest, 6), dest_ints)
+        v4_str = time_lookups(router.route_packet, random_destinations(routes4, lookups))
+        print(f"  build {build:6.2f} s | v6 str {v6_str:6.2f} us/lookup | v6 int {v6_int:6.2f} us/lookup "
+              f"| v4 str {v4_str:6.2f} us/lookup")
+
+        # Spot-check against a straight longest-match scan over the v6 prefixes
+        by_length = sorted(router.prefixes6.items(), key=lambda item: -item[0][1])
+        for dest in dest_ints[:200]:
+            expected = "Default Gateway"
+            for (network, length), link in by_length:
+                if dest >> (128 - length) == network >> (128 - length):
+                    expected = link
+                    break
+            assert router.route_address(dest, 6) == expected
+
+
+if __name__ == "__main__":
+    print("--- Router lookup benchmark ---")
+    compare_backends(1_000, 20_000)
+    compare_backends(10_000, 2_000)
+    # The linear matchers are far too slow for a full table, so only time the trie
+    compare_backends(200_000, 100_000, backends=("trie", "dir24_8"))
+    compare_batch(200_000, 5_000_000)
+    compare_table_loading(200_000)
+    for backend in ("int", "trie", "dir24_8"):
+        churn_benchmark(20_000, 2_000, backend)
+    zipf_cache_benchmark(2_000, 100_000, "int")
+    zipf_cache_benchmark(200_000, 500_000, "trie")
+    ipv6_benchmark()
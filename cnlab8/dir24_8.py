@@ -0,0 +1,268 @@
+import json
+import os
+
+import numpy as np
+
+from ip_utils import ip_to_int, cidr_to_int
+
+# Every entry is a 16-bit integer.
+# If the top bit is clear, the low 15 bits are an index into `links`.
+# If the top bit is set, the low 15 bits are the number of a 256-entry
+# block in `tbllong` that holds the answer for the last 8 address bits.
+POINTER = 0x8000
+MAX_INDEX = 0x7FFF
+
+
+class Dir248Table:
+    """
+    DIR-24-8 forwarding table (Gupta, Lin & McKeown).
+
+    tbl24 has one entry for every possible /24 (2^24 entries, 32 MB), so any
+    prefix of length 24 or less is answered with a single array read. Longer
+    prefixes get a 256-entry block in tbllong, so they need a second read.
+
+    Lookups return an index into self.links; index 0 is the default route.
+
+    Next to every entry we also keep the length of the prefix that owns it
+    (len24 / lenlong). That is what lets insert() and remove() update just
+    the affected range instead of rebuilding all 2^24 entries.
+    """
+
+    def __init__(self, routes: list = None):
+        self.links = ["Default Gateway"]
+        self._link_index = {"Default Gateway": 0}
+        # (network, prefix_len) -> link id of every installed prefix
+        self.prefixes = {}
+        self.tbl24 = np.zeros(1 << 24, dtype=np.uint16)
+        self.len24 = np.zeros(1 << 24, dtype=np.uint8)
+        self.tbllong = np.zeros(0, dtype=np.uint16)
+        self.lenlong = np.zeros(0, dtype=np.uint8)
+        # Number of 256-entry blocks of tbllong in use
+        self.blocks = 0
+        if routes:
+            self._build(routes)
+
+    def link_id(self, link) -> int:
+        # Index of `link` in self.links, adding it if it is new
+        if link not in self._link_index:
+            if len(self.links) > MAX_INDEX:
+                raise ValueError(f"DIR-24-8 table supports at most {MAX_INDEX} links")
+            self._link_index[link] = len(self.links)
+            self.links.append(link)
+        return self._link_index[link]
+
+    def _build(self, routes: list):
+        # (network, prefix_len) -> link id; setdefault keeps the first of two
+        # identical prefixes, like the sorted linear table in Router.
+        for cidr, link in routes:
+            network, _, prefix_len = cidr_to_int(cidr)
+            self.prefixes.setdefault((network, prefix_len), self.link_id(link))
+
+        # Every /24 that contains a longer prefix needs its own block
+        long_slots = {network >> 8 for network, prefix_len in self.prefixes if prefix_len > 24}
+        self._reserve_blocks(len(long_slots))
+
+        # Shortest prefixes first, so a longer prefix simply overwrites the
+        # range of a shorter one that covers it.
+        for (network, prefix_len), link_id in sorted(self.prefixes.items(), key=lambda item: item[0][1]):
+            if prefix_len <= 24:
+                start = network >> 8
+                end = start + (1 << (24 - prefix_len))
+                self.tbl24[start:end] = link_id
+                self.len24[start:end] = prefix_len
+                continue
+
+            block = self._block_for(network >> 8)
+            start = (block << 8) | (network & 0xFF)
+            end = start + (1 << (32 - prefix_len))
+            self.tbllong[start:end] = link_id
+            self.lenlong[start:end] = prefix_len
+
+    def _reserve_blocks(self, count: int):
+        # Make sure tbllong has room for `count` blocks. Grows by doubling and
+        # swaps in the new arrays in one assignment, so a concurrent lookup
+        # keeps reading the old (still correct) copy.
+        if count > MAX_INDEX + 1:
+            raise ValueError(f"DIR-24-8 table supports at most {MAX_INDEX + 1} blocks of long prefixes")
+        capacity = len(self.tbllong) >> 8
+        if count <= capacity:
+            return
+        capacity = min(max(count, capacity * 2), MAX_INDEX + 1)
+        tbllong = np.zeros(capacity << 8, dtype=np.uint16)
+        lenlong = np.zeros(capacity << 8, dtype=np.uint8)
+        tbllong[:len(self.tbllong)] = self.tbllong
+        lenlong[:len(self.lenlong)] = self.lenlong
+        self.lenlong = lenlong
+        self.tbllong = tbllong
+
+    def _block_for(self, slot: int) -> int:
+        # The tbllong block for /24 number `slot`, creating it if needed
+        entry = int(self.tbl24[slot])
+        if entry & POINTER:
+            return entry & MAX_INDEX
+
+        # New block: start out with whatever the /24 entry pointed to
+        self._reserve_blocks(self.blocks + 1)
+        block = self.blocks
+        self.blocks += 1
+        self.tbllong[block << 8:(block + 1) << 8] = entry
+        self.lenlong[block << 8:(block + 1) << 8] = self.len24[slot]
+        # Only now point the /24 entry at the finished block
+        self.tbl24[slot] = POINTER | block
+        return block
+
+    def _fill(self, network: int, prefix_len: int, link_id: int, owner_len: int, owned):
+        # Write link_id/owner_len into every entry covered by the prefix for
+        # which owned(entry_lengths) is True. Entries owned by a longer prefix
+        # are never touched.
+        if prefix_len > 24:
+            block = self._block_for(network >> 8)
+            start = (block << 8) | (network & 0xFF)
+            end = start + (1 << (32 - prefix_len))
+            lens = self.lenlong[start:end]
+            mine = owned(lens)
+            self.tbllong[start:end][mine] = link_id
+            lens[mine] = owner_len
+            return
+
+        start = network >> 8
+        end = start + (1 << (24 - prefix_len))
+        entries = self.tbl24[start:end]
+        lens = self.len24[start:end]
+        mine = owned(lens)
+        pointers = (entries & POINTER) != 0
+
+        # Plain entries are overwritten directly...
+        entries[mine & ~pointers] = link_id
+        # ...while slots that point to a block are updated inside the block
+        for slot in np.flatnonzero(mine & pointers):
+            block = int(entries[slot]) & MAX_INDEX
+            block_lens = self.lenlong[block << 8:(block + 1) << 8]
+            block_mine = owned(block_lens)
+            self.tbllong[block << 8:(block + 1) << 8][block_mine] = link_id
+            block_lens[block_mine] = owner_len
+        lens[mine] = owner_len
+
+    def insert(self, network: int, prefix_len: int, link):
+        # Add or replace a route. Only entries currently owned by a prefix
+        # of the same length or shorter change hands.
+        link_id = self.link_id(link)
+        self.prefixes[(network, prefix_len)] = link_id
+        self._fill(network, prefix_len, link_id, prefix_len, lambda lens: lens <= prefix_len)
+
+    def remove(self, network: int, prefix_len: int) -> bool:
+        # Withdraw a route. The entries it owned go back to the next shorter
+        # prefix that covers it (or to the default route).
+        if self.prefixes.pop((network, prefix_len), None) is None:
+            return False
+
+        link_id, covering_len = 0, 0
+        for length in range(prefix_len - 1, -1, -1):
+            covering = (network & ((0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF), length)
+            if covering in self.prefixes:
+                link_id, covering_len = self.prefixes[covering], length
+                break
+
+        # Two different prefixes of the same length never overlap, so the
+        # entries with exactly this length in the range are the ones we own.
+        self._fill(network, prefix_len, link_id, covering_len, lambda lens: lens == prefix_len)
+        return True
+
+    def lookup(self, address: int) -> int:
+        # One read for prefixes up to /24, a second one for longer prefixes
+        entry = self.tbl24[address >> 8]
+        if entry & POINTER:
+            entry = self.tbllong[((int(entry) & MAX_INDEX) << 8) | (address & 0xFF)]
+        return int(entry)
+
+    def lookup_link(self, address: int):
+        return self.links[self.lookup(address)]
+
+    def lookup_many(self, addresses: np.ndarray) -> np.ndarray:
+        # Vectorized version of lookup() for a uint32 array of addresses
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        entries = self.tbl24[addresses >> 8].astype(np.int32)
+        long = (entries & POINTER) != 0
+        if long.any():
+            blocks = entries[long] & MAX_INDEX
+            entries[long] = self.tbllong[(blocks << 8) | (addresses[long] & 0xFF).astype(np.int32)]
+        return entries
+
+    def save(self, path: str):
+        # Plain .npy files (not .npz) so load() can memory-map them
+        os.makedirs(path, exist_ok=True)
+        for name in ("tbl24", "len24", "tbllong", "lenlong"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        prefixes = np.array([(network, prefix_len, link_id) for (network, prefix_len), link_id in self.prefixes.items()],
+                            dtype=np.uint32).reshape(-1, 3)
+        np.save(os.path.join(path, "prefixes.npy"), prefixes)
+        with open(os.path.join(path, "table.json"), "w") as f:
+            json.dump({"links": self.links, "blocks": self.blocks}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "Dir248Table":
+        # With mmap=True nothing is read up front: the OS pages the table in
+        # as lookups touch it, so a restarted router is ready immediately.
+        # The mapping is copy-on-write, so insert()/remove() still work and
+        # never modify the saved files.
+        table = cls.__new__(cls)
+        mode = "c" if mmap else None
+        for name in ("tbl24", "len24", "tbllong", "lenlong"):
+            setattr(table, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode))
+        with open(os.path.join(path, "table.json")) as f:
+            meta = json.load(f)
+        table.links = meta["links"]
+        table._link_index = {link: i for i, link in enumerate(table.links)}
+        table.blocks = meta["blocks"]
+        table.prefixes = {(int(network), int(prefix_len)): int(link_id)
+                          for network, prefix_len, link_id in np.load(os.path.join(path, "prefixes.npy"))}
+        return table
+
+
+# --- Test Case ---
+if __name__ == "__main__":
+    import tempfile
+
+    print("--- Testing DIR-24-8 Table ---")
+
+    table = Dir248Table([
+        ("223.1.1.0/24", "Link 0"),
+        ("223.1.2.0/24", "Link 1"),
+        ("223.1.3.0/24", "Link 2"),
+        ("223.1.0.0/16", "Link 4 (ISP)"),
+        ("223.1.1.128/25", "Link 5"),
+    ])
+
+    cases = [
+        ("223.1.1.100", "Link 0"),
+        ("223.1.1.200", "Link 5"),
+        ("223.1.2.5", "Link 1"),
+        ("223.1.250.1", "Link 4 (ISP)"),
+        ("198.51.100.1", "Default Gateway"),
+    ]
+    for ip, expected in cases:
+        actual = table.lookup_link(ip_to_int(ip))
+        print(f'lookup("{ip}") -> "{actual}" (Expected: "{expected}")')
+        assert actual == expected
+
+    batch = table.lookup_many(np.array([ip_to_int(ip) for ip, _ in cases], dtype=np.uint32))
+    assert [table.links[i] for i in batch] == [expected for _, expected in cases]
+
+    # Withdraw the /25 and the /24 under it: both fall back to the /16
+    assert table.remove(*cidr_to_int("223.1.1.128/25")[::2])
+    assert table.remove(*cidr_to_int("223.1.1.0/24")[::2])
+    assert table.lookup_link(ip_to_int("223.1.1.200")) == "Link 4 (ISP)"
+    # ...and a new /26 only takes over its own quarter of the /24
+    table.insert(*cidr_to_int("223.1.1.192/26")[::2], "Link 6")
+    assert table.lookup_link(ip_to_int("223.1.1.200")) == "Link 6"
+    assert table.lookup_link(ip_to_int("223.1.1.100")) == "Link 4 (ISP)"
+    print("insert/remove: PASSED")
+    cases = [(ip, table.lookup_link(ip_to_int(ip))) for ip, _ in cases]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        table.save(tmp)
+        loaded = Dir248Table.load(tmp)
+        assert [loaded.lookup_link(ip_to_int(ip)) for ip, _ in cases] == [expected for _, expected in cases]
+        del loaded
+
+    print("DIR-24-8 Test: PASSED")
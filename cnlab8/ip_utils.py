@@ -1,5 +1,9 @@
 def ip_to_binary(ip_address: str) -> str:
     
+    # IPv6 addresses become a 128-character string instead
+    if ':' in ip_address:
+        return f'{ipv6_to_int(ip_address):0128b}'
+    
     # Split the IP address into its four octets
     octets = ip_address.split('.')
     
@@ -38,6 +42,124 @@ def get_network_prefix(ip_cidr: str) -> str:
     
     return network_prefix
 
+# --- Integer API ---
+# The string functions above are easy to read, but every call builds a fresh
+# 32-character string. Routers compare addresses millions of times, so the
+# functions below keep an address as a plain 32-bit integer and do prefix
+# matching with bitwise AND instead of string slicing.
+
+def ip_to_int(ip_address: str) -> int:
+    # "192.168.1.1" -> 0xC0A80101
+    a, b, c, d = ip_address.split('.')
+    return (int(a) << 24) | (int(b) << 16) | (int(c) << 8) | int(d)
+
+def int_to_ip(address: int) -> str:
+    # 0xC0A80101 -> "192.168.1.1"
+    return f'{address >> 24}.{(address >> 16) & 0xFF}.{(address >> 8) & 0xFF}.{address & 0xFF}'
+
+def prefix_mask(prefix_len: int) -> int:
+    # /23 -> 0xFFFFFE00 (prefix_len ones followed by zeros)
+    return (0xFFFFFFFF << (32 - prefix_len)) & 0xFFFFFFFF
+
+def cidr_to_int(ip_cidr: str) -> tuple:
+    # "200.23.16.0/23" -> (network_int, mask, prefix_len)
+    # Host bits are cleared, exactly like get_network_prefix() drops them.
+    ip_address, prefix_len_str = ip_cidr.split('/')
+    prefix_len = int(prefix_len_str)
+    mask = prefix_mask(prefix_len)
+    return ip_to_int(ip_address) & mask, mask, prefix_len
+
+def matches_prefix(address: int, network: int, mask: int) -> bool:
+    # Integer equivalent of ip_to_binary(ip).startswith(prefix)
+    return address & mask == network
+
+# --- IPv6 ---
+# An IPv6 address is eight 16-bit groups written in hex ("2001:db8:0:0:0:0:0:1").
+# One run of zero groups may be shortened to "::" ("2001:db8::1"), and the last
+# 32 bits may be written as a dotted quad ("::ffff:192.0.2.1").
+
+def _hex_groups(text: str, ip_address: str) -> list:
+    # "2001:db8" -> [0x2001, 0xdb8]; every group needs 1 to 4 hex digits
+    if not text:
+        return []
+    groups = text.split(':')
+    for group in groups:
+        if not 1 <= len(group) <= 4 or any(digit not in '0123456789abcdefABCDEF' for digit in group):
+            raise ValueError(f"Invalid IPv6 address: {ip_address!r}")
+    return [int(group, 16) for group in groups]
+
+def ipv6_to_int(ip_address: str) -> int:
+    # "2001:db8::1" -> 0x20010db8000000000000000000000001
+    # An embedded IPv4 tail counts as the last two groups
+    text = ip_address
+    tail = []
+    if '.' in text:
+        head, _, dotted = text.rpartition(':')
+        v4 = ip_to_int(dotted)
+        tail = [v4 >> 16, v4 & 0xFFFF]
+        # "::192.0.2.1" leaves ":" behind, which is still the "::"
+        text = head + ':' if head.endswith(':') else head
+    
+    # Only one "::" is allowed, and apart from it no group may be empty
+    # (":::" or "1::2::3" are not addresses)
+    if '::' in text:
+        parts = text.split('::')
+        if len(parts) != 2:
+            raise ValueError(f"Invalid IPv6 address: {ip_address!r}")
+        left_groups = _hex_groups(parts[0], ip_address)
+        right_groups = _hex_groups(parts[1], ip_address) + tail
+        missing = 8 - len(left_groups) - len(right_groups)
+        if missing < 1:
+            raise ValueError(f"Invalid IPv6 address: {ip_address!r}")
+        groups = left_groups + [0] * missing + right_groups
+    else:
+        groups = _hex_groups(text, ip_address) + tail
+    
+    if len(groups) != 8:
+        raise ValueError(f"Invalid IPv6 address: {ip_address!r}")
+    
+    value = 0
+    for group in groups:
+        value = (value << 16) | group
+    return value
+
+def int_to_ipv6(address: int) -> str:
+    # 0x20010db8000000000000000000000001 -> "2001:db8::1"
+    groups = [(address >> shift) & 0xFFFF for shift in range(112, -1, -16)]
+    
+    # Find the longest run of zero groups (at least two) to squash into "::"
+    best_start, best_len = -1, 1
+    start = None
+    for i, group in enumerate(groups + [1]):
+        if group == 0 and start is None:
+            start = i
+        elif group != 0 and start is not None:
+            if i - start > best_len:
+                best_start, best_len = start, i - start
+            start = None
+    
+    text = [f'{group:x}' for group in groups]
+    if best_start < 0:
+        return ':'.join(text)
+    return ':'.join(text[:best_start]) + '::' + ':'.join(text[best_start + best_len:])
+
+def parse_cidr(ip_cidr: str) -> tuple:
+    # Like cidr_to_int(), but also understands IPv6:
+    #   "2001:db8::/32" -> (network_int, mask, 32, 6)
+    #   "10.0.0.0/8"    -> (network_int, mask, 8, 4)
+    ip_address, prefix_len_str = ip_cidr.split('/')
+    prefix_len = int(prefix_len_str)
+    if ':' not in ip_address:
+        return cidr_to_int(ip_cidr) + (4,)
+    mask = ((1 << 128) - 1) ^ ((1 << (128 - prefix_len)) - 1)
+    return ipv6_to_int(ip_address) & mask, mask, prefix_len, 6
+
+def parse_address(ip_address: str) -> tuple:
+    # "192.168.1.1" -> (int, 4), "2001:db8::1" -> (int, 6)
+    if ':' in ip_address:
+        return ipv6_to_int(ip_address), 6
+    return ip_to_int(ip_address), 4
+
 # --- Test Cases ---
 if __name__ == "__main__":
     print("--- Testing Part 1: IP Utilities ---")
@@ -62,3 +184,42 @@ if __name__ == "__main__":
     print(f'  Expected: 11001000000101110001000')
 
     print(f'  Actual:   {prefix}')
+
+    print("\n--- Testing Integer API ---")
+    
+    ip_int = ip_to_int(ip1)
+    print(f'ip_to_int("{ip1}") -> {ip_int:#010x} (Expected: 0xc0a80101)')
+    assert ip_int == 0xC0A80101
+    assert int_to_ip(ip_int) == ip1
+    
+    network, mask, length = cidr_to_int(cidr)
+    print(f'cidr_to_int("{cidr}") -> ({network:#010x}, {mask:#010x}, {length})')
+    assert f'{network:032b}'[:length] == prefix
+    assert mask == 0xFFFFFE00 and length == 23
+    assert matches_prefix(ip_to_int("200.23.17.254"), network, mask)
+    assert not matches_prefix(ip_to_int("200.23.18.0"), network, mask)
+    print("  Integer API Test: PASSED")
+
+    print("\n--- Testing IPv6 ---")
+    
+    ip6 = "2001:db8::1"
+    ip6_int = ipv6_to_int(ip6)
+    print(f'ipv6_to_int("{ip6}") -> {ip6_int:#x}')
+    assert ip6_int == 0x20010DB8000000000000000000000001
+    assert int_to_ipv6(ip6_int) == ip6
+    assert ipv6_to_int("::") == 0 and int_to_ipv6(0) == "::"
+    assert ipv6_to_int("::ffff:192.0.2.1") == 0xFFFFC0000201
+    assert int_to_ipv6(ipv6_to_int("2001:0:0:1:0:0:0:1")) == "2001:0:0:1::1"
+    for malformed in (":::", "1::2::3", "1:::2", ":1:2:3:4:5:6:7", "1:2:3:4:5:6:7:", "1:2:3:4:5:6:7:8:9",
+                      "12345::", "g::1", "::1.2.3", "1:2:3:4:5:6:7:1.2.3.4"):
+        try:
+            ipv6_to_int(malformed)
+        except ValueError:
+            continue
+        raise AssertionError(f"{malformed!r} was accepted")
+    assert ip_to_binary(ip6).startswith('0010000000000001')
+    
+    network6, _, length6, version = parse_cidr("2001:db8:abcd:12::/48")
+    print(f'parse_cidr("2001:db8:abcd:12::/48") -> ({int_to_ipv6(network6)}, {length6}, v{version})')
+    assert int_to_ipv6(network6) == "2001:db8:abcd::" and version == 6
+    print("  IPv6 Test: PASSED")
@@ -0,0 +1,140 @@
+import random
+from collections import deque
+
+from scheduler import Packet, StreamingPriorityScheduler, DrrScheduler, WfqScheduler, packet_size
+
+
+class FifoQueue:
+    # Streaming version of fifo_scheduler(), for comparison
+    def __init__(self):
+        self._queue = deque()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, packet) -> bool:
+        self._queue.append(packet)
+        return True
+
+    def dequeue(self):
+        return self._queue.popleft()
+
+
+def poisson_arrivals(class_rates: dict, payload_size: int, duration: float, seed: int = 1) -> list:
+    # Random (arrival_time, packet) pairs, sorted by time.
+    # class_rates: {class: offered load in bytes per second}
+    rng = random.Random(seed)
+    payload = "x" * payload_size
+    arrivals = []
+    for cls, rate in class_rates.items():
+        packets_per_second = rate / payload_size
+        t = rng.expovariate(packets_per_second)
+        while t < duration:
+            arrivals.append((t, Packet(priority=cls, source_ip=f"10.0.0.{cls}", dest_ip="192.168.1.1", payload=payload)))
+            t += rng.expovariate(packets_per_second)
+    arrivals.sort(key=lambda item: item[0])
+    return arrivals
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def jain_fairness(values: list) -> float:
+    # 1.0 when every value is equal, 1/n when one flow gets everything
+    total = sum(values)
+    squares = sum(value * value for value in values)
+    return total * total / (len(values) * squares) if squares else 0.0
+
+
+def simulate(scheduler, arrivals: list, link_rate: float, duration: float, size_of=packet_size) -> dict:
+    """
+    Serve `arrivals` over a link of `link_rate` bytes/s for `duration` seconds.
+
+    The link sends one packet at a time; whenever it goes idle the scheduler
+    picks the next one. Returns per-class statistics:
+      {class: {"sent", "bytes", "throughput", "p50", "p95", "p99"}}
+    where throughput is in bytes/s and p50/p95/p99 are queueing + transmission
+    delays in seconds.
+    """
+    arrived_at = {}
+    delays = {}
+    sent_bytes = {}
+    next_arrival = 0
+    now = 0.0
+
+    while now < duration:
+        # Everything that has arrived by now joins the queue
+        while next_arrival < len(arrivals) and arrivals[next_arrival][0] <= now:
+            arrival_time, packet = arrivals[next_arrival]
+            if scheduler.enqueue(packet):
+                arrived_at[id(packet)] = arrival_time
+            next_arrival += 1
+
+        if not len(scheduler):
+            if next_arrival == len(arrivals):
+                break
+            # Link idle: skip ahead to the next arrival
+            now = arrivals[next_arrival][0]
+            continue
+
+        packet = scheduler.dequeue()
+        size = size_of(packet)
+        now += size / link_rate
+        if now > duration:
+            break
+        cls = packet.priority
+        delays.setdefault(cls, []).append(now - arrived_at.pop(id(packet)))
+        sent_bytes[cls] = sent_bytes.get(cls, 0) + size
+
+    stats = {}
+    for cls in sorted(sent_bytes):
+        cls_delays = sorted(delays[cls])
+        stats[cls] = {
+            "sent": len(cls_delays),
+            "bytes": sent_bytes[cls],
+            "throughput": sent_bytes[cls] / duration,
+            "p50": percentile(cls_delays, 0.50),
+            "p95": percentile(cls_delays, 0.95),
+            "p99": percentile(cls_delays, 0.99),
+        }
+    return stats
+
+
+def compare_under_overload(weights: dict, class_rates: dict, link_rate: float, duration: float, payload_size: int = 500):
+    print(f"--- Link {link_rate / 1e6:.1f} MB/s, offered {sum(class_rates.values()) / 1e6:.1f} MB/s "
+          f"for {duration:.0f} s, weights {weights} ---")
+    arrivals = poisson_arrivals(class_rates, payload_size, duration)
+
+    schedulers = {
+        "FIFO": FifoQueue(),
+        "Strict priority": StreamingPriorityScheduler(),
+        # DRR quantum: one full packet per unit of weight
+        "DRR": DrrScheduler({cls: weight * payload_size for cls, weight in weights.items()}),
+        "WFQ": WfqScheduler(weights),
+    }
+    for name, scheduler in schedulers.items():
+        stats = simulate(scheduler, arrivals, link_rate, duration)
+        print(f"\n  {name}")
+        print(f"  {'Class':<5} | {'Throughput':>13} | {'p50 delay':>10} | {'p95 delay':>10} | {'p99 delay':>10}")
+        for cls in sorted(class_rates):
+            s = stats.get(cls, {"throughput": 0.0, "p50": float('nan'), "p95": float('nan'), "p99": float('nan')})
+            print(f"  {cls:<5} | {s['throughput'] / 1e3:8.1f} kB/s | {s['p50'] * 1e3:7.1f} ms "
+                  f"| {s['p95'] * 1e3:7.1f} ms | {s['p99'] * 1e3:7.1f} ms")
+        # Fairness of throughput relative to each class's weight
+        shares = [stats.get(cls, {"throughput": 0.0})["throughput"] / weights[cls] for cls in sorted(class_rates)]
+        print(f"  Jain fairness index (weighted): {jain_fairness(shares):.3f}")
+    print()
+
+
+if __name__ == "__main__":
+    # Three classes (VOIP=0, Video=1, Data=2), each offering more than its
+    # share so the 1 MB/s link is overloaded by 2x.
+    compare_under_overload(
+        weights={0: 4, 1: 2, 2: 1},
+        class_rates={0: 0.8e6, 1: 0.7e6, 2: 0.5e6},
+        link_rate=1e6,
+        duration=20.0,
+    )
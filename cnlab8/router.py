@@ -1,18 +1,163 @@
-from ip_utils import ip_to_binary, get_network_prefix
+import bisect
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ip_utils import ip_to_binary, get_network_prefix, ip_to_int, int_to_ip, cidr_to_int, ipv6_to_int, parse_cidr
+from trie import PrefixTrie
+from dir24_8 import Dir248Table
+
+# The lookup structures a Router can use:
+#   "linear" - sorted list scanned with str.startswith (O(routes) per lookup)
+#   "int"    - one dict of networks per prefix length, longest first: one
+#              AND and one dict lookup per length (O(prefix lengths) per lookup)
+#   "trie"   - path-compressed binary trie on integers (O(32) per lookup)
+#   "dir24_8" - flat 2^24-entry table plus 256-entry blocks (1-2 array reads per lookup)
+BACKENDS = ("linear", "int", "trie", "dir24_8")
+# IPv6 routes always live in a 128-bit PrefixTrie, whatever the backend:
+# the other structures only make sense for 32-bit addresses.
+
+# Tells a cache miss apart from a cached result
+_MISS = object()
+
+def _first_octets(networks: dict) -> bytearray:
+    # 256 flags, one per first octet: is there a network starting with it?
+    flags = bytearray(256)
+    for network in networks:
+        flags[network >> 24] = 1
+    return flags
 
 class Router:
     
-    def __init__(self, routes: list):
+    def __init__(self, routes: list = None, backend: str = "linear", verbose: bool = True, cache_size: int = 0,
+                 table: Dir248Table = None):
+        # `table` is a prebuilt (or Dir248Table.load()ed) DIR-24-8 table to
+        # route IPv4 with instead of building one from `routes`; `routes`
+        # can then only add IPv6 routes.
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        if table is not None and backend != "dir24_8":
+            raise ValueError(f"A prebuilt table needs the 'dir24_8' backend, not {backend!r}")
+        
+        self.backend = backend
+        # Printing every route is fine for the lab, but not for 500k routes
+        self.verbose = verbose
         
         # This list will store our processed, optimized forwarding table
         # We will store tuples of: (binary_prefix, prefix_length, output_link)
+        # For the "int" backend the tuples are:
+        #   (mask, prefix_length, {network_int: output_link}, first_octets)
+        # where first_octets[i] is 1 if some network of that length starts with i
         self.forwarding_table = []
         
+        # Only used by the "trie" backend
+        self.trie = None
+        # Only used by the "dir24_8" backend
+        self.table = None
+        # IPv6 routes, for every backend
+        self.trie6 = PrefixTrie(width=128)
+        
+        # Every installed prefix: (network_int, prefix_length) -> output_link.
+        # setdefault keeps the first of two identical prefixes, like the sorted table.
+        # IPv4 and IPv6 are kept apart: "0.0.0.0/0" and "::/0" are different routes.
+        self.prefixes = {}
+        self.prefixes6 = {}
+        routes4 = []
+        for cidr, link in routes or ():
+            network, _, prefix_len, version = parse_cidr(cidr)
+            if version == 6:
+                self.prefixes6.setdefault((network, prefix_len), link)
+            else:
+                self.prefixes.setdefault((network, prefix_len), link)
+                routes4.append((cidr, link))
+        for (network, prefix_len), link in self.prefixes6.items():
+            self.trie6.insert(network, prefix_len, link)
+        routes = routes4
+        if table is not None:
+            if routes:
+                raise ValueError("IPv4 routes come from the prebuilt table")
+            self.prefixes = {prefix: table.links[link_id] for prefix, link_id in table.prefixes.items()}
+        
+        # route_many() returns indices into this list; index 0 is the default route
+        self.links = ["Default Gateway"]
+        self._link_index = {"Default Gateway": 0}
+        # prefix_length -> (mask, sorted networks, link indices), built on first use
+        self._batch_tables = None
+        
+        # add_route()/withdraw_route() take this; lookups never do
+        self._update_lock = threading.Lock()
+        
+        # Optional LRU cache in front of route_packet: dest_ip -> output_link.
+        # Real traffic goes to a few destinations over and over, so most
+        # packets can skip the lookup entirely. 0 turns the cache off.
+        # Route changes swap in a new dict; see route_packet()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        
         # Call the private helper method to build the table
-        self._build_forwarding_table(routes)
+        if backend == "trie":
+            self._build_trie(routes)
+        elif backend == "dir24_8":
+            self._build_dir24_8(routes, table)
+        elif backend == "int":
+            self._build_int_table(routes)
+        else:
+            self._build_forwarding_table(routes)
+
+    def _build_trie(self, routes: list):
+        if self.verbose:
+            print("Building forwarding trie...")
+        self.trie = PrefixTrie()
+        
+        # The linear table keeps the *first* of two identical prefixes
+        # (the sort is stable), while trie.insert keeps the *last* one.
+        # Inserting in reverse order makes both backends agree.
+        for cidr, link in reversed(routes):
+            network, _, prefix_len = cidr_to_int(cidr)
+            self.trie.insert(network, prefix_len, link)
+        
+        if self.verbose:
+            print(f"  Trie holds {len(self.trie)} prefixes")
+
+    def _build_dir24_8(self, routes: list, table: Dir248Table = None):
+        if table is None:
+            if self.verbose:
+                print("Building DIR-24-8 table...")
+            table = Dir248Table(routes)
+        elif self.verbose:
+            print(f"Using prebuilt DIR-24-8 table ({len(table.prefixes)} prefixes)")
+        self.table = table
+        # The table numbers links the same way route_many() does
+        self.links = self.table.links
+        self._link_index = self.table._link_index
+        if self.verbose:
+            print(f"  {len(self.table.tbllong) // 256} blocks for prefixes longer than /24")
+
+    def _build_int_table(self, routes: list):
+        if self.verbose:
+            print("Building integer forwarding table...")
+        buckets = {}
+        for cidr, link in routes:
+            # "223.1.1.0/24" -> (0xDF010100, 0xFFFFFF00, 24)
+            network, mask, prefix_len = cidr_to_int(cidr)
+            # setdefault keeps the first of two identical prefixes, like the sorted table
+            buckets.setdefault(prefix_len, (mask, {}))[1].setdefault(network, link)
+            if self.verbose:
+                print(f'  Added route: {cidr} -> {link} (Network: {network:#010x}, Mask: {mask:#010x})')
+        
+        # Same longest-prefix-first ordering as the string table, but a
+        # lookup costs one dict probe per prefix length instead of one
+        # compare per route
+        self.forwarding_table = [(mask, prefix_len, networks, _first_octets(networks))
+                                 for prefix_len, (mask, networks) in sorted(buckets.items(), reverse=True)]
 
     def _build_forwarding_table(self, routes: list):
-        print("Building forwarding table...")
+        if self.verbose:
+            print("Building forwarding table...")
         for cidr, link in routes:
             # Convert the CIDR string (e.g., "223.1.1.0/24")
             # into its binary prefix (e.g., "11011111...")
@@ -23,7 +168,8 @@ class Router:
             
             # Add the processed route to our internal table
             self.forwarding_table.append((binary_prefix, prefix_len, link))
-            print(f'  Added route: {cidr} -> {link} (Prefix: {binary_prefix})')
+            if self.verbose:
+                print(f'  Added route: {cidr} -> {link} (Prefix: {binary_prefix})')
             
         # CRUCIAL STEP: Sort the table by prefix length, from longest to shortest.
         # This makes the routing algorithm simple: the first match we find
@@ -31,11 +177,286 @@ class Router:
         # We use `reverse=True` to sort in descending order.
         self.forwarding_table.sort(key=lambda route: route[1], reverse=True)
         
+        if not self.verbose:
+            return
         print("\nSorted Forwarding Table (Longest prefix first):")
         for prefix, length, link in self.forwarding_table:
             print(f'  Len: {length:<2} | Prefix: {prefix:<24} | Link: {link}')
 
+    def route_address(self, dest: int, version: int = 4) -> str:
+        # Route a destination that is already an integer (see ip_to_int /
+        # ipv6_to_int). This is the fast path: no strings are built at all.
+        if version == 6:
+            return self.trie6.lookup(dest, "Default Gateway")
+        
+        # The trie walks at most 32 bits and already knows the longest match
+        if self.trie is not None:
+            return self.trie.lookup(dest, "Default Gateway")
+        
+        if self.table is not None:
+            return self.table.lookup_link(dest)
+        
+        if self.backend == "int":
+            # dest >> 24 is a cached small int, so lengths with no network
+            # in this /8 are skipped without allocating anything. An index
+            # loop rather than `for`: the list iterator alone would be a
+            # 48-byte allocation on every lookup.
+            table = self.forwarding_table
+            octet = dest >> 24
+            i = 0
+            while i < len(table):
+                mask, length, networks, first_octets = table[i]
+                if first_octets[octet]:
+                    link = networks.get(dest & mask, _MISS)
+                    if link is not _MISS:
+                        return link
+                i += 1
+            return "Default Gateway"
+        
+        return self._lookup_packet(int_to_ip(dest))
+
+    def _link_id(self, link) -> int:
+        # Index of `link` in self.links, adding it if it is new
+        if self.table is not None:
+            return self.table.link_id(link)
+        if link not in self._link_index:
+            self._link_index[link] = len(self.links)
+            self.links.append(link)
+        return self._link_index[link]
+
+    def _build_batch_tables(self):
+        # Group the routes by prefix length. For every length we keep a sorted
+        # NumPy array of network addresses and the link index of each one, so
+        # a whole batch can be matched with one np.searchsorted() per length.
+        by_length = {}
+        for (network, prefix_len), link in self.prefixes.items():
+            by_length.setdefault(prefix_len, {})[network] = self._link_id(link)
+        
+        tables = {}
+        for prefix_len, routes in by_length.items():
+            networks = np.fromiter(routes.keys(), dtype=np.uint32)
+            link_ids = np.fromiter(routes.values(), dtype=np.int32)
+            order = np.argsort(networks)
+            mask = np.uint32((0xFFFFFFFF << (32 - prefix_len)) & 0xFFFFFFFF)
+            tables[prefix_len] = (mask, networks[order], link_ids[order])
+        self._batch_tables = tables
+
+    def route_many(self, dests) -> np.ndarray:
+        # Route a whole batch of destinations at once.
+        # `dests` is a list of address strings or a NumPy uint32 array.
+        # Returns an int32 array of indices into self.links, so
+        #   self.links[router.route_many(ips)[i]] == router.route_packet(ips[i])
+        if isinstance(dests, np.ndarray):
+            return self._route_many4(dests.astype(np.uint32, copy=False))
+        
+        # NumPy has no 128-bit integers, so IPv6 entries in a mixed list go
+        # through the trie one by one while the IPv4 ones stay vectorized.
+        v6_positions = [i for i, dest in enumerate(dests) if ':' in dest]
+        if not v6_positions:
+            addresses = np.fromiter((ip_to_int(dest) for dest in dests), dtype=np.uint32, count=len(dests))
+            return self._route_many4(addresses)
+        
+        result = np.zeros(len(dests), dtype=np.int32)
+        v6_set = set(v6_positions)
+        v4_positions = [i for i in range(len(dests)) if i not in v6_set]
+        addresses = np.fromiter((ip_to_int(dests[i]) for i in v4_positions), dtype=np.uint32, count=len(v4_positions))
+        result[v4_positions] = self._route_many4(addresses)
+        result[v6_positions] = [self._link_id(self.trie6.lookup(ipv6_to_int(dests[i]), "Default Gateway"))
+                                for i in v6_positions]
+        return result
+
+    def _route_many4(self, addresses: np.ndarray) -> np.ndarray:
+        # The DIR-24-8 table is already a flat array: just index it
+        if self.table is not None:
+            return self.table.lookup_many(addresses)
+        
+        if self._batch_tables is None:
+            self._build_batch_tables()
+        # Updates swap in a new dict instead of changing this one
+        tables = self._batch_tables
+        
+        # Everything starts on the default route (index 0)
+        result = np.zeros(len(addresses), dtype=np.int32)
+        # Positions of the addresses that have not matched any prefix yet
+        pending = np.arange(len(addresses))
+        
+        # Longest prefix first, just like the sorted forwarding table
+        for prefix_len in sorted(tables, reverse=True):
+            if pending.size == 0:
+                break
+            mask, networks, link_ids = tables[prefix_len]
+            # Masked compare against every prefix of this length at once
+            keys = addresses[pending] & mask
+            slots = np.searchsorted(networks, keys)
+            slots[slots == len(networks)] = 0
+            hit = networks[slots] == keys
+            # A hit at a longer length always wins, so matched addresses
+            # drop out before the shorter lengths are tried.
+            result[pending[hit]] = link_ids[slots[hit]]
+            pending = pending[~hit]
+        
+        return result
+
+    def add_route(self, cidr: str, link):
+        # Install (or replace) one route without rebuilding the table.
+        #   "trie":    O(32), only the nodes on the prefix's path change
+        #   "dir24_8": rewrites just the entries the prefix covers
+        #   "linear"/"int": copy of the list with one entry inserted in order
+        # Lookups running at the same time see the table either before or
+        # after the change, never half of it.
+        network, _, prefix_len, version = parse_cidr(cidr)
+        with self._update_lock:
+            if version == 6:
+                self.prefixes6[(network, prefix_len)] = link
+                self.trie6.insert(network, prefix_len, link)
+            else:
+                self.prefixes[(network, prefix_len)] = link
+                self._apply_update(network, prefix_len, link)
+            self._invalidate_cache()
+        if self.verbose:
+            print(f'  Added route: {cidr} -> {link}')
+
+    def withdraw_route(self, cidr: str) -> bool:
+        # Remove one route. Destinations it covered fall back to the next
+        # shorter matching prefix. Returns False if the route was not installed.
+        network, _, prefix_len, version = parse_cidr(cidr)
+        with self._update_lock:
+            if version == 6:
+                if self.prefixes6.pop((network, prefix_len), None) is None:
+                    return False
+                self.trie6.remove(network, prefix_len)
+            else:
+                if self.prefixes.pop((network, prefix_len), None) is None:
+                    return False
+                self._apply_update(network, prefix_len, None)
+            self._invalidate_cache()
+        if self.verbose:
+            print(f'  Withdrew route: {cidr}')
+        return True
+
+    def _invalidate_cache(self):
+        # Any route change can change the answer for a cached destination.
+        # Swap in an empty cache rather than clearing the old one: a lookup
+        # that raced with this update stores its (maybe stale) answer in the
+        # dict it started with, which nobody reads any more.
+        self._cache = OrderedDict()
+
+    def cache_stats(self) -> dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._cache),
+            "capacity": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "evictions": self.cache_evictions,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+        }
+
+    def _apply_update(self, network: int, prefix_len: int, link):
+        # link=None means withdraw
+        if self.trie is not None:
+            if link is None:
+                self.trie.remove(network, prefix_len)
+            else:
+                self.trie.insert(network, prefix_len, link)
+        elif self.table is not None:
+            if link is None:
+                self.table.remove(network, prefix_len)
+            else:
+                self.table.insert(network, prefix_len, link)
+        else:
+            self._update_forwarding_table(network, prefix_len, link)
+        
+        if self._batch_tables is not None:
+            self._update_batch_tables(network, prefix_len, link)
+
+    def _update_forwarding_table(self, network: int, prefix_len: int, link):
+        if self.backend == "int":
+            # Copy only the dict for this length; the others are shared
+            table = [bucket for bucket in self.forwarding_table if bucket[1] != prefix_len]
+            old = [bucket[2] for bucket in self.forwarding_table if bucket[1] == prefix_len]
+            networks = dict(old[0]) if old else {}
+            if link is None:
+                networks.pop(network, None)
+            else:
+                networks[network] = link
+            mask = (0xFFFFFFFF << (32 - prefix_len)) & 0xFFFFFFFF
+            new_route = (mask, prefix_len, networks, _first_octets(networks)) if networks else None
+            length_of = lambda bucket: bucket[1]
+        else:
+            # Same string get_network_prefix() would have produced
+            binary_prefix = f'{network:032b}'[:prefix_len]
+            new_route = (binary_prefix, prefix_len, link) if link is not None else None
+            table = [route for route in self.forwarding_table if route[0] != binary_prefix]
+            length_of = lambda route: route[1]
+        
+        if new_route is not None:
+            # Keep the longest-prefix-first order: go in front of the first shorter prefix
+            position = bisect.bisect_left(table, -prefix_len, key=lambda route: -length_of(route))
+            table.insert(position, new_route)
+        # Lookups iterate whichever list they started with
+        self.forwarding_table = table
+
+    def _update_batch_tables(self, network: int, prefix_len: int, link):
+        tables = dict(self._batch_tables)
+        mask = np.uint32((0xFFFFFFFF << (32 - prefix_len)) & 0xFFFFFFFF)
+        empty = np.zeros(0, dtype=np.uint32)
+        _, networks, link_ids = tables.get(prefix_len, (mask, empty, empty.astype(np.int32)))
+        
+        slot = int(np.searchsorted(networks, network))
+        found = slot < len(networks) and networks[slot] == network
+        if link is None:
+            if not found:
+                return
+            networks = np.delete(networks, slot)
+            link_ids = np.delete(link_ids, slot)
+        elif found:
+            link_ids = link_ids.copy()
+            link_ids[slot] = self._link_id(link)
+        else:
+            networks = np.insert(networks, slot, network)
+            link_ids = np.insert(link_ids, slot, self._link_id(link))
+        
+        if len(networks):
+            tables[prefix_len] = (mask, networks, link_ids)
+        else:
+            del tables[prefix_len]
+        self._batch_tables = tables
+
     def route_packet(self, dest_ip: str) -> str:
+        if not self.cache_size:
+            return self._lookup_packet(dest_ip)
+        
+        # Lookups don't take _update_lock, so work on the dict as it is now
+        # and expect other threads to evict entries under our feet.
+        cache = self._cache
+        link = cache.get(dest_ip, _MISS)
+        if link is not _MISS:
+            self.cache_hits += 1
+            try:
+                cache.move_to_end(dest_ip)
+            except KeyError:
+                pass
+            return link
+        
+        self.cache_misses += 1
+        link = self._lookup_packet(dest_ip)
+        cache[dest_ip] = link
+        if len(cache) > self.cache_size:
+            try:
+                cache.popitem(last=False)
+                self.cache_evictions += 1
+            except KeyError:
+                pass
+        return link
+
+    def _lookup_packet(self, dest_ip: str) -> str:
+        if ':' in dest_ip:
+            return self.trie6.lookup(ipv6_to_int(dest_ip), "Default Gateway")
+        
+        if self.backend != "linear":
+            return self.route_address(ip_to_int(dest_ip))
+        
         # (a) Convert the destination IP to its 32-bit binary representation
         binary_dest_ip = ip_to_binary(dest_ip)
         
@@ -92,3 +513,102 @@ if __name__ == "__main__":
     link4 = my_router.route_packet(ip4)
 
     print(f'route_packet("{ip4}") -> "{link4}" (Expected: "Default Gateway")')
+
+    # --- The other backends must agree with the linear matcher ---
+    for backend in ("int", "trie", "dir24_8"):
+        print(f"\n--- Running Test Cases ({backend} backend) ---")
+        other_router = Router(routes_list, backend=backend)
+        for ip in (ip1, ip2, ip3, ip4):
+            other_link = other_router.route_packet(ip)
+            print(f'route_packet("{ip}") -> "{other_link}" (Expected: "{my_router.route_packet(ip)}")')
+            assert other_link == my_router.route_packet(ip)
+
+    # --- Batch routing must agree with route_packet ---
+    print("\n--- Running Test Cases (route_many) ---")
+    test_ips = [ip1, ip2, ip3, ip4]
+    link_ids = my_router.route_many(test_ips)
+    batch_links = [my_router.links[i] for i in link_ids]
+    print(f'route_many({test_ips}) -> {batch_links}')
+    assert batch_links == [my_router.route_packet(ip) for ip in test_ips]
+
+    # --- Route updates ---
+    print("\n--- Running Test Cases (add_route / withdraw_route) ---")
+    for backend in BACKENDS:
+        router = Router(routes_list, backend=backend, verbose=False)
+        router.route_many(test_ips)
+        router.add_route("223.1.250.0/24", "Link 3")
+        assert router.route_packet(ip3) == "Link 3"
+        assert router.withdraw_route("223.1.1.0/24")
+        assert not router.withdraw_route("223.1.1.0/24")
+        assert router.route_packet(ip1) == "Link 4 (ISP)"
+        assert [router.links[i] for i in router.route_many(test_ips)] == \
+            ["Link 4 (ISP)", "Link 1", "Link 3", "Default Gateway"]
+        print(f"  {backend}: PASSED")
+
+    # --- Restart from a saved DIR-24-8 table ---
+    print("\n--- Running Test Cases (saved dir24_8 table) ---")
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        Router(routes_list, backend="dir24_8", verbose=False).table.save(tmp)
+        loaded_router = Router(table=Dir248Table.load(tmp), backend="dir24_8", verbose=False)
+        assert [loaded_router.route_packet(ip) for ip in test_ips] == [my_router.route_packet(ip) for ip in test_ips]
+        assert loaded_router.withdraw_route("223.1.1.0/24")
+        assert loaded_router.route_packet(ip1) == "Link 4 (ISP)"
+        del loaded_router
+    print("  Loaded Table Test: PASSED")
+
+    # --- Route cache ---
+    print("\n--- Running Test Cases (route cache) ---")
+    cached_router = Router(routes_list, verbose=False, cache_size=2)
+    for ip in (ip1, ip1, ip2, ip3, ip1):
+        cached_router.route_packet(ip)
+    stats = cached_router.cache_stats()
+    print(f"  {stats}")
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 2)
+    # A route change must not leave stale answers in the cache
+    cached_router.add_route("223.1.1.0/25", "Link 5")
+    assert cached_router.route_packet(ip1) == "Link 5"
+    # A cached None (a route whose link is None) is a hit, not a miss
+    none_router = Router(routes_list + [("198.51.100.0/24", None)], verbose=False, cache_size=2)
+    none_router.route_packet(ip4)
+    assert none_router.route_packet(ip4) is None and none_router.cache_misses == 1
+    # Lookups racing with route changes (which never take the lookup path's lock)
+    def flap():
+        for _ in range(2000):
+            cached_router.add_route("223.1.2.0/25", "Link 9")
+            cached_router.withdraw_route("223.1.2.0/25")
+    flapper = threading.Thread(target=flap)
+    flapper.start()
+    while flapper.is_alive():
+        for ip in (ip1, ip2, ip3, ip4):
+            cached_router.route_packet(ip)
+    flapper.join()
+    assert cached_router.route_packet(ip2) == "Link 1"
+    print("  Cache Test: PASSED")
+
+    # --- Mixed IPv4 / IPv6 table ---
+    print("\n--- Running Test Cases (IPv6) ---")
+    mixed_routes = routes_list + [
+        ("2001:db8::/32", "Link 6"),
+        ("2001:db8:abcd::/48", "Link 7"),
+        ("::/0", "Link 8 (v6 upstream)"),
+    ]
+    v6_cases = [
+        ("2001:db8:abcd:1::1", "Link 7"),
+        ("2001:db8:1::1", "Link 6"),
+        ("2a00::1", "Link 8 (v6 upstream)"),
+    ]
+    for backend in BACKENDS:
+        router = Router(mixed_routes, backend=backend, verbose=False)
+        for ip, expected in v6_cases:
+            assert router.route_packet(ip) == expected
+        # "::/0" must not catch IPv4 traffic
+        assert router.route_packet(ip4) == "Default Gateway"
+        mixed_ips = [ip1] + [ip for ip, _ in v6_cases] + [ip4]
+        assert [router.links[i] for i in router.route_many(mixed_ips)] == \
+            [router.route_packet(ip) for ip in mixed_ips]
+        assert router.withdraw_route("2001:db8:abcd::/48")
+        assert router.route_packet("2001:db8:abcd:1::1") == "Link 6"
+    for ip, expected in v6_cases:
+        print(f'route_packet("{ip}") -> "{Router(mixed_routes, verbose=False).route_packet(ip)}" (Expected: "{expected}")')
+    print("  IPv6 Test: PASSED")
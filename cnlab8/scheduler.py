@@ -1,5 +1,11 @@
+import heapq
+from collections import deque
 from dataclasses import dataclass
 
+import numpy as np
+
+from ip_utils import ip_to_int, int_to_ip
+
 @dataclass  # <-- FIX: Removed order=True from here to resolve the TypeError
 class Packet:
     priority: int  # We define this first to make default sorting easy
@@ -12,6 +18,90 @@ class Packet:
     def __lt__(self, other):
         return self.priority < other.priority
 
+@dataclass(slots=True)
+class SlottedPacket:
+    # Same fields as Packet, but with __slots__ instead of a per-instance
+    # __dict__. The four strings still dominate the memory; PacketBatch
+    # below gets rid of those too.
+    priority: int
+    source_ip: str
+    dest_ip: str
+    payload: str
+    
+    def __lt__(self, other):
+        return self.priority < other.priority
+
+class PacketBatch:
+    """
+    Columnar storage for many packets at once.
+
+    Instead of one Python object per packet, every field is a NumPy array:
+      priority        - int16
+      source / dest   - uint32 addresses (see ip_utils.ip_to_int)
+      payload_start / payload_len - where each payload sits in `payload_data`,
+                        one bytes buffer shared by the whole batch
+    Reordering a batch (take) only permutes the small fixed-size columns;
+    the payload bytes never move.
+    """
+
+    def __init__(self, priority, source, dest, payload_start, payload_len, payload_data: bytes):
+        self.priority = np.asarray(priority, dtype=np.int16)
+        self.source = np.asarray(source, dtype=np.uint32)
+        self.dest = np.asarray(dest, dtype=np.uint32)
+        self.payload_start = np.asarray(payload_start, dtype=np.int64)
+        self.payload_len = np.asarray(payload_len, dtype=np.int32)
+        self.payload_data = payload_data
+
+    @classmethod
+    def from_packets(cls, packets: list) -> "PacketBatch":
+        payloads = [packet.payload.encode() for packet in packets]
+        payload_len = np.fromiter((len(payload) for payload in payloads), dtype=np.int32, count=len(payloads))
+        payload_start = np.zeros(len(payloads), dtype=np.int64)
+        np.cumsum(payload_len[:-1], out=payload_start[1:])
+        return cls(
+            np.fromiter((packet.priority for packet in packets), dtype=np.int16, count=len(packets)),
+            np.fromiter((ip_to_int(packet.source_ip) for packet in packets), dtype=np.uint32, count=len(packets)),
+            np.fromiter((ip_to_int(packet.dest_ip) for packet in packets), dtype=np.uint32, count=len(packets)),
+            payload_start,
+            payload_len,
+            b"".join(payloads),
+        )
+
+    def __len__(self) -> int:
+        return len(self.priority)
+
+    def __getitem__(self, index):
+        # batch[i] -> Packet, batch[a:b] -> PacketBatch (so fifo_scheduler works as is)
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        return Packet(
+            priority=int(self.priority[index]),
+            source_ip=int_to_ip(int(self.source[index])),
+            dest_ip=int_to_ip(int(self.dest[index])),
+            payload=self.payload(index),
+        )
+
+    def payload(self, index: int) -> str:
+        start = int(self.payload_start[index])
+        return self.payload_data[start:start + int(self.payload_len[index])].decode()
+
+    def payload_chars(self) -> np.ndarray:
+        # Characters in each payload (what len(packet.payload) counts): the
+        # UTF-8 bytes that don't continue a multi-byte character
+        data = np.frombuffer(self.payload_data, dtype=np.uint8)
+        continued = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum((data & 0xC0) == 0x80, out=continued[1:])
+        end = self.payload_start + self.payload_len
+        return self.payload_len - (continued[end] - continued[self.payload_start])
+
+    def take(self, order: np.ndarray) -> "PacketBatch":
+        # A new batch with the packets in `order` (an index array)
+        return PacketBatch(self.priority[order], self.source[order], self.dest[order],
+                           self.payload_start[order], self.payload_len[order], self.payload_data)
+
+    def to_packets(self) -> list:
+        return [self[i] for i in range(len(self))]
+
 def fifo_scheduler(packet_list: list) -> list:
     # FCFS means the first packet in is the first packet out.
     # Since the input list is already in arrival order,
@@ -25,8 +115,237 @@ def priority_scheduler(packet_list: list) -> list:
     # takes a packet `p` and returns its `priority` attribute.
     # `sorted` will then order the packets based on this number,
     # from smallest to largest.
+    if isinstance(packet_list, PacketBatch):
+        # Same ordering for a columnar batch: a stable argsort on the
+        # priority column keeps arrival order within a priority, just like
+        # sorted() does, without comparing any Python objects.
+        return packet_list.take(np.argsort(packet_list.priority, kind="stable"))
     return sorted(packet_list, key=lambda p: p.priority)
 
+class StreamingPriorityScheduler:
+    """
+    Priority queue for packets that arrive one at a time.
+
+    priority_scheduler() needs the whole list up front. This keeps a heap
+    instead, so enqueue() and dequeue() are O(log n) each. Heap entries are
+    (priority, arrival_number, packet): the arrival number breaks ties, so
+    packets with the same priority leave in FIFO order (a heap on
+    Packet.__lt__ alone would not guarantee that).
+
+    With max_depth set, a full queue drops packets:
+      "tail"     - the arriving packet is dropped
+      "priority" - the lowest-priority (newest) queued packet is dropped to
+                   make room, if the arriving packet has a higher priority
+    """
+
+    def __init__(self, max_depth: int = None, drop_policy: str = "tail"):
+        if drop_policy not in ("tail", "priority"):
+            raise ValueError(f"Unknown drop policy {drop_policy!r}, expected 'tail' or 'priority'")
+        self.max_depth = max_depth
+        self.drop_policy = drop_policy
+        self._heap = []
+        # Only for priority-aware drop: the same packets ordered worst-first,
+        # as (-priority, -arrival_number, packet), plus the arrival numbers
+        # still queued. Entries that already left are skipped lazily in both heaps.
+        self._evicting = drop_policy == "priority" and max_depth is not None
+        self._worst = []
+        self._live = set()
+        self._arrivals = 0
+        self._size = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def enqueue(self, packet) -> bool:
+        # Returns False if the packet was dropped
+        if self.max_depth is not None and self._size >= self.max_depth:
+            if not self._evicting or not self._evict_worse_than(packet.priority):
+                self.dropped += 1
+                return False
+
+        arrival = self._arrivals
+        self._arrivals += 1
+        heapq.heappush(self._heap, (packet.priority, arrival, packet))
+        if self._evicting:
+            heapq.heappush(self._worst, (-packet.priority, -arrival, packet))
+            self._live.add(arrival)
+        self._size += 1
+        return True
+
+    def dequeue(self):
+        # Highest priority (lowest number) first, FIFO within a priority
+        heap = self._heap
+        while heap:
+            _, arrival, packet = heapq.heappop(heap)
+            if self._evicting:
+                if arrival not in self._live:
+                    # Evicted while queued
+                    continue
+                self._live.discard(arrival)
+            self._size -= 1
+            return packet
+        raise IndexError("dequeue from an empty scheduler")
+
+    def _evict_worse_than(self, priority: int) -> bool:
+        # Drop the worst queued packet if it has a lower priority than `priority`
+        worst = self._worst
+        live = self._live
+        while worst and -worst[0][1] not in live:
+            heapq.heappop(worst)
+        if not worst or -worst[0][0] <= priority:
+            return False
+        live.discard(-heapq.heappop(worst)[1])
+        self._size -= 1
+        self.dropped += 1
+        # Dequeued packets leave stale entries behind in _worst; rebuild it
+        # once they outnumber the live ones so memory stays O(queue depth).
+        if len(worst) > 2 * self._size + 64:
+            self._worst = [item for item in worst if -item[1] in live]
+            heapq.heapify(self._worst)
+        return True
+
+def packet_size(packet) -> int:
+    # Bytes on the wire for the fair-queueing schedulers. The lab packets
+    # only carry a text payload, so that is what we count.
+    return max(len(packet.payload), 1)
+
+class DrrScheduler:
+    """
+    Deficit Round Robin (Shreedhar & Varghese).
+
+    Packets are grouped into classes by their `priority` field. Each class
+    has its own FIFO queue and a quantum in bytes; every round a backlogged
+    class may send up to its quantum (plus whatever it saved from earlier
+    rounds). Unlike priority_scheduler(), a busy high class can't starve the
+    others: each class gets a share of the link proportional to its quantum.
+
+    enqueue() and dequeue() are O(1) as long as each quantum is at least the
+    largest packet size.
+    """
+
+    def __init__(self, quanta: dict, size_of=packet_size):
+        # quanta: {class: bytes per round}
+        self.quanta = dict(quanta)
+        self.size_of = size_of
+        self._queues = {cls: deque() for cls in self.quanta}
+        self._deficit = {cls: 0 for cls in self.quanta}
+        # Classes with packets waiting, in round-robin order
+        self._active = deque()
+        # Whether the class at the front of _active got its quantum this round
+        self._granted = False
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def enqueue(self, packet) -> bool:
+        queue = self._queues[packet.priority]
+        if not queue:
+            self._active.append(packet.priority)
+        queue.append(packet)
+        self._size += 1
+        return True
+
+    def dequeue(self):
+        active = self._active
+        while active:
+            cls = active[0]
+            if not self._granted:
+                self._deficit[cls] += self.quanta[cls]
+                self._granted = True
+
+            queue = self._queues[cls]
+            size = self.size_of(queue[0])
+            if size <= self._deficit[cls]:
+                self._deficit[cls] -= size
+                packet = queue.popleft()
+                self._size -= 1
+                if not queue:
+                    # An idle class does not keep its savings
+                    self._deficit[cls] = 0
+                    active.popleft()
+                    self._granted = False
+                return packet
+
+            # Not enough credit left: move on to the next class
+            active.rotate(-1)
+            self._granted = False
+        raise IndexError("dequeue from an empty scheduler")
+
+class WfqScheduler:
+    """
+    Weighted Fair Queueing with virtual finish times.
+
+    Every packet is stamped with the time it would finish under ideal
+    bit-by-bit weighted sharing, and packets leave in order of that stamp:
+        finish = max(virtual_time, last_finish[class]) + size / weight[class]
+    The virtual time is taken from the packet in service (the self-clocked
+    variant, SCFQ), which avoids simulating the fluid system. Packets are
+    grouped into classes by their `priority` field.
+
+    enqueue() and dequeue() are O(log n).
+    """
+
+    def __init__(self, weights: dict, size_of=packet_size):
+        # weights: {class: relative share of the link}
+        self.weights = dict(weights)
+        self.size_of = size_of
+        self._heap = []
+        self._last_finish = {cls: 0.0 for cls in self.weights}
+        self._virtual_time = 0.0
+        self._arrivals = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def enqueue(self, packet) -> bool:
+        cls = packet.priority
+        start = max(self._virtual_time, self._last_finish[cls])
+        finish = start + self.size_of(packet) / self.weights[cls]
+        self._last_finish[cls] = finish
+        # The arrival number keeps FIFO order for equal finish times
+        heapq.heappush(self._heap, (finish, self._arrivals, packet))
+        self._arrivals += 1
+        return True
+
+    def dequeue(self):
+        if not self._heap:
+            raise IndexError("dequeue from an empty scheduler")
+        finish, _, packet = heapq.heappop(self._heap)
+        self._virtual_time = finish
+        return packet
+
+    def schedule_batch(self, batch: PacketBatch) -> PacketBatch:
+        # Order a whole PacketBatch that arrives at once and leaves as a
+        # whole: the same as enqueue() for every packet followed by dequeue()
+        # for every packet, scheduler state included, as long as nothing
+        # else is queued. All packets arrive at the current virtual time, so
+        # within a class the finish times are a running total of
+        # size / weight on top of the class's last finish: one cumsum per
+        # class instead of one heap operation per packet.
+        if self.size_of is packet_size:
+            sizes = np.maximum(batch.payload_chars(), 1)
+        else:
+            # A custom size_of needs the packet itself
+            sizes = np.fromiter((self.size_of(batch[i]) for i in range(len(batch))), dtype=float, count=len(batch))
+        finish = np.empty(len(batch))
+        for cls in np.unique(batch.priority):
+            cls = int(cls)
+            members = np.flatnonzero(batch.priority == cls)
+            steps = np.empty(len(members) + 1)
+            steps[0] = max(self._virtual_time, self._last_finish[cls])
+            steps[1:] = sizes[members] / self.weights[cls]
+            # Summed left to right, like the finish times enqueue() chains
+            finish[members] = np.cumsum(steps)[1:]
+            self._last_finish[cls] = float(finish[members[-1]])
+        self._arrivals += len(batch)
+        # Stable sort on finish time keeps arrival order for ties
+        order = np.argsort(finish, kind="stable")
+        if len(batch):
+            self._virtual_time = float(finish[order[-1]])
+        return batch.take(order)
+
 # --- Test Case ---
 if __name__ == "__main__":
     print("\n--- Testing Part 3: Schedulers ---")
@@ -78,3 +397,92 @@ if __name__ == "__main__":
     assert priority_payloads == expected_priority
 
     print("  Priority Test: PASSED")
+
+    # --- Verify StreamingPriorityScheduler ---
+    print("\n--- Testing Streaming Priority Scheduler ---")
+    streaming = StreamingPriorityScheduler()
+    for pkt in packets_in_arrival_order:
+        streaming.enqueue(pkt)
+    streaming_payloads = [streaming.dequeue().payload for _ in range(len(streaming))]
+    print(f'  Output Order: {streaming_payloads}')
+    assert streaming_payloads == expected_priority
+    print("  Streaming Test: PASSED")
+
+    # A full queue with priority-aware drop pushes out the data packets
+    # (newest first) to make room for the video and VOIP packets
+    bounded = StreamingPriorityScheduler(max_depth=3, drop_policy="priority")
+    for pkt in packets_in_arrival_order:
+        bounded.enqueue(pkt)
+    bounded_payloads = [bounded.dequeue().payload for _ in range(len(bounded))]
+    print(f'  Priority drop (depth 3): {bounded_payloads}, dropped {bounded.dropped}')
+    assert bounded_payloads == ["VOIP Packet 1", "VOIP Packet 2", "Video Packet 1"]
+    assert bounded.dropped == 2
+
+    tail = StreamingPriorityScheduler(max_depth=3, drop_policy="tail")
+    for pkt in packets_in_arrival_order:
+        tail.enqueue(pkt)
+    tail_payloads = [tail.dequeue().payload for _ in range(len(tail))]
+    print(f'  Tail drop (depth 3):     {tail_payloads}, dropped {tail.dropped}')
+    assert tail_payloads == ["VOIP Packet 1", "Data Packet 1", "Data Packet 2"]
+    print("  Bounded Queue Test: PASSED")
+
+    # --- Verify DRR and WFQ ---
+    # Class 0 gets twice the share of class 2. With a backlog of equal-sized
+    # packets in both, two class-0 packets leave for every class-2 packet.
+    print("\n--- Testing DRR and WFQ Schedulers ---")
+    backlog = [Packet(priority=0, source_ip="20.2.2.2", dest_ip="192.168.1.3", payload=f"VOIP {i}") for i in range(6)]
+    backlog += [Packet(priority=2, source_ip="10.1.1.2", dest_ip="192.168.1.1", payload=f"Data {i}") for i in range(6)]
+    for fair in (DrrScheduler({0: 12, 2: 6}), WfqScheduler({0: 2, 2: 1})):
+        for pkt in backlog:
+            fair.enqueue(pkt)
+        fair_payloads = [fair.dequeue().payload for _ in range(9)]
+        print(f'  {type(fair).__name__}: {fair_payloads}')
+        assert sum(p.startswith("VOIP") for p in fair_payloads) == 6
+        assert [p for p in fair_payloads if p.startswith("Data")] == ["Data 0", "Data 1", "Data 2"]
+    print("  Fair Queueing Test: PASSED")
+
+    # --- Verify PacketBatch ---
+    print("\n--- Testing PacketBatch ---")
+    batch = PacketBatch.from_packets(packets_in_arrival_order)
+    batch_fifo = [p.payload for p in fifo_scheduler(batch).to_packets()]
+    batch_priority = [p.payload for p in priority_scheduler(batch).to_packets()]
+    print(f'  FIFO Order:     {batch_fifo}')
+    print(f'  Priority Order: {batch_priority}')
+    assert batch_fifo == expected_fifo
+    assert batch_priority == expected_priority
+    assert batch[2] == packets_in_arrival_order[2]
+    
+    wfq = WfqScheduler({0: 2, 2: 1})
+    batch_wfq = [p.payload for p in wfq.schedule_batch(PacketBatch.from_packets(backlog)).to_packets()]
+    for pkt in backlog:
+        wfq.enqueue(pkt)
+    assert batch_wfq == [wfq.dequeue().payload for _ in range(len(backlog))]
+    # A batch after some traffic starts from the scheduler's state (virtual
+    # time and per-class finish tags), not from 0
+    streamed, batched = WfqScheduler({0: 2, 2: 1}), WfqScheduler({0: 2, 2: 1})
+    for fair in (streamed, batched):
+        for pkt in backlog[6:]:
+            fair.enqueue(pkt)
+        fair.dequeue()
+    later = backlog[:3] + [Packet(priority=2, source_ip="10.1.1.2", dest_ip="192.168.1.1", payload=f"Data {i}")
+                           for i in (6, 7)]
+    for pkt in later:
+        streamed.enqueue(pkt)
+    streamed_order = [pkt for pkt in (streamed.dequeue() for _ in range(len(streamed))) if any(pkt is p for p in later)]
+    batch_order = batched.schedule_batch(PacketBatch.from_packets(later)).to_packets()
+    assert [p.payload for p in batch_order] == [p.payload for p in streamed_order] == \
+        ["VOIP 0", "VOIP 1", "VOIP 2", "Data 6", "Data 7"]
+    # Sizes are counted the same way on both paths: in characters for
+    # non-ASCII payloads, and with a custom size_of
+    mixed = [Packet(priority=1, source_ip="10.1.1.2", dest_ip="192.168.1.1", payload='é' * 100),
+             Packet(priority=1, source_ip="10.1.1.2", dest_ip="192.168.1.1", payload='x' * 150),
+             Packet(priority=2, source_ip="10.1.1.3", dest_ip="192.168.1.2", payload='y' * 120)]
+    utf8_size = lambda packet: len(packet.payload.encode())
+    for size_of, expected in ((packet_size, ['é', 'y', 'x']), (utf8_size, ['y', 'é', 'x'])):
+        streamed, batched = WfqScheduler({1: 1, 2: 1}, size_of), WfqScheduler({1: 1, 2: 1}, size_of)
+        for pkt in mixed:
+            streamed.enqueue(pkt)
+        streamed_order = [streamed.dequeue().payload[0] for _ in mixed]
+        batch_order = [p.payload[0] for p in batched.schedule_batch(PacketBatch.from_packets(mixed)).to_packets()]
+        assert batch_order == streamed_order == expected
+    print("  PacketBatch Test: PASSED")
@@ -0,0 +1,222 @@
+from ip_utils import ip_to_int, cidr_to_int
+
+# Marker for "this node does not carry a route". We can't use None because
+# nothing stops a caller from using None as an output link.
+_NO_ROUTE = object()
+
+
+class _TrieNode:
+    # __slots__ keeps each node small; a full table has hundreds of
+    # thousands of them.
+    __slots__ = ("bits", "nbits", "link", "children")
+
+    def __init__(self, bits: int, nbits: int, link=_NO_ROUTE):
+        # The bits on the edge leading *into* this node, stored as an integer
+        # `nbits` wide. Because the trie is path-compressed, one edge can hold
+        # many bits instead of one node per bit.
+        self.bits = bits
+        self.nbits = nbits
+        self.link = link
+        # children[0] / children[1] -> _TrieNode or None
+        self.children = [None, None]
+
+
+class PrefixTrie:
+    """
+    Path-compressed binary trie (a.k.a. Patricia / radix trie) for
+    longest-prefix match on integer addresses.
+
+    Prefixes are given as (network_int, prefix_len) pairs, as returned by
+    ip_utils.cidr_to_int(). A lookup walks at most one edge per address bit,
+    so it costs O(width) no matter how many prefixes are stored.
+
+    insert() and remove() also cost O(width), and never change a node that a
+    concurrent lookup may be standing on: new nodes are fully built first and
+    then published with a single reference assignment, so every lookup sees
+    the table either before or after an update.
+    """
+
+    def __init__(self, width: int = 32):
+        # Number of bits in an address (32 for IPv4)
+        self.width = width
+        # The root represents the empty prefix (i.e. "/0").
+        self.root = _TrieNode(0, 0)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def insert(self, network: int, prefix_len: int, link):
+        width = self.width
+        # Keep only the prefix bits, right-aligned: "/23" -> a 23-bit integer
+        prefix = network >> (width - prefix_len)
+        node = self.root
+        pos = 0
+
+        while True:
+            remaining = prefix_len - pos
+
+            # The whole prefix has been consumed: this node *is* the prefix
+            if remaining == 0:
+                if node.link is _NO_ROUTE:
+                    self.size += 1
+                node.link = link
+                return
+
+            # The unconsumed part of the prefix, `remaining` bits wide
+            rest = prefix & ((1 << remaining) - 1)
+            bit = rest >> (remaining - 1)
+            child = node.children[bit]
+
+            # No edge in this direction yet: hang the remaining bits off a new leaf
+            if child is None:
+                node.children[bit] = _TrieNode(rest, remaining, link)
+                self.size += 1
+                return
+
+            # Count how many leading bits of the edge label agree with `rest`.
+            # XOR the two (aligned to the shorter one); the highest set bit of
+            # the result is the first position where they disagree.
+            nbits = child.nbits
+            limit = min(nbits, remaining)
+            diff = (child.bits >> (nbits - limit)) ^ (rest >> (remaining - limit))
+            common = limit - diff.bit_length()
+
+            # The whole edge matches: keep walking down
+            if common == nbits:
+                node = child
+                pos += common
+                continue
+
+            # The prefix diverges (or ends) in the middle of the edge, so we
+            # split the edge in two with a new middle node. The lower half is
+            # a copy of `child` with a shorter label; `child` itself is left
+            # untouched for any lookup that is already on its way through it.
+            tail_bits = nbits - common
+            tail = _TrieNode(child.bits & ((1 << tail_bits) - 1), tail_bits, child.link)
+            tail.children = child.children
+            middle = _TrieNode(child.bits >> tail_bits, common)
+            middle.children[tail.bits >> (tail_bits - 1)] = tail
+
+            remaining -= common
+            if remaining == 0:
+                # The new prefix ends exactly at the split point
+                middle.link = link
+            else:
+                rest &= (1 << remaining) - 1
+                middle.children[rest >> (remaining - 1)] = _TrieNode(rest, remaining, link)
+
+            # Publish the finished subtree in one step
+            node.children[bit] = middle
+            self.size += 1
+            return
+
+    def remove(self, network: int, prefix_len: int) -> bool:
+        # Withdraw a prefix. Returns False if it was not in the trie.
+        width = self.width
+        prefix = network >> (width - prefix_len)
+        node = self.root
+        # (parent, bit) pairs for the path down to `node`
+        path = []
+        pos = 0
+
+        while pos < prefix_len:
+            remaining = prefix_len - pos
+            rest = prefix & ((1 << remaining) - 1)
+            bit = rest >> (remaining - 1)
+            child = node.children[bit]
+            if child is None or child.nbits > remaining or rest >> (remaining - child.nbits) != child.bits:
+                return False
+            path.append((node, bit))
+            node = child
+            pos += child.nbits
+
+        if node.link is _NO_ROUTE:
+            return False
+        node.link = _NO_ROUTE
+        self.size -= 1
+
+        # The root always stays, even when it carries no route
+        if not path:
+            return True
+
+        # Tidy up so the trie stays path-compressed: a routeless node with no
+        # children is dropped, and one with a single child is merged into it.
+        parent, bit = path[-1]
+        self._compact(parent, bit)
+        if len(path) > 1 and parent.link is _NO_ROUTE:
+            grandparent, parent_bit = path[-2]
+            self._compact(grandparent, parent_bit)
+        return True
+
+    def _compact(self, parent, bit):
+        node = parent.children[bit]
+        if node.link is not _NO_ROUTE:
+            return
+        children = [child for child in node.children if child is not None]
+        if not children:
+            parent.children[bit] = None
+        elif len(children) == 1:
+            # Glue the node's label onto its only child's label
+            only = children[0]
+            merged = _TrieNode((node.bits << only.nbits) | only.bits, node.nbits + only.nbits, only.link)
+            merged.children = only.children
+            parent.children[bit] = merged
+
+    def lookup(self, address: int, default=None):
+        # Walk down as far as the address agrees with the edge labels and
+        # remember the last (i.e. longest) node that carried a route.
+        node = self.root
+        best = node.link
+        pos = 0
+        width = self.width
+
+        while pos < width:
+            child = node.children[(address >> (width - 1 - pos)) & 1]
+            if child is None:
+                break
+            nbits = child.nbits
+            pos += nbits
+            # Compare the next `nbits` address bits with the edge label
+            if (address >> (width - pos)) & ((1 << nbits) - 1) != child.bits:
+                break
+            node = child
+            if node.link is not _NO_ROUTE:
+                best = node.link
+
+        return default if best is _NO_ROUTE else best
+
+
+# --- Test Case ---
+if __name__ == "__main__":
+    print("--- Testing PrefixTrie (Longest Prefix Match) ---")
+
+    trie = PrefixTrie()
+    for cidr, link in [
+        ("223.1.1.0/24", "Link 0"),
+        ("223.1.2.0/24", "Link 1"),
+        ("223.1.3.0/24", "Link 2"),
+        ("223.1.0.0/16", "Link 4 (ISP)"),
+    ]:
+        network, _, prefix_len = cidr_to_int(cidr)
+        trie.insert(network, prefix_len, link)
+
+    for ip, expected in [
+        ("223.1.1.100", "Link 0"),
+        ("223.1.2.5", "Link 1"),
+        ("223.1.250.1", "Link 4 (ISP)"),
+        ("198.51.100.1", "Default Gateway"),
+    ]:
+        actual = trie.lookup(ip_to_int(ip), "Default Gateway")
+        print(f'lookup("{ip}") -> "{actual}" (Expected: "{expected}")')
+        assert actual == expected
+
+    # Withdrawing the /24 falls back to the covering /16
+    network, _, prefix_len = cidr_to_int("223.1.1.0/24")
+    assert trie.remove(network, prefix_len)
+    assert not trie.remove(network, prefix_len)
+    actual = trie.lookup(ip_to_int("223.1.1.100"), "Default Gateway")
+    print(f'after remove("223.1.1.0/24"): lookup("223.1.1.100") -> "{actual}" (Expected: "Link 4 (ISP)")')
+    assert actual == "Link 4 (ISP)"
+
+    print("PrefixTrie Test: PASSED")